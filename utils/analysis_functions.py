@@ -6,23 +6,453 @@ This module provides comprehensive statistical analysis functions specifically d
 for analyzing Portuguese municipal document annotations.
 """
 
+import os
+import time
+import hashlib
+import pickle
+import tracemalloc
+from pathlib import Path
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable, Union, Iterable
 from collections import Counter, defaultdict
-from scipy import stats
+from collections.abc import Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import combinations
+from dataclasses import dataclass
+from scipy import sparse, stats, special
 from scipy.stats import chi2_contingency, kruskal
 import warnings
 warnings.filterwarnings('ignore')
 
+from text_statistics import word_frequencies, iter_text_chunks, tokenize, WordFrequencyCounter, PORTUGUESE_STOPWORDS
+from sketches import HyperLogLog, HeavyHitters, TDigest, sketch_error_bounds
+from segment_views import sentence_density_view, section_density_view, windowed_cooccurrence
+from collocations import incidence_matrix, association_table, pair_collocations
+from positional_density import positional_profiles
+from voting_cohesion import voting_cohesion
+from near_duplicates import drop_near_duplicates
+
+# Source columns each report section reads, per table; a section's cache key fingerprints these
+SECTION_INPUTS = {
+    'corpus_statistics': {
+        'documents': ['municipality', 'date', 'text_length', 'token_count', 'entity_count', 'relation_count'],
+        'entities': ['entity_label', 'length', 'token_count'],
+        'relations': ['relation_label', 'posicionamento', 'resultado']
+    },
+    'municipality_analysis': {
+        'documents': ['municipality', 'text_length', 'token_count', 'entity_count', 'relation_count'],
+        'entities': ['municipality', 'entity_label'],
+        'relations': ['municipality', 'posicionamento', 'resultado']
+    },
+    'statistical_tests': {
+        'documents': ['filename', 'municipality', 'entity_count'],
+        'entities': ['filename', 'municipality', 'entity_label'],
+        'relations': ['municipality', 'posicionamento']
+    },
+    'temporal_analysis': {
+        'documents': ['filename', 'municipality', 'date'],
+        'entities': ['filename', 'entity_label'],
+        'relations': ['filename', 'posicionamento']
+    },
+    'entity_analysis': {
+        'entities': ['filename', 'entity_label', 'length', 'token_count', 'text']
+    },
+    'posicionamento_analysis': {
+        'relations': ['filename', 'municipality', 'posicionamento', 'resultado']
+    },
+    'assunto_analysis': {
+        'entities': ['filename', 'municipality', 'entity_label', 'fronteira', 'text', 'length', 'token_count',
+                     'tema', 'resumo']
+    },
+    'fronteiras_analysis': {
+        'entities': ['filename', 'municipality', 'entity_label', 'fronteira', 'length', 'token_count']
+    },
+    'metadata_analysis': {
+        'entities': ['filename', 'municipality', 'tipo_reuniao', 'participantes', 'presenca', 'partido', 'horario',
+                     'fronteira', 'posicionamento', 'tema']
+    }
+}
+
+# Report sections in report order
+REPORT_SECTIONS = list(SECTION_INPUTS)
+
+# Shared intermediates each section reads: 'document_dimension' or a contingency table given as
+# (frame, row column, column column). They are built once, and only for sections that are computed.
+SECTION_DEPENDENCIES = {
+    'corpus_statistics': [],
+    'municipality_analysis': [],
+    'statistical_tests': [('entities', 'municipality', 'entity_label'),
+                          ('relations', 'municipality', 'posicionamento'),
+                          ('entities', 'filename', 'entity_label')],
+    'temporal_analysis': ['document_dimension'],
+    'entity_analysis': [],
+    'posicionamento_analysis': [('relations', 'posicionamento', 'resultado')],
+    'assunto_analysis': [],
+    'fronteiras_analysis': [],
+    'metadata_analysis': [('entities', 'municipality', 'partido')]
+}
+
+
+def resolve_report_sections(names: Optional[Iterable[str]]) -> List[str]:
+    """
+    Resolve section names (full names or prefixes such as 'posicionamento', 'temporal') in report order.
+    
+    Args:
+        names: Requested sections; None selects every section
+    """
+    if names is None:
+        return list(REPORT_SECTIONS)
+    
+    selected = set()
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        matches = [section for section in REPORT_SECTIONS if section == name or section.startswith(f'{name}_')]
+        if len(matches) != 1:
+            raise ValueError(f"Unknown report section '{name}' (available: {', '.join(REPORT_SECTIONS)})")
+        selected.add(matches[0])
+    return [section for section in REPORT_SECTIONS if section in selected]
+
+
+def _source_fingerprint(*modules: str) -> str:
+    digest = hashlib.blake2b(digest_size=8)
+    for module in modules:
+        digest.update((Path(__file__).parent / module).read_bytes())
+    return digest.hexdigest()
+
+# Changes to the analysis code invalidate every cached section
+ANALYZER_CODE_VERSION = _source_fingerprint('analysis_functions.py', 'text_statistics.py', 'sketches.py')
+
+# Low-cardinality columns stored as categoricals, with categories shared across the three tables
+CATEGORICAL_COLUMNS = ['municipality', 'entity_type', 'entity_label', 'relation_type', 'relation_label',
+                       'fronteira', 'posicionamento', 'resultado', 'tema', 'tipo_reuniao', 'presenca', 'partido']
+
+# Span offset/size columns downcast to the smallest integer type that holds them
+DOWNCAST_COLUMNS = ['begin', 'end', 'length', 'token_count']
+
+
+def normalize_frame_dtypes(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Convert known low-cardinality columns to categoricals and downcast span integer columns.
+    
+    Categories are the sorted union of a column's values across all frames, so e.g. the
+    municipality codes of entities, relations and documents agree. Frames are copied, not
+    modified in place.
+    
+    Args:
+        frames: Tables by name (entities, relations, documents)
+    """
+    categories = {}
+    for column in CATEGORICAL_COLUMNS:
+        values = [frame[column].dropna().unique() for frame in frames.values() if column in frame.columns]
+        if values:
+            categories[column] = pd.CategoricalDtype(sorted(set(np.concatenate(values).tolist()), key=str))
+    
+    normalized = {}
+    for name, frame in frames.items():
+        conversions = {column: dtype for column, dtype in categories.items() if column in frame.columns}
+        frame = frame.astype(conversions) if conversions else frame.copy()
+        for column in DOWNCAST_COLUMNS:
+            if column in frame.columns and pd.api.types.is_integer_dtype(frame[column]):
+                frame[column] = pd.to_numeric(frame[column], downcast='integer')
+        normalized[name] = frame
+    return normalized
+
+
+def observed_value_counts(values: pd.Series, dropna: bool = True) -> pd.Series:
+    """value_counts() without the zero rows a categorical reports for unobserved categories."""
+    counts = values.value_counts(dropna=dropna)
+    return counts[counts > 0]
+
+@dataclass
+class ContingencyTable:
+    """Co-occurrence counts of two categorical columns, stored dense or sparse."""
+    row_column: str
+    col_column: str
+    row_levels: pd.Index
+    col_levels: pd.Index
+    counts: Union[np.ndarray, sparse.csr_matrix]
+    
+    @property
+    def is_sparse(self) -> bool:
+        return sparse.issparse(self.counts)
+    
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.counts.shape
+    
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+    
+    def to_frame(self) -> pd.DataFrame:
+        """Dense DataFrame laid out like pd.crosstab(rows, cols)."""
+        dense = self.counts.toarray() if self.is_sparse else self.counts
+        return pd.DataFrame(dense,
+                            index=pd.Index(self.row_levels, name=self.row_column),
+                            columns=pd.Index(self.col_levels, name=self.col_column))
+    
+    def chi2_test(self) -> Dict[str, Any]:
+        """
+        Chi-square test of independence and Cramér's V computed from the stored counts.
+        
+        Uses chi2 = sum(O^2 / E) - n over the non-zero cells only, so sparse tables are
+        never densified. 2x2 tables defer to chi2_contingency to keep Yates' correction.
+        """
+        n = self.total
+        dof = (self.shape[0] - 1) * (self.shape[1] - 1)
+        
+        if dof == 1:
+            chi2, p_val, dof, _ = chi2_contingency(self.to_frame())
+        else:
+            counts = self.counts.tocoo() if self.is_sparse else sparse.coo_matrix(self.counts)
+            row_totals = np.asarray(self.counts.sum(axis=1)).ravel()
+            col_totals = np.asarray(self.counts.sum(axis=0)).ravel()
+            expected = row_totals[counts.row] * col_totals[counts.col] / n
+            chi2 = float(np.sum(counts.data.astype(float) ** 2 / expected) - n)
+            p_val = stats.chi2.sf(chi2, dof) if dof > 0 else 1.0
+        
+        cramers_v = np.sqrt(chi2 / (n * (min(self.shape) - 1)))
+        return {
+            'test': 'Chi-square',
+            'chi2_statistic': chi2,
+            'p_value': p_val,
+            'degrees_of_freedom': dof,
+            'cramers_v': cramers_v,
+            'significant': p_val < 0.05,
+            'effect_size': 'large' if cramers_v > 0.5 else 'medium' if cramers_v > 0.3 else 'small'
+        }
+
+class ContingencyTableCache:
+    """
+    Cache of contingency tables keyed by (frame name, row column, column column).
+    
+    Tables are built once from integer codes: dense tables with np.bincount over combined
+    row/column keys, sparse tables from the unique combined keys, so large label or partido
+    vocabularies never allocate the full dense grid. Rows with a missing value in either
+    column are dropped, as pd.crosstab does.
+    """
+    
+    def __init__(self, frames: Dict[str, pd.DataFrame], sparse_threshold: int = 1_000_000):
+        self.frames = frames
+        self.sparse_threshold = sparse_threshold
+        self._tables = {}
+    
+    def get(self, frame: str, row_column: str, col_column: str,
+            sparse_storage: Optional[bool] = None) -> ContingencyTable:
+        """
+        Return the cached table for a column pair, building it on first use.
+        
+        Args:
+            frame: Name of a registered frame (e.g. 'entities', 'relations')
+            row_column: Column whose values become table rows
+            col_column: Column whose values become table columns
+            sparse_storage: Force sparse (True) or dense (False) storage; None picks sparse
+                when the table would exceed sparse_threshold cells
+        """
+        key = (frame, row_column, col_column)
+        if key not in self._tables:
+            self._tables[key] = self._build(self.frames[frame], row_column, col_column, sparse_storage)
+        return self._tables[key]
+    
+    def clear(self):
+        self._tables.clear()
+    
+    def _build(self, df: pd.DataFrame, row_column: str, col_column: str,
+               sparse_storage: Optional[bool]) -> ContingencyTable:
+        row_codes, row_levels = pd.factorize(df[row_column], sort=True)
+        col_codes, col_levels = pd.factorize(df[col_column], sort=True)
+        
+        valid = (row_codes >= 0) & (col_codes >= 0)
+        row_codes, col_codes = row_codes[valid], col_codes[valid]
+        
+        # Drop levels only seen alongside a missing value in the other column
+        row_used = np.bincount(row_codes, minlength=len(row_levels)) > 0
+        col_used = np.bincount(col_codes, minlength=len(col_levels)) > 0
+        row_codes = (np.cumsum(row_used) - 1)[row_codes]
+        col_codes = (np.cumsum(col_used) - 1)[col_codes]
+        row_levels, col_levels = row_levels[row_used], col_levels[col_used]
+        
+        n_rows, n_cols = len(row_levels), len(col_levels)
+        keys = row_codes.astype(np.int64) * n_cols + col_codes
+        if sparse_storage is None:
+            sparse_storage = n_rows * n_cols > self.sparse_threshold
+        
+        if sparse_storage:
+            cells, cell_counts = np.unique(keys, return_counts=True)
+            counts = sparse.csr_matrix((cell_counts, (cells // n_cols, cells % n_cols)), shape=(n_rows, n_cols))
+        else:
+            counts = np.bincount(keys, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+        
+        return ContingencyTable(row_column, col_column, pd.Index(row_levels), pd.Index(col_levels), counts)
+
 class AnnotationAnalyzer:
     """Comprehensive statistical analyzer for annotation data."""
     
-    def __init__(self, entities_df: pd.DataFrame, relations_df: pd.DataFrame, documents_df: pd.DataFrame):
-        self.entities_df = entities_df
-        self.relations_df = relations_df
-        self.documents_df = documents_df
+    def __init__(self, entities_df: pd.DataFrame, relations_df: pd.DataFrame, documents_df: pd.DataFrame,
+                 word_frequency_options: Optional[Dict[str, Any]] = None,
+                 sketch_mode: bool = False, sketch_memory_budget: int = 1 << 16,
+                 cache_dir: Optional[str] = None, profile: bool = False):
+        """
+        Args:
+            entities_df: Entity table from InceptionParser.create_entity_dataframe
+            relations_df: Relation table from InceptionParser.create_relations_dataframe
+            documents_df: Document table from InceptionParser.create_document_dataframe
+            word_frequency_options: WordFrequencyCounter options for the word-frequency fields
+                (e.g. {'remove_stopwords': True, 'fold_accents': True, 'n_jobs': 4})
+            sketch_mode: Replace exact distinct counts, top-N value counts, word frequencies and
+                length quantiles with bounded-memory sketches (see sketches.py for error bounds)
+            sketch_memory_budget: Memory budget in bytes for each sketch in sketch mode
+            cache_dir: Directory for cached report sections, keyed by the fingerprints of the
+                columns each section reads and the analyzer code version (None disables caching)
+            profile: Record wall time, CPU time, peak traced allocations and input row counts of
+                each report section in a '_profile' block (tracemalloc runs only while profiling)
+        """
+        # Categorical labels and downcast offsets make the groupbys below hash integer codes
+        normalized = normalize_frame_dtypes({'entities': entities_df, 'relations': relations_df,
+                                             'documents': documents_df})
+        self.entities_df = normalized['entities']
+        self.relations_df = normalized['relations']
+        self.documents_df = normalized['documents']
+        self.word_frequency_options = word_frequency_options or {}
+        self.sketch_mode = sketch_mode
+        self.sketch_memory_budget = sketch_memory_budget
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache_status = {}
+        self._column_fingerprints = {}
+        self.profile = profile
+        self.profile_records = {}
+        
+        # Document dimension for cheap time/municipality groupbys, built on first use, and the
+        # integer document key of every entity/relation row, computed once per table on first use
+        self._document_dimension = None
+        self._row_document_keys = {}
+        self.contingency_tables = ContingencyTableCache({
+            'entities': self.entities_df,
+            'relations': self.relations_df,
+            'documents': self.documents_df
+        })
+        
+    def _column_fingerprint(self, table: str, column: str) -> str:
+        """Content hash of one source column (values, order and dtype)."""
+        if (table, column) not in self._column_fingerprints:
+            frame = {'entities': self.entities_df, 'relations': self.relations_df, 'documents': self.documents_df}[table]
+            digest = hashlib.blake2b(f'{table}.{column}'.encode(), digest_size=16)
+            if column in frame.columns:
+                digest.update(str(frame[column].dtype).encode())
+                digest.update(pd.util.hash_pandas_object(frame[column], index=False).to_numpy().tobytes())
+            else:
+                digest.update(b'<absent>')
+            self._column_fingerprints[(table, column)] = digest.hexdigest()
+        return self._column_fingerprints[(table, column)]
+    
+    def section_cache_key(self, section: str, **parameters) -> str:
+        """Cache key of a report section: input column fingerprints, options and code version."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f'{section}|{ANALYZER_CODE_VERSION}'.encode())
+        for table, columns in sorted(SECTION_INPUTS[section].items()):
+            for column in columns:
+                digest.update(self._column_fingerprint(table, column).encode())
+        options = {
+            'sketch_mode': self.sketch_mode,
+            'sketch_memory_budget': self.sketch_memory_budget if self.sketch_mode else None,
+            'word_frequency_options': sorted(self.word_frequency_options.items()),
+            **parameters
+        }
+        digest.update(repr(sorted(options.items())).encode())
+        return digest.hexdigest()
+    
+    def _cached_section(self, section: str, compute: Callable, **parameters) -> Dict[str, Any]:
+        """Load a report section from the cache, or compute and store it."""
+        if self.cache_dir is None:
+            return compute(**parameters)
         
+        path = self.cache_dir / f'{section}-{self.section_cache_key(section, **parameters)}.pkl'
+        if path.exists():
+            try:
+                with open(path, 'rb') as f:
+                    result = pickle.load(f)
+                self.cache_status[section] = 'hit'
+                return result
+            except Exception:
+                pass
+        
+        result = compute(**parameters)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temporary_path, 'wb') as f:
+            pickle.dump(result, f)
+        os.replace(temporary_path, path)
+        self.cache_status[section] = 'miss'
+        return result
+    
+    def _profiled(self, section: str, compute: Callable, *args, **kwargs) -> Any:
+        """Run one report section while recording its timing, peak allocations and input sizes."""
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        
+        try:
+            return compute(*args, **kwargs)
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            frames = {'entities': self.entities_df, 'relations': self.relations_df, 'documents': self.documents_df}
+            self.profile_records[section] = {
+                'wall_seconds': round(wall, 6),
+                'cpu_seconds': round(cpu, 6),
+                'peak_traced_bytes': int(peak - baseline),
+                'input_rows': {table: len(frames[table]) for table in SECTION_INPUTS.get(section, frames)}
+            }
+            if section in self.cache_status:
+                self.profile_records[section]['cache'] = self.cache_status[section]
+    
+    def _distinct_count(self, values: pd.Series) -> Union[int, float]:
+        """Exact nunique, or a HyperLogLog estimate in sketch mode."""
+        if not self.sketch_mode:
+            return values.nunique()
+        sketch = HyperLogLog.from_memory_budget(self.sketch_memory_budget)
+        for start in range(0, len(values), 100_000):
+            sketch.update(values.iloc[start:start + 100_000])
+        return int(round(sketch.estimate()))
+    
+    def _top_values(self, values: pd.Series, n: int) -> Dict[Any, int]:
+        """Exact value_counts().head(n), or Space-Saving heavy hitters in sketch mode."""
+        if not self.sketch_mode:
+            return values.value_counts().head(n).to_dict()
+        return self._heavy_hitters((values.iloc[start:start + 100_000] for start in range(0, len(values), 100_000)), n)
+    
+    def _heavy_hitters(self, chunks: Iterable, n: int) -> Dict[Any, int]:
+        heavy_hitters = HeavyHitters(self.sketch_memory_budget)
+        for chunk in chunks:
+            heavy_hitters.update(chunk)
+        return heavy_hitters.top(n)
+    
+    def _quantiles(self, values: pd.Series, quantiles: List[float]) -> List[float]:
+        """Exact quantiles, or t-digest estimates in sketch mode."""
+        if not self.sketch_mode:
+            return [values.quantile(q) for q in quantiles]
+        digest = TDigest.from_memory_budget(self.sketch_memory_budget)
+        for start in range(0, len(values), 100_000):
+            digest.update(values.iloc[start:start + 100_000])
+        return [float(value) for value in digest.quantile(quantiles)]
+    
+    def _word_frequencies(self, texts: Iterable[str], top_n: int) -> Dict[str, int]:
+        """Exact word frequencies, or Space-Saving/Count-Min word heavy hitters in sketch mode."""
+        if not self.sketch_mode:
+            return word_frequencies(texts, top_n, **self.word_frequency_options)
+        options = {key: value for key, value in self.word_frequency_options.items() if key != 'n_jobs'}
+        token_options = WordFrequencyCounter(**options).options
+        chunks = (tokenize('\n'.join(chunk), **token_options) for chunk in iter_text_chunks(texts))
+        return self._heavy_hitters(chunks, top_n)
+    
     def compute_corpus_statistics(self) -> Dict[str, Any]:
         """Compute comprehensive corpus-level statistics."""
         stats_dict = {}
@@ -45,24 +475,25 @@ class AnnotationAnalyzer:
             stats_dict['entity_overview'] = {
                 'total_entities': len(self.entities_df),
                 'unique_entity_types': self.entities_df['entity_label'].nunique(),
-                'entity_types': self.entities_df['entity_label'].value_counts().to_dict(),
+                'entity_types': observed_value_counts(self.entities_df['entity_label']).to_dict(),
                 'documents_with_entities': self.documents_df[self.documents_df['entity_count'] > 0].shape[0],
                 'avg_entities_per_document': self.documents_df['entity_count'].mean(),
                 'entity_coverage': self.documents_df[self.documents_df['entity_count'] > 0].shape[0] / len(self.documents_df)
             }
             
             # Entity length statistics
+            length_quantiles = self._quantiles(self.entities_df['length'], [0.5, 0.25, 0.75, 0.95])
             stats_dict['entity_characteristics'] = {
                 'avg_entity_length_chars': self.entities_df['length'].mean(),
                 'avg_entity_length_tokens': self.entities_df['token_count'].mean(),
                 'entity_length_distribution': {
                     'min': self.entities_df['length'].min(),
                     'max': self.entities_df['length'].max(),
-                    'median': self.entities_df['length'].median(),
+                    'median': length_quantiles[0],
                     'std': self.entities_df['length'].std(),
-                    'percentile_25': self.entities_df['length'].quantile(0.25),
-                    'percentile_75': self.entities_df['length'].quantile(0.75),
-                    'percentile_95': self.entities_df['length'].quantile(0.95)
+                    'percentile_25': length_quantiles[1],
+                    'percentile_75': length_quantiles[2],
+                    'percentile_95': length_quantiles[3]
                 }
             }
         
@@ -71,14 +502,14 @@ class AnnotationAnalyzer:
             stats_dict['relation_overview'] = {
                 'total_relations': len(self.relations_df),
                 'unique_relation_types': self.relations_df['relation_label'].nunique(),
-                'relation_types': self.relations_df['relation_label'].value_counts().to_dict(),
+                'relation_types': observed_value_counts(self.relations_df['relation_label']).to_dict(),
                 'documents_with_relations': self.documents_df[self.documents_df['relation_count'] > 0].shape[0],
                 'avg_relations_per_document': self.documents_df['relation_count'].mean()
             }
             
             # Posicionamento analysis
             if 'posicionamento' in self.relations_df.columns:
-                posicionamento_counts = self.relations_df['posicionamento'].value_counts(dropna=False)
+                posicionamento_counts = observed_value_counts(self.relations_df['posicionamento'], dropna=False)
                 stats_dict['posicionamento_analysis'] = {
                     'total_posicionamento_relations': self.relations_df['posicionamento'].notna().sum(),
                     'posicionamento_types': posicionamento_counts.to_dict(),
@@ -87,7 +518,7 @@ class AnnotationAnalyzer:
             
             # Resultado analysis  
             if 'resultado' in self.relations_df.columns:
-                resultado_counts = self.relations_df['resultado'].value_counts(dropna=False)
+                resultado_counts = observed_value_counts(self.relations_df['resultado'], dropna=False)
                 stats_dict['resultado_analysis'] = {
                     'total_resultado_relations': self.relations_df['resultado'].notna().sum(),
                     'resultado_types': resultado_counts.to_dict(),
@@ -101,7 +532,7 @@ class AnnotationAnalyzer:
         municipality_analysis = {}
         
         # Per-municipality document statistics
-        muni_doc_stats = self.documents_df.groupby('municipality').agg({
+        muni_doc_stats = self.documents_df.groupby('municipality', observed=True).agg({
             'text_length': ['count', 'sum', 'mean', 'std'],
             'token_count': ['sum', 'mean', 'std'],
             'entity_count': ['sum', 'mean', 'std'],
@@ -112,131 +543,248 @@ class AnnotationAnalyzer:
         
         # Per-municipality entity analysis
         if not self.entities_df.empty:
-            entity_by_muni = self.entities_df.groupby(['municipality', 'entity_label']).size().unstack(fill_value=0)
+            entity_by_muni = self.entities_df.groupby(['municipality', 'entity_label'], observed=True).size().unstack(fill_value=0)
             municipality_analysis['entity_distribution'] = entity_by_muni.to_dict()
             
             # Entity density by municipality
-            entity_density = self.entities_df.groupby('municipality').size() / self.documents_df.groupby('municipality').size()
+            entity_density = self.entities_df.groupby('municipality', observed=True).size() / self.documents_df.groupby('municipality', observed=True).size()
             municipality_analysis['entity_density'] = entity_density.to_dict()
         
         # Per-municipality relation analysis
         if not self.relations_df.empty:
             if 'posicionamento' in self.relations_df.columns:
-                posicionamento_by_muni = self.relations_df.groupby(['municipality', 'posicionamento']).size().unstack(fill_value=0)
+                posicionamento_by_muni = self.relations_df.groupby(['municipality', 'posicionamento'], observed=True).size().unstack(fill_value=0)
                 municipality_analysis['posicionamento_by_municipality'] = posicionamento_by_muni.to_dict()
             
             if 'resultado' in self.relations_df.columns:
-                resultado_by_muni = self.relations_df.groupby(['municipality', 'resultado']).size().unstack(fill_value=0)
+                resultado_by_muni = self.relations_df.groupby(['municipality', 'resultado'], observed=True).size().unstack(fill_value=0)
                 municipality_analysis['resultado_by_municipality'] = resultado_by_muni.to_dict()
         
         return municipality_analysis
     
-    def compute_statistical_tests(self) -> Dict[str, Any]:
-        """Perform statistical significance tests across municipalities."""
+    def compute_statistical_tests(self, n_permutations: int = 0, n_jobs: int = 1,
+                                  rng: Optional[Union[int, np.random.Generator]] = 42) -> Dict[str, Any]:
+        """
+        Perform statistical significance tests across municipalities.
+        
+        Args:
+            n_permutations: When positive, also run permutation variants of every test with up
+                to this many shuffles, plus pairwise municipality tests for every entity label
+            n_jobs: Worker processes for the permutation shuffles (-1 uses all cores)
+            rng: np.random.Generator or integer seed for the permutation shuffles
+        """
         test_results = {}
+        rng = _resolve_rng(rng)
+        if n_jobs is not None and n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=n_jobs) if n_permutations > 0 and n_jobs > 1 else None
+        permutation_options = {'n_permutations': n_permutations, 'rng': rng, 'n_jobs': n_jobs, 'executor': executor}
         
-        # Test for differences in entity counts across municipalities
-        if len(self.documents_df['municipality'].unique()) > 1:
-            municipality_groups = [group['entity_count'].values for name, group in self.documents_df.groupby('municipality')]
+        try:
+            # Test for differences in entity counts across municipalities
+            if len(self.documents_df['municipality'].unique()) > 1:
+                municipality_groups = [group['entity_count'].values for name, group in self.documents_df.groupby('municipality', observed=True)]
             
-            try:
-                # Kruskal-Wallis test (non-parametric ANOVA)
-                h_stat, p_value = kruskal(*municipality_groups)
-                test_results['entity_count_by_municipality'] = {
-                    'test': 'Kruskal-Wallis',
-                    'statistic': h_stat,
-                    'p_value': p_value,
-                    'significant': p_value < 0.05,
-                    'interpretation': 'Significant differences in entity counts between municipalities' if p_value < 0.05 else 'No significant differences'
-                }
-            except Exception as e:
-                test_results['entity_count_by_municipality'] = {'error': str(e)}
-        
-        # Chi-square test for entity type distribution across municipalities
-        if not self.entities_df.empty and len(self.entities_df['municipality'].unique()) > 1:
-            try:
-                contingency_table = pd.crosstab(self.entities_df['municipality'], self.entities_df['entity_label'])
-                chi2, p_val, dof, expected = chi2_contingency(contingency_table)
-                
-                # Cramér's V (effect size)
-                n = contingency_table.sum().sum()
-                cramers_v = np.sqrt(chi2 / (n * (min(contingency_table.shape) - 1)))
-                
-                test_results['entity_type_distribution'] = {
-                    'test': 'Chi-square',
-                    'chi2_statistic': chi2,
-                    'p_value': p_val,
-                    'degrees_of_freedom': dof,
-                    'cramers_v': cramers_v,
-                    'significant': p_val < 0.05,
-                    'effect_size': 'large' if cramers_v > 0.5 else 'medium' if cramers_v > 0.3 else 'small'
-                }
-            except Exception as e:
-                test_results['entity_type_distribution'] = {'error': str(e)}
-        
-        # Test for posicionamento patterns
-        if not self.relations_df.empty and 'posicionamento' in self.relations_df.columns:
-            posicionamento_data = self.relations_df.dropna(subset=['posicionamento'])
-            if not posicionamento_data.empty and len(posicionamento_data['municipality'].unique()) > 1:
                 try:
-                    contingency_table = pd.crosstab(posicionamento_data['municipality'], posicionamento_data['posicionamento'])
-                    chi2, p_val, dof, expected = chi2_contingency(contingency_table)
-                    
-                    n = contingency_table.sum().sum()
-                    cramers_v = np.sqrt(chi2 / (n * (min(contingency_table.shape) - 1)))
-                    
-                    test_results['posicionamento_distribution'] = {
-                        'test': 'Chi-square',
-                        'chi2_statistic': chi2,
-                        'p_value': p_val,
-                        'degrees_of_freedom': dof,
-                        'cramers_v': cramers_v,
-                        'significant': p_val < 0.05,
-                        'effect_size': 'large' if cramers_v > 0.5 else 'medium' if cramers_v > 0.3 else 'small'
+                    # Kruskal-Wallis test (non-parametric ANOVA)
+                    h_stat, p_value = kruskal(*municipality_groups)
+                    test_results['entity_count_by_municipality'] = {
+                        'test': 'Kruskal-Wallis',
+                        'statistic': h_stat,
+                        'p_value': p_value,
+                        'significant': p_value < 0.05,
+                        'interpretation': 'Significant differences in entity counts between municipalities' if p_value < 0.05 else 'No significant differences'
                     }
+                    if n_permutations > 0:
+                        test_results['entity_count_by_municipality']['permutation'] = permutation_kruskal_test(
+                            municipality_groups, **permutation_options
+                        )
                 except Exception as e:
-                    test_results['posicionamento_distribution'] = {'error': str(e)}
+                    test_results['entity_count_by_municipality'] = {'error': str(e)}
+            
+            # Chi-square test for entity type distribution across municipalities
+            if not self.entities_df.empty and len(self.entities_df['municipality'].unique()) > 1:
+                try:
+                    # Chi-square and Cramér's V (effect size) from the cached contingency table
+                    contingency_table = self.contingency_tables.get('entities', 'municipality', 'entity_label')
+                    test_results['entity_type_distribution'] = contingency_table.chi2_test()
+                    if n_permutations > 0:
+                        test_results['entity_type_distribution']['permutation'] = permutation_chi2_test(
+                            self.entities_df['municipality'], self.entities_df['entity_label'], **permutation_options
+                        )
+                except Exception as e:
+                    test_results['entity_type_distribution'] = {'error': str(e)}
+            
+            # Test for posicionamento patterns
+            if not self.relations_df.empty and 'posicionamento' in self.relations_df.columns:
+                posicionamento_data = self.relations_df.dropna(subset=['posicionamento'])
+                if not posicionamento_data.empty and len(posicionamento_data['municipality'].unique()) > 1:
+                    try:
+                        contingency_table = self.contingency_tables.get('relations', 'municipality', 'posicionamento')
+                        test_results['posicionamento_distribution'] = contingency_table.chi2_test()
+                        if n_permutations > 0:
+                            test_results['posicionamento_distribution']['permutation'] = permutation_chi2_test(
+                                posicionamento_data['municipality'], posicionamento_data['posicionamento'],
+                                **permutation_options
+                            )
+                    except Exception as e:
+                        test_results['posicionamento_distribution'] = {'error': str(e)}
+            
+            # Pairwise permutation tests of per-document label counts between municipalities
+            if n_permutations > 0 and not self.entities_df.empty and self.documents_df['municipality'].nunique() > 1:
+                label_counts = self.contingency_tables.get('entities', 'filename', 'entity_label').to_frame()
+                label_counts = label_counts.reindex(self.documents_df['filename'].unique(), fill_value=0)
+                doc_municipality = self.documents_df.drop_duplicates('filename').set_index('filename')['municipality']
+                muni_filenames = doc_municipality.groupby(doc_municipality, observed=True).groups
+                municipalities = sorted(muni_filenames)
+            
+                pairwise_results = {}
+                for label in label_counts.columns:
+                    pairwise_results[label] = {}
+                    for i, muni1 in enumerate(municipalities):
+                        for muni2 in municipalities[i+1:]:
+                            groups = [label_counts.loc[muni_filenames[muni1], label].to_numpy(),
+                                      label_counts.loc[muni_filenames[muni2], label].to_numpy()]
+                            try:
+                                pairwise_results[label][f'{muni1}_vs_{muni2}'] = permutation_kruskal_test(
+                                    groups, **permutation_options
+                                )
+                            except Exception as e:
+                                pairwise_results[label][f'{muni1}_vs_{muni2}'] = {'error': str(e)}
+                test_results['pairwise_label_count_tests'] = pairwise_results
+        finally:
+            if executor is not None:
+                executor.shutdown()
         
         return test_results
     
+    def compute_confidence_intervals(self, n_bootstrap: int = 1000, confidence_level: float = 0.95,
+                                     method: str = 'percentile',
+                                     rng: Optional[Union[int, np.random.Generator]] = 42) -> Dict[str, Any]:
+        """
+        Bootstrap confidence intervals for per-document entity counts by municipality and label.
+
+        Args:
+            n_bootstrap: Number of bootstrap resamples per metric
+            confidence_level: Two-sided confidence level
+            method: 'percentile' or 'bca'
+            rng: np.random.Generator or integer seed shared by all metrics
+        """
+        if self.entities_df.empty:
+            return {'error': 'No entity data available'}
+
+        rng = _resolve_rng(rng)
+
+        # Documents x labels count matrix, keeping documents without entities as zeros
+        label_counts = self.contingency_tables.get('entities', 'filename', 'entity_label').to_frame()
+        label_counts = label_counts.reindex(self.documents_df['filename'].unique(), fill_value=0)
+        doc_municipality = self.documents_df.drop_duplicates('filename').set_index('filename')['municipality']
+
+        interval_analysis = {}
+        for municipality, filenames in doc_municipality.groupby(doc_municipality, observed=True).groups.items():
+            muni_counts = label_counts.loc[filenames]
+            interval_analysis[municipality] = {}
+
+            for label in muni_counts.columns:
+                values = muni_counts[label].to_numpy()
+                lower, upper = bootstrap_confidence_interval(
+                    values, np.mean, n_bootstrap, confidence_level, method=method, rng=rng
+                )
+                interval_analysis[municipality][label] = {
+                    'mean_per_document': values.mean(),
+                    'ci_lower': lower,
+                    'ci_upper': upper
+                }
+
+        return {
+            'method': method,
+            'confidence_level': confidence_level,
+            'n_bootstrap': n_bootstrap,
+            'entities_per_document': interval_analysis
+        }
+
+    @property
+    def document_dimension(self) -> pd.DataFrame:
+        if self._document_dimension is None:
+            self._document_dimension = self._build_document_dimension()
+        return self._document_dimension
+    
+    def _build_document_dimension(self) -> pd.DataFrame:
+        """One row per document with an integer key and normalised temporal/municipality attributes."""
+        docs = self.documents_df.drop_duplicates('filename')
+        
+        if 'date' in docs.columns:
+            dates = normalize_document_dates(docs['date'], docs['municipality'])
+        else:
+            dates = pd.Series(pd.NaT, index=docs.index, dtype='datetime64[ns]')
+        
+        dimension = pd.DataFrame({
+            'doc_key': np.arange(len(docs), dtype=np.int32),
+            'filename': docs['filename'].to_numpy(),
+            'municipality': docs['municipality'].to_numpy(),
+            'municipality_code': pd.factorize(docs['municipality'], sort=True)[0].astype(np.int16),
+            'date': dates.to_numpy()
+        })
+        dimension['year'] = dimension['date'].dt.year.astype('Int64')
+        dimension['quarter'] = dimension['date'].dt.quarter.astype('Int64')
+        dimension['month'] = dimension['date'].dt.month.astype('Int64')
+        return dimension
+    
+    def _document_keys(self, df: pd.DataFrame) -> np.ndarray:
+        """Integer document key for each row of an entity/relation frame (-1 when unknown)."""
+        if df.empty or 'filename' not in df.columns:
+            return np.full(len(df), -1, dtype=np.int32)
+        return pd.Index(self.document_dimension['filename']).get_indexer(df['filename']).astype(np.int32)
+    
+    def _row_keys(self, df: pd.DataFrame) -> np.ndarray:
+        """Document keys of a frame: cached for the analyzer's entity/relation tables, else its doc_key column."""
+        for table, frame in (('entities', self.entities_df), ('relations', self.relations_df)):
+            if df is frame:
+                if table not in self._row_document_keys:
+                    self._row_document_keys[table] = self._document_keys(frame)
+                return self._row_document_keys[table]
+        return df['doc_key'].to_numpy() if 'doc_key' in df.columns else self._document_keys(df)
+    
+    def document_attribute(self, df: pd.DataFrame, attribute: str) -> pd.Series:
+        """
+        Look up a document-dimension attribute (year, quarter, month, municipality_code, ...)
+        for every row of a frame, by integer document key. Keys of self.entities_df and
+        self.relations_df are computed once and cached; other frames use their doc_key column if
+        present (select rows from the result for the analyzer's own tables rather than passing
+        a filtered copy).
+        """
+        values = self.document_dimension[attribute]
+        keys = self._row_keys(df)
+        # The appended missing value is picked up by unknown documents (doc_key == -1)
+        lookup = pd.concat([values, pd.Series([pd.NA], dtype=values.dtype)], ignore_index=True)
+        return pd.Series(lookup.to_numpy()[keys], index=df.index, name=attribute,
+                         dtype=values.dtype)
+    
     def analyze_temporal_patterns(self) -> Dict[str, Any]:
         """Analyze temporal patterns in the annotations."""
         temporal_analysis = {}
         
-        if 'date' not in self.documents_df.columns or self.documents_df['date'].isna().all():
+        if self.document_dimension['date'].isna().all():
             return {'error': 'No date information available'}
         
-        # Convert dates and extract temporal features
         try:
-            self.documents_df['date_parsed'] = pd.to_datetime(self.documents_df['date'], errors='coerce')
-            self.documents_df['year'] = self.documents_df['date_parsed'].dt.year
-            self.documents_df['month'] = self.documents_df['date_parsed'].dt.month
-            
             # Documents by year
-            docs_by_year = self.documents_df.groupby('year').size()
+            docs_by_year = self.document_dimension.groupby('year').size()
             temporal_analysis['documents_by_year'] = docs_by_year.to_dict()
             
             # Entity patterns by year
             if not self.entities_df.empty:
-                entities_with_date = self.entities_df.merge(
-                    self.documents_df[['filename', 'year']], 
-                    on='filename', 
-                    how='left'
-                )
-                entities_by_year = entities_with_date.groupby(['year', 'entity_label']).size().unstack(fill_value=0)
+                entity_years = self.document_attribute(self.entities_df, 'year')
+                entities_by_year = self.entities_df.groupby([entity_years, 'entity_label'], observed=True).size().unstack(fill_value=0)
                 temporal_analysis['entities_by_year'] = entities_by_year.to_dict()
             
             # Relation patterns by year  
-            if not self.relations_df.empty:
-                relations_with_date = self.relations_df.merge(
-                    self.documents_df[['filename', 'year']], 
-                    on='filename', 
-                    how='left'
-                )
-                
-                if 'posicionamento' in relations_with_date.columns:
-                    posicionamento_by_year = relations_with_date.dropna(subset=['posicionamento']).groupby(['year', 'posicionamento']).size().unstack(fill_value=0)
-                    temporal_analysis['posicionamento_by_year'] = posicionamento_by_year.to_dict()
+            if not self.relations_df.empty and 'posicionamento' in self.relations_df.columns:
+                has_posicionamento = self.relations_df['posicionamento'].notna()
+                posicionamento_data = self.relations_df[has_posicionamento]
+                relation_years = self.document_attribute(self.relations_df, 'year')[has_posicionamento]
+                posicionamento_by_year = posicionamento_data.groupby([relation_years, 'posicionamento'], observed=True).size().unstack(fill_value=0)
+                temporal_analysis['posicionamento_by_year'] = posicionamento_by_year.to_dict()
                 
         except Exception as e:
             temporal_analysis = {'error': f'Date parsing error: {str(e)}'}
@@ -251,23 +799,23 @@ class AnnotationAnalyzer:
         entity_analysis = {}
         
         # Entity type analysis
-        entity_counts = self.entities_df['entity_label'].value_counts()
+        entity_counts = observed_value_counts(self.entities_df['entity_label'])
         entity_analysis['entity_type_frequencies'] = entity_counts.to_dict()
         entity_analysis['entity_type_percentages'] = (entity_counts / entity_counts.sum() * 100).round(2).to_dict()
         
         # Length analysis by entity type
-        length_by_type = self.entities_df.groupby('entity_label')['length'].agg(['count', 'mean', 'median', 'std', 'min', 'max'])
+        length_by_type = self.entities_df.groupby('entity_label', observed=True)['length'].agg(['count', 'mean', 'median', 'std', 'min', 'max'])
         entity_analysis['length_by_entity_type'] = length_by_type.to_dict()
         
         # Token count analysis by entity type
-        token_by_type = self.entities_df.groupby('entity_label')['token_count'].agg(['count', 'mean', 'median', 'std', 'min', 'max'])
+        token_by_type = self.entities_df.groupby('entity_label', observed=True)['token_count'].agg(['count', 'mean', 'median', 'std', 'min', 'max'])
         entity_analysis['tokens_by_entity_type'] = token_by_type.to_dict()
         
         # Most common entity texts by type
         entity_analysis['common_entity_texts'] = {}
         for entity_type in self.entities_df['entity_label'].unique():
             type_entities = self.entities_df[self.entities_df['entity_label'] == entity_type]
-            common_texts = type_entities['text'].value_counts().head(10).to_dict()
+            common_texts = self._top_values(type_entities['text'], 10)
             entity_analysis['common_entity_texts'][entity_type] = common_texts
         
         # Co-occurrence analysis (entities appearing in same document)
@@ -301,19 +849,19 @@ class AnnotationAnalyzer:
         posicionamento_analysis = {}
         
         # Overall posicionamento distribution
-        pos_counts = posicionamento_data['posicionamento'].value_counts()
+        pos_counts = observed_value_counts(posicionamento_data['posicionamento'])
         posicionamento_analysis['posicionamento_frequencies'] = pos_counts.to_dict()
         posicionamento_analysis['posicionamento_percentages'] = (pos_counts / pos_counts.sum() * 100).round(2).to_dict()
         
         # Posicionamento by municipality
-        pos_by_municipality = posicionamento_data.groupby(['municipality', 'posicionamento']).size().unstack(fill_value=0)
+        pos_by_municipality = posicionamento_data.groupby(['municipality', 'posicionamento'], observed=True).size().unstack(fill_value=0)
         posicionamento_analysis['posicionamento_by_municipality'] = pos_by_municipality.to_dict()
         
         # Posicionamento-resultado relationships
         if 'resultado' in posicionamento_data.columns:
             pos_resultado = posicionamento_data.dropna(subset=['resultado'])
             if not pos_resultado.empty:
-                pos_res_crosstab = pd.crosstab(pos_resultado['posicionamento'], pos_resultado['resultado'])
+                pos_res_crosstab = self.contingency_tables.get('relations', 'posicionamento', 'resultado').to_frame()
                 posicionamento_analysis['posicionamento_resultado_matrix'] = pos_res_crosstab.to_dict()
         
         # Documents with different posicionamento types
@@ -351,25 +899,18 @@ class AnnotationAnalyzer:
         # Assunto text analysis
         assunto_texts = assunto_entities['text'].dropna()
         assunto_analysis['assunto_text_statistics'] = {
-            'unique_assunto_texts': assunto_texts.nunique(),
-            'most_common_assuntos': assunto_texts.value_counts().head(20).to_dict(),
+            'unique_assunto_texts': self._distinct_count(assunto_texts),
+            'most_common_assuntos': self._top_values(assunto_texts, 20),
             'avg_assunto_length_chars': assunto_entities['length'].mean(),
             'avg_assunto_length_tokens': assunto_entities['token_count'].mean()
         }
         
         # Word frequency analysis for assuntos
-        all_assunto_words = []
-        for text in assunto_texts:
-            if isinstance(text, str):
-                words = text.lower().split()
-                all_assunto_words.extend(words)
-        
-        word_counts = Counter(all_assunto_words)
-        assunto_analysis['assunto_word_frequencies'] = dict(word_counts.most_common(50))
+        assunto_analysis['assunto_word_frequencies'] = self._word_frequencies(assunto_texts, 50)
         
         # Enhanced metadata analysis for assuntos
         if 'tema' in assunto_entities.columns:
-            tema_counts = assunto_entities['tema'].value_counts(dropna=False)
+            tema_counts = observed_value_counts(assunto_entities['tema'], dropna=False)
             assunto_analysis['tema_distribution'] = tema_counts.to_dict()
         
         if 'resumo' in assunto_entities.columns:
@@ -378,11 +919,11 @@ class AnnotationAnalyzer:
                 assunto_analysis['resumo_statistics'] = {
                     'total_with_resumo': len(resumo_stats),
                     'avg_resumo_length': resumo_stats.str.len().mean(),
-                    'most_common_resumos': resumo_stats.value_counts().head(10).to_dict()
+                    'most_common_resumos': self._top_values(resumo_stats, 10)
                 }
         
         # Assunto by municipality
-        assunto_by_muni = assunto_entities.groupby('municipality').agg({
+        assunto_by_muni = assunto_entities.groupby('municipality', observed=True).agg({
             'text': ['count', 'nunique'],
             'length': ['mean', 'std'],
             'token_count': ['mean', 'std']
@@ -391,7 +932,8 @@ class AnnotationAnalyzer:
         
         return assunto_analysis
     
-    def analyze_assunto_sections(self, assunto_sections: List) -> Dict[str, Any]:
+    def analyze_assunto_sections(self, sections_df: pd.DataFrame,
+                                 exclude_near_duplicates: bool = False) -> Dict[str, Any]:
         """
         Analyze Fronteira-based assunto sections (complete topic discussions).
         
@@ -399,50 +941,58 @@ class AnnotationAnalyzer:
         markers, providing insights into the structure and content of topic discussions.
         
         Args:
-            assunto_sections: List of AssuntoSection objects from the parser
+            sections_df: Section table from InceptionParser.create_section_dataframe; word
+                frequencies are only computed when it carries a text column
+            exclude_near_duplicates: Drop sections flagged by near_duplicates.flag_section_dataframe
+                (requires its is_near_duplicate column)
         """
-        if not assunto_sections:
+        if sections_df is None or sections_df.empty:
             return {'error': 'No assunto sections available'}
         
         section_analysis = {}
         
-        # Basic section statistics
-        section_analysis['total_sections'] = len(assunto_sections)
-        section_analysis['avg_section_length_chars'] = np.mean([len(section.text) for section in assunto_sections])
-        section_analysis['avg_section_length_tokens'] = np.mean([len(section.text.split()) for section in assunto_sections])
+        if 'is_near_duplicate' in sections_df.columns:
+            section_analysis['near_duplicate_sections'] = int(sections_df['is_near_duplicate'].sum())
+            if exclude_near_duplicates:
+                sections_df = drop_near_duplicates(sections_df)
+        elif exclude_near_duplicates:
+            return {'error': 'Sections have no near-duplicate flags (see near_duplicates.flag_section_dataframe)'}
         
-        # Section text analysis
-        all_section_words = []
-        section_texts = []
-        keyword_counts_per_section = []
-        
-        for section in assunto_sections:
-            section_texts.append(section.text)
-            words = section.text.lower().split()
-            all_section_words.extend(words)
-            keyword_counts_per_section.append(len(section.keyword_entities) if section.keyword_entities else 0)
+        # Basic section statistics
+        section_analysis['total_sections'] = len(sections_df)
+        section_analysis['avg_section_length_chars'] = sections_df['length'].mean()
+        section_analysis['avg_section_length_tokens'] = sections_df['token_count'].mean()
         
-        # Word frequency analysis for sections
-        section_word_counts = Counter(all_section_words)
-        section_analysis['section_word_frequencies'] = dict(section_word_counts.most_common(30))
+        # Word frequency analysis for sections (streamed from the section texts)
+        if 'text' in sections_df.columns:
+            section_analysis['section_word_frequencies'] = self._word_frequencies(sections_df['text'].dropna(), 30)
         
         # Keywords per section analysis
+        keyword_counts = sections_df['keyword_count']
         section_analysis['keywords_per_section'] = {
-            'avg_keywords_per_section': np.mean(keyword_counts_per_section),
-            'max_keywords_per_section': np.max(keyword_counts_per_section) if keyword_counts_per_section else 0,
-            'sections_without_keywords': sum(1 for count in keyword_counts_per_section if count == 0),
-            'keyword_distribution': Counter(keyword_counts_per_section)
+            'avg_keywords_per_section': keyword_counts.mean(),
+            'max_keywords_per_section': keyword_counts.max(),
+            'sections_without_keywords': int((keyword_counts == 0).sum()),
+            'keyword_distribution': keyword_counts.value_counts().sort_index().to_dict()
         }
         
         # Section length distribution
-        section_lengths = [len(section.text.split()) for section in assunto_sections]
+        section_lengths = sections_df['token_count']
         section_analysis['section_length_distribution'] = {
-            'min_length': min(section_lengths),
-            'max_length': max(section_lengths),
-            'median_length': np.median(section_lengths),
-            'std_length': np.std(section_lengths).round(2)
+            'min_length': section_lengths.min(),
+            'max_length': section_lengths.max(),
+            'median_length': section_lengths.median(),
+            'std_length': round(np.std(section_lengths), 2)
         }
         
+        # Per-municipality section structure
+        section_analysis['sections_by_municipality'] = sections_df.groupby('municipality').agg(
+            sections=('section_id', 'size'),
+            documents=('filename', 'nunique'),
+            avg_length_tokens=('token_count', 'mean'),
+            avg_keywords=('keyword_count', 'mean')
+        ).round(2).to_dict('index')
+        
         return section_analysis
     
     def analyze_assunto_keywords(self) -> Dict[str, Any]:
@@ -473,7 +1023,7 @@ class AnnotationAnalyzer:
         keyword_analysis['avg_keywords_per_document'] = len(keyword_entities) / keyword_entities['filename'].nunique()
         
         # Tema distribution analysis
-        tema_counts = keyword_entities['tema'].value_counts()
+        tema_counts = observed_value_counts(keyword_entities['tema'])
         keyword_analysis['tema_distribution'] = {
             'unique_temas': tema_counts.count(),
             'most_common_temas': tema_counts.head(20).to_dict(),
@@ -483,24 +1033,17 @@ class AnnotationAnalyzer:
         # Keyword text analysis
         keyword_texts = keyword_entities['text'].dropna()
         keyword_analysis['keyword_text_statistics'] = {
-            'unique_keyword_texts': keyword_texts.nunique(),
-            'most_common_keywords': keyword_texts.value_counts().head(15).to_dict(),
+            'unique_keyword_texts': self._distinct_count(keyword_texts),
+            'most_common_keywords': self._top_values(keyword_texts, 15),
             'avg_keyword_length_chars': keyword_entities['length'].mean(),
             'avg_keyword_length_tokens': keyword_entities['token_count'].mean()
         }
         
         # Word frequency within keywords
-        all_keyword_words = []
-        for text in keyword_texts:
-            if isinstance(text, str):
-                words = text.lower().split()
-                all_keyword_words.extend(words)
-        
-        keyword_word_counts = Counter(all_keyword_words)
-        keyword_analysis['keyword_word_frequencies'] = dict(keyword_word_counts.most_common(25))
+        keyword_analysis['keyword_word_frequencies'] = self._word_frequencies(keyword_texts, 25)
         
         # Keyword by municipality
-        keyword_by_muni = keyword_entities.groupby('municipality').agg({
+        keyword_by_muni = keyword_entities.groupby('municipality', observed=True).agg({
             'tema': ['count', 'nunique'],
             'text': 'nunique',
             'length': 'mean',
@@ -510,7 +1053,77 @@ class AnnotationAnalyzer:
         
         return keyword_analysis
     
-    def analyze_dual_assunto_patterns(self, assunto_sections: List = None) -> Dict[str, Any]:
+    def _keyword_word_incidence(self, units: pd.Series, texts: pd.Series,
+                                unit_levels: Optional[pd.Index] = None):
+        """Units × words incidence of keyword texts (stopwords and one-letter tokens dropped)."""
+        fold = self.word_frequency_options.get('fold_accents', False)
+        tokens = [tokenize(text, fold=fold, stopwords=PORTUGUESE_STOPWORDS, min_token_length=2)
+                  for text in texts.astype(str)]
+        word_units = np.repeat(units.to_numpy(), [len(words) for words in tokens])
+        words = [word for words in tokens for word in words]
+        return incidence_matrix(word_units, words, unit_levels)
+    
+    def analyze_assunto_collocations(self, section_keywords_df: Optional[pd.DataFrame] = None,
+                                     min_count: int = 3, top_k: int = 10, measure: str = 'llr') -> Dict[str, Any]:
+        """
+        PMI and log-likelihood associations of ASSUNTO keyword words with Tema values and municipalities.
+        
+        Counts are keyword entities (or sections) holding both values, taken from sparse
+        incidence matrices; pairs and marginals below min_count are pruned before scoring.
+        
+        Args:
+            section_keywords_df: Section-to-keyword link table from
+                InceptionParser.create_section_keyword_dataframe (adds section-level associations)
+            min_count: Minimum co-occurrence and marginal count
+            top_k: Associated values reported per Tema / municipality
+            measure: Ranking measure ('llr', 'pmi', 'npmi' or 'count')
+        """
+        if self.entities_df.empty:
+            return {'error': 'No entity data available'}
+        
+        keyword_entities = self.entities_df[
+            (self.entities_df['entity_label'] == 'Assunto') &
+            (self.entities_df['tema'].notna()) &
+            (~self.entities_df['fronteira'].notna()) &
+            (self.entities_df['text'].notna())
+        ].reset_index(drop=True)
+        
+        if keyword_entities.empty:
+            return {'error': 'No ASSUNTO keyword entities found'}
+        
+        units = pd.Series(np.arange(len(keyword_entities)))
+        unit_levels = pd.Index(units)
+        words, _, word_levels = self._keyword_word_incidence(units, keyword_entities['text'], unit_levels)
+        temas, _, tema_levels = incidence_matrix(units, keyword_entities['tema'].astype(object), unit_levels)
+        municipalities, _, municipality_levels = incidence_matrix(
+            units, keyword_entities['municipality'].astype(object), unit_levels)
+        options = {'min_count': min_count, 'top_k': top_k, 'measure': measure}
+        
+        collocation_analysis = {
+            'keyword_words_by_tema': association_table(words, temas, word_levels, tema_levels, **options),
+            'keyword_words_by_municipality': association_table(words, municipalities, word_levels,
+                                                               municipality_levels, **options),
+            'temas_by_municipality': association_table(temas, municipalities, tema_levels,
+                                                       municipality_levels, **options),
+            'keyword_word_collocations': pair_collocations(words, word_levels, min_count, top_n=25, measure=measure)
+        }
+        
+        # Section level: words of any keyword in a section against the Temas of that section
+        if section_keywords_df is not None and not section_keywords_df.empty:
+            links = section_keywords_df[section_keywords_df['tema'].notna() & section_keywords_df['text'].notna()]
+            section_units = links['filename'].astype(str) + '#' + links['section_id'].astype(str)
+            section_levels = pd.Index(section_units.unique())
+            section_words, _, section_word_levels = self._keyword_word_incidence(section_units, links['text'],
+                                                                                 section_levels)
+            section_temas, _, section_tema_levels = incidence_matrix(section_units, links['tema'].astype(object),
+                                                                     section_levels)
+            collocation_analysis['section_words_by_tema'] = association_table(
+                section_words, section_temas, section_word_levels, section_tema_levels, **options)
+        
+        return collocation_analysis
+    
+    def analyze_dual_assunto_patterns(self, sections_df: Optional[pd.DataFrame] = None,
+                                      section_keywords_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """
         Combined analysis of both ASSUNTO dimensions: sections and keywords.
         
@@ -518,23 +1131,25 @@ class AnnotationAnalyzer:
         with individual Tema-based keywords to give a complete picture of assunto patterns.
         
         Args:
-            assunto_sections: List of AssuntoSection objects from the parser
+            sections_df: Section table from InceptionParser.create_section_dataframe
+            section_keywords_df: Section-to-keyword link table from
+                InceptionParser.create_section_keyword_dataframe
         """
         dual_analysis = {}
+        has_sections = sections_df is not None and not sections_df.empty
         
         # Get individual analyses
-        if assunto_sections:
-            dual_analysis['section_analysis'] = self.analyze_assunto_sections(assunto_sections)
+        if has_sections:
+            dual_analysis['section_analysis'] = self.analyze_assunto_sections(sections_df)
         else:
             dual_analysis['section_analysis'] = {'error': 'No assunto sections provided'}
         
         dual_analysis['keyword_analysis'] = self.analyze_assunto_keywords()
         
         # Combined insights
-        if assunto_sections and not self.entities_df.empty:
+        if has_sections and not self.entities_df.empty:
             # Calculate relationships between sections and keywords
-            total_keywords_in_sections = sum(len(section.keyword_entities) if section.keyword_entities else 0 
-                                           for section in assunto_sections)
+            total_keywords_in_sections = int(sections_df['keyword_count'].sum())
             
             # Get all individual keyword entities for comparison
             individual_keywords = self.entities_df[
@@ -544,7 +1159,7 @@ class AnnotationAnalyzer:
             ]
             
             dual_analysis['combined_insights'] = {
-                'total_sections': len(assunto_sections),
+                'total_sections': len(sections_df),
                 'total_individual_keywords': len(individual_keywords),
                 'keywords_within_sections': total_keywords_in_sections,
                 'keywords_outside_sections': len(individual_keywords) - total_keywords_in_sections,
@@ -552,17 +1167,108 @@ class AnnotationAnalyzer:
             }
             
             # Tema distribution across sections
-            section_temas = []
-            for section in assunto_sections:
-                if section.keyword_entities:
-                    section_temas.extend([entity.tema for entity in section.keyword_entities if entity.tema])
-            
-            if section_temas:
-                section_tema_counts = Counter(section_temas)
-                dual_analysis['combined_insights']['temas_in_sections'] = dict(section_tema_counts.most_common(15))
+            if section_keywords_df is not None and not section_keywords_df.empty:
+                section_tema_counts = section_keywords_df['tema'].dropna().value_counts()
+                if not section_tema_counts.empty:
+                    dual_analysis['combined_insights']['temas_in_sections'] = section_tema_counts.head(15).to_dict()
         
         return dual_analysis
     
+    def analyze_segment_density(self, sentences_df: Optional[pd.DataFrame] = None,
+                                sections_df: Optional[pd.DataFrame] = None,
+                                tokens_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        Entity density per sentence, per 1k tokens and per Fronteira section.
+        
+        Per-document densities hide how different the minutes of large and small municipalities
+        are in length; these views normalise by the DKPro segmentation instead.
+        
+        Args:
+            sentences_df: Sentence table from InceptionParser.create_sentence_dataframe
+            sections_df: Section table from InceptionParser.create_section_dataframe
+            tokens_df: Optional DKPro token table for token counts inside sections
+        """
+        if self.entities_df.empty:
+            return {'error': 'No entity data available'}
+        if sentences_df is None and sections_df is None:
+            return {'error': 'No sentence or section tables provided'}
+        
+        density_analysis = {}
+        if sentences_df is not None and not sentences_df.empty:
+            density_analysis['sentence_density'] = sentence_density_view(self.entities_df, sentences_df)
+        if sections_df is not None and not sections_df.empty:
+            density_analysis['section_density'] = section_density_view(self.entities_df, sections_df, tokens_df)
+        
+        return density_analysis
+    
+    def analyze_positional_density(self, bins: int = 20, grid_size: int = 200, bandwidth: Optional[float] = None,
+                                   zones: Tuple[float, float] = (0.1, 0.9), anchor: str = 'begin') -> Dict[str, Any]:
+        """
+        Where in the minutes each entity label falls (opening, Ordem do Dia, closing).
+        
+        Span offsets are divided by document length and profiled per label and per
+        label × municipality; pass the result to positional_density.positional_density_figure
+        to plot it with figure_utils.save_figure.
+        
+        Args:
+            bins: Histogram bins over the relative position [0, 1]
+            grid_size: KDE evaluation points
+            bandwidth: Fixed KDE bandwidth (default: Silverman's rule per profile)
+            zones: Relative positions closing the opening zone and starting the closing zone
+            anchor: Span offset to place ('begin', 'end' or 'center')
+        """
+        if self.entities_df.empty:
+            return {'error': 'No entity data available'}
+        if self.documents_df.empty or 'text_length' not in self.documents_df.columns:
+            return {'error': 'No document lengths available'}
+        
+        return positional_profiles(self.entities_df, self.documents_df, bins=bins, grid_size=grid_size,
+                                   bandwidth=bandwidth, zones=zones, anchor=anchor)
+    
+    def analyze_voting_cohesion(self, period: str = 'year', min_items: int = 5) -> Dict[str, Any]:
+        """
+        Party voting cohesion (Rice / Hix indices) and pairwise party agreement per municipality.
+        
+        Voters of the posicionamento relations are resolved to parties through the participant
+        lists of each meeting; see voting_cohesion for the resolution rules.
+        
+        Args:
+            period: Document-dimension attribute for the over-time breakdown ('year', 'quarter',
+                'month' or None)
+            min_items: Minimum co-voted items for an agreement rate
+        """
+        if self.entities_df.empty or self.relations_df.empty:
+            return {'error': 'No entity or relation data available'}
+        
+        periods = None
+        if period is not None:
+            periods = self.document_dimension.set_index('filename')[period].dropna()
+        return voting_cohesion(self.entities_df, self.relations_df, periods=periods, min_items=min_items)
+    
+    def analyze_windowed_cooccurrence(self, window: str = 'sentence', size: int = 0,
+                                      sentences_df: Optional[pd.DataFrame] = None,
+                                      sections_df: Optional[pd.DataFrame] = None,
+                                      tokens_df: Optional[pd.DataFrame] = None, n_jobs: int = 1) -> Dict[str, Any]:
+        """
+        Entity label co-occurrence within a sentence, a Fronteira section or a ±size window.
+        
+        Unlike the document-level co-occurrence of analyze_entity_patterns, which is nearly
+        always true for long minutes, this counts pairs of spans that are actually close.
+        
+        Args:
+            window: 'sentence', 'section', 'chars' or 'tokens'
+            size: Window size in characters or tokens for 'chars'/'tokens'
+            sentences_df: Sentence table from InceptionParser.create_sentence_dataframe
+            sections_df: Section table from InceptionParser.create_section_dataframe
+            tokens_df: Token table from InceptionParser.create_token_dataframe
+            n_jobs: Worker processes; documents are sharded across them
+        """
+        if self.entities_df.empty:
+            return {'error': 'No entity data available'}
+        
+        return windowed_cooccurrence(self.entities_df, window, size, sentences_df=sentences_df,
+                                     sections_df=sections_df, tokens_df=tokens_df, n_jobs=n_jobs)
+    
     def analyze_fronteiras_patterns(self) -> Dict[str, Any]:
         """Detailed analysis of fronteiras (boundaries/limits) patterns."""
         if self.entities_df.empty:
@@ -579,19 +1285,19 @@ class AnnotationAnalyzer:
                 fronteira_analysis['documents_with_fronteira'] = fronteira_entities['filename'].nunique()
                 
                 # Fronteira type distribution
-                fronteira_counts = fronteira_entities['fronteira'].value_counts()
+                fronteira_counts = observed_value_counts(fronteira_entities['fronteira'])
                 fronteira_analysis['fronteira_type_distribution'] = fronteira_counts.to_dict()
                 fronteira_analysis['fronteira_type_percentages'] = (fronteira_counts / fronteira_counts.sum() * 100).round(2).to_dict()
                 
                 # Fronteira by municipality
-                fronteira_by_muni = fronteira_entities.groupby(['municipality', 'fronteira']).size().unstack(fill_value=0)
+                fronteira_by_muni = fronteira_entities.groupby(['municipality', 'fronteira'], observed=True).size().unstack(fill_value=0)
                 fronteira_analysis['fronteira_by_municipality'] = fronteira_by_muni.to_dict()
                 
                 # Fronteira co-occurrence with other entity types
                 fronteira_cooccurrence = {}
                 for entity_type in fronteira_entities['entity_label'].unique():
                     type_entities = fronteira_entities[fronteira_entities['entity_label'] == entity_type]
-                    type_fronteiras = type_entities['fronteira'].value_counts().to_dict()
+                    type_fronteiras = observed_value_counts(type_entities['fronteira']).to_dict()
                     fronteira_cooccurrence[entity_type] = type_fronteiras
                 
                 fronteira_analysis['fronteira_entity_cooccurrence'] = fronteira_cooccurrence
@@ -600,7 +1306,7 @@ class AnnotationAnalyzer:
                 fronteira_analysis['fronteira_text_statistics'] = {
                     'avg_length_chars': fronteira_entities['length'].mean(),
                     'avg_length_tokens': fronteira_entities['token_count'].mean(),
-                    'length_by_fronteira_type': fronteira_entities.groupby('fronteira')['length'].agg(['mean', 'std', 'count']).round(2).to_dict()
+                    'length_by_fronteira_type': fronteira_entities.groupby('fronteira', observed=True)['length'].agg(['mean', 'std', 'count']).round(2).to_dict()
                 }
                 
             else:
@@ -621,7 +1327,7 @@ class AnnotationAnalyzer:
         if 'tipo_reuniao' in self.entities_df.columns:
             tipo_reuniao_data = self.entities_df[self.entities_df['tipo_reuniao'].notna()]
             if not tipo_reuniao_data.empty:
-                tipo_counts = tipo_reuniao_data['tipo_reuniao'].value_counts()
+                tipo_counts = observed_value_counts(tipo_reuniao_data['tipo_reuniao'])
                 metadata_analysis['meeting_type_analysis'] = {
                     'total_with_meeting_type': len(tipo_reuniao_data),
                     'meeting_types': tipo_counts.to_dict(),
@@ -635,14 +1341,14 @@ class AnnotationAnalyzer:
                 metadata_analysis['participation_analysis'] = {
                     'total_with_participants': len(participantes_data),
                     'documents_with_participants': participantes_data['filename'].nunique(),
-                    'most_common_participants': participantes_data['participantes'].value_counts().head(20).to_dict()
+                    'most_common_participants': self._top_values(participantes_data['participantes'], 20)
                 }
         
         # Presence analysis
         if 'presenca' in self.entities_df.columns:
             presenca_data = self.entities_df[self.entities_df['presenca'].notna()]
             if not presenca_data.empty:
-                presenca_counts = presenca_data['presenca'].value_counts()
+                presenca_counts = observed_value_counts(presenca_data['presenca'])
                 metadata_analysis['presence_analysis'] = {
                     'total_with_presence_info': len(presenca_data),
                     'presence_types': presenca_counts.to_dict(),
@@ -653,7 +1359,7 @@ class AnnotationAnalyzer:
         if 'partido' in self.entities_df.columns:
             partido_data = self.entities_df[self.entities_df['partido'].notna()]
             if not partido_data.empty:
-                partido_counts = partido_data['partido'].value_counts()
+                partido_counts = observed_value_counts(partido_data['partido'])
                 metadata_analysis['political_party_analysis'] = {
                     'total_with_party_info': len(partido_data),
                     'unique_parties': partido_counts.nunique(),
@@ -663,7 +1369,7 @@ class AnnotationAnalyzer:
                 
                 # Party by municipality cross-analysis
                 if len(partido_data['municipality'].unique()) > 1:
-                    party_by_muni = pd.crosstab(partido_data['municipality'], partido_data['partido'])
+                    party_by_muni = self.contingency_tables.get('entities', 'municipality', 'partido').to_frame()
                     metadata_analysis['political_party_analysis']['party_by_municipality'] = party_by_muni.to_dict()
         
         # Time/schedule analysis
@@ -673,7 +1379,7 @@ class AnnotationAnalyzer:
                 metadata_analysis['schedule_analysis'] = {
                     'total_with_schedule': len(horario_data),
                     'documents_with_schedule': horario_data['filename'].nunique(),
-                    'schedule_patterns': horario_data['horario'].value_counts().head(15).to_dict()
+                    'schedule_patterns': self._top_values(horario_data['horario'], 15)
                 }
         
         # Cross-metadata correlation analysis
@@ -682,43 +1388,231 @@ class AnnotationAnalyzer:
         
         if len(available_metadata) > 1:
             metadata_analysis['metadata_correlations'] = {}
-            for i, col1 in enumerate(available_metadata):
-                for col2 in available_metadata[i+1:]:
-                    cross_data = self.entities_df[[col1, col2]].dropna()
-                    if not cross_data.empty:
-                        crosstab = pd.crosstab(cross_data[col1], cross_data[col2])
-                        metadata_analysis['metadata_correlations'][f'{col1}_vs_{col2}'] = crosstab.to_dict()
+            cotabulation = self.compute_metadata_cotabulations(available_metadata)
+            for (col1, col2), pair_counts in cotabulation.groupby(['field_1', 'field_2'], sort=False):
+                crosstab = pair_counts.pivot(index='value_1', columns='value_2', values='count').fillna(0).astype(int)
+                metadata_analysis['metadata_correlations'][f'{col1}_vs_{col2}'] = crosstab.to_dict()
         
         return metadata_analysis
     
-    def generate_summary_report(self) -> Dict[str, Any]:
-        """Generate comprehensive summary report suitable for academic publication."""
+    def compute_metadata_cotabulations(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Pairwise co-tabulation of entity metadata fields as a tidy long table.
         
-        summary_report = {
-            'metadata': {
-                'analysis_date': pd.Timestamp.now().isoformat(),
-                'total_files_analyzed': len(self.documents_df),
-                'analysis_scope': 'Complete INCEpTION annotation corpus with enhanced metadata analysis'
-            }
+        Args:
+            columns: Metadata columns to cross (defaults to every known metadata field present)
+        """
+        if columns is None:
+            columns = ['fronteira', 'posicionamento', 'tema', 'tipo_reuniao', 'presenca', 'partido']
+        columns = [col for col in columns if col in self.entities_df.columns]
+        return pairwise_cotabulation(self.entities_df, columns)
+    
+    def build_intermediate(self, dependency: Union[str, Tuple[str, str, str]]) -> Any:
+        """Build (or fetch) one shared intermediate listed in SECTION_DEPENDENCIES."""
+        if dependency == 'document_dimension':
+            return self.document_dimension
+        return self.contingency_tables.get(*dependency)
+    
+    def _section_computations(self, n_permutations: int = 0, n_jobs: int = 1) -> Dict[str, Tuple[Callable, Dict[str, Any]]]:
+        return {
+            'corpus_statistics': (self.compute_corpus_statistics, {}),
+            'municipality_analysis': (self.analyze_municipality_patterns, {}),
+            'statistical_tests': (self.compute_statistical_tests, {'n_permutations': n_permutations, 'n_jobs': n_jobs}),
+            'temporal_analysis': (self.analyze_temporal_patterns, {}),
+            'entity_analysis': (self.analyze_entity_patterns, {}),
+            'posicionamento_analysis': (self.analyze_posicionamento_patterns, {}),
+            'assunto_analysis': (self.analyze_assunto_patterns, {}),
+            'fronteiras_analysis': (self.analyze_fronteiras_patterns, {}),
+            'metadata_analysis': (self.analyze_metadata_patterns, {})
         }
+    
+    def compute_section(self, section: str, n_permutations: int = 0, n_jobs: int = 1) -> Dict[str, Any]:
+        """
+        Compute one report section, through the section cache and profiler when enabled.
         
-        # Run all analysis components including new metadata and fronteiras analysis
-        summary_report['corpus_statistics'] = self.compute_corpus_statistics()
-        summary_report['municipality_analysis'] = self.analyze_municipality_patterns()
-        summary_report['statistical_tests'] = self.compute_statistical_tests()
-        summary_report['temporal_analysis'] = self.analyze_temporal_patterns()
-        summary_report['entity_analysis'] = self.analyze_entity_patterns()
-        summary_report['posicionamento_analysis'] = self.analyze_posicionamento_patterns()
-        summary_report['assunto_analysis'] = self.analyze_assunto_patterns()
-        summary_report['fronteiras_analysis'] = self.analyze_fronteiras_patterns()
-        summary_report['metadata_analysis'] = self.analyze_metadata_patterns()
+        The section's shared intermediates are built first, and only on a cache miss.
+        """
+        compute, parameters = self._section_computations(n_permutations, n_jobs)[section]
+        
+        def run(**parameters):
+            for dependency in SECTION_DEPENDENCIES.get(section, []):
+                self.build_intermediate(dependency)
+            return compute(**parameters)
         
-        return summary_report
+        if self.profile:
+            return self._profiled(section, self._cached_section, section, run, **parameters)
+        return self._cached_section(section, run, **parameters)
+    
+    def lazy_summary_report(self, n_permutations: int = 0, n_jobs: int = 1,
+                            sections: Optional[Iterable[str]] = None) -> 'LazyReport':
+        """
+        Summary report whose sections are computed on first access.
+        
+        Args:
+            n_permutations: Shuffles for the permutation test variants (0 disables them)
+            n_jobs: Worker processes for the permutation shuffles
+            sections: Section names or prefixes to include (None includes every section)
+        """
+        selected = resolve_report_sections(sections)
+        metadata = {
+            'analysis_date': pd.Timestamp.now().isoformat(),
+            'total_files_analyzed': len(self.documents_df),
+            'analysis_scope': 'Complete INCEpTION annotation corpus with enhanced metadata analysis'
+        }
+        if self.sketch_mode:
+            metadata['sketch_mode'] = sketch_error_bounds(self.sketch_memory_budget)
+        if len(selected) < len(REPORT_SECTIONS):
+            metadata['selected_sections'] = selected
+        if self.cache_dir is not None:
+            parameters = self._section_computations(n_permutations, n_jobs)
+            metadata['section_cache_keys'] = {
+                section: self.section_cache_key(section, **parameters[section][1]) for section in selected
+            }
+        return LazyReport(self, selected, metadata, n_permutations=n_permutations, n_jobs=n_jobs)
+    
+    def generate_summary_report(self, n_permutations: int = 0, n_jobs: int = 1,
+                                sections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Generate comprehensive summary report suitable for academic publication.
+        
+        Args:
+            n_permutations: Shuffles for the permutation test variants (0 disables them)
+            n_jobs: Worker processes for the permutation shuffles
+            sections: Section names or prefixes to include (None includes every section)
+        """
+        return self.lazy_summary_report(n_permutations, n_jobs, sections).to_dict()
     
     def run_comprehensive_analysis(self) -> Dict[str, Any]:
         """Run comprehensive statistical analysis - alias for generate_summary_report."""
         return self.generate_summary_report()
 
+class LazyReport(Mapping):
+    """
+    Read-only summary report whose sections are computed on first access.
+    
+    Iterating, to_dict() or json-converting the report computes every selected section;
+    indexing computes just that one. The '_profile' entry is present when the analyzer profiles.
+    """
+    
+    def __init__(self, analyzer: AnnotationAnalyzer, sections: List[str], metadata: Dict[str, Any],
+                 n_permutations: int = 0, n_jobs: int = 1):
+        self.analyzer = analyzer
+        self.sections = list(sections)
+        self.metadata = metadata
+        self.n_permutations = n_permutations
+        self.n_jobs = n_jobs
+        self._computed = {}
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == 'metadata':
+            return self.metadata
+        if key == '_profile' and self.analyzer.profile:
+            return {section: self.analyzer.profile_records[section]
+                    for section in self.sections if section in self.analyzer.profile_records}
+        if key not in self.sections:
+            raise KeyError(key)
+        if key not in self._computed:
+            self._computed[key] = self.analyzer.compute_section(key, self.n_permutations, self.n_jobs)
+        return self._computed[key]
+    
+    def __iter__(self):
+        yield 'metadata'
+        yield from self.sections
+        if self.analyzer.profile:
+            yield '_profile'
+    
+    def __len__(self) -> int:
+        return 1 + len(self.sections) + int(self.analyzer.profile)
+    
+    @property
+    def computed_sections(self) -> List[str]:
+        return [section for section in self.sections if section in self._computed]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Compute every selected section and return the report as a plain dict."""
+        return {key: self[key] for key in self}
+    
+    def __repr__(self) -> str:
+        return f"LazyReport(sections={self.sections}, computed={self.computed_sections})"
+
+def normalize_document_dates(dates: pd.Series, municipalities: pd.Series) -> pd.Series:
+    """
+    Parse YYYY-MM-DD / YYYY-DD-MM filename dates into timestamps.
+    
+    A middle or last field above 12 fixes the order for that date. Ambiguous dates (both
+    fields <= 12) follow the majority order of their municipality's unambiguous dates, which
+    handles the Fundão files written as YYYY-DD-MM.
+    """
+    parts = dates.astype('string').str.extract(r'^(\d{4})-(\d{1,2})-(\d{1,2})').astype('float')
+    year, middle, last = parts[0], parts[1], parts[2]
+    
+    day_first = middle > 12
+    month_first = last > 12
+    votes = (day_first.astype(int) - month_first.astype(int)).groupby(municipalities.to_numpy()).transform('sum')
+    use_day_first = day_first | (~month_first & (votes > 0))
+    
+    return pd.to_datetime(pd.DataFrame({
+        'year': year,
+        'month': middle.where(~use_day_first, last),
+        'day': last.where(~use_day_first, middle)
+    }), errors='coerce')
+
+def pairwise_cotabulation(df: pd.DataFrame, columns: List[str], chunk_rows: int = 1_000_000) -> pd.DataFrame:
+    """
+    Co-tabulate every pair of categorical columns in a single bincount.
+    
+    Each column is factorized once into integer codes. Every (row, column pair) is mapped to
+    a combined key, offset so that all pairs share one key space, and counted with a single
+    np.bincount per row chunk. Rows with a missing value in either column of a pair are
+    skipped for that pair, as pd.crosstab does.
+    
+    Args:
+        df: Source frame
+        columns: Categorical columns to cross; all i < j pairs are tabulated
+        chunk_rows: Rows per chunk when building the combined keys
+        
+    Returns:
+        pd.DataFrame: Long table with field_1, field_2, value_1, value_2 and a non-zero count
+    """
+    empty = pd.DataFrame(columns=['field_1', 'field_2', 'value_1', 'value_2', 'count'])
+    if len(columns) < 2 or df.empty:
+        return empty
+    
+    factorized = [pd.factorize(df[column], sort=True) for column in columns]
+    codes = np.column_stack([column_codes for column_codes, _ in factorized]).astype(np.int64)
+    n_levels = np.array([len(levels) for _, levels in factorized], dtype=np.int64)
+    
+    first, second = np.triu_indices(len(columns), k=1)
+    pair_sizes = n_levels[first] * n_levels[second]
+    offsets = np.concatenate([[0], np.cumsum(pair_sizes)[:-1]])
+    
+    counts = np.zeros(int(pair_sizes.sum()), dtype=np.int64)
+    for start in range(0, len(codes), chunk_rows):
+        chunk = codes[start:start + chunk_rows]
+        keys = offsets + chunk[:, first] * n_levels[second] + chunk[:, second]
+        valid = (chunk[:, first] >= 0) & (chunk[:, second] >= 0)
+        counts += np.bincount(keys[valid], minlength=len(counts))
+    
+    cells = np.flatnonzero(counts)
+    if len(cells) == 0:
+        return empty
+    pair_index = np.searchsorted(offsets, cells, side='right') - 1
+    local = cells - offsets[pair_index]
+    
+    blocks = []
+    for pair in np.unique(pair_index):
+        in_pair = pair_index == pair
+        i, j = first[pair], second[pair]
+        blocks.append(pd.DataFrame({
+            'field_1': columns[i],
+            'field_2': columns[j],
+            'value_1': np.asarray(factorized[i][1])[local[in_pair] // n_levels[j]],
+            'value_2': np.asarray(factorized[j][1])[local[in_pair] % n_levels[j]],
+            'count': counts[cells[in_pair]]
+        }))
+    
+    return pd.concat(blocks, ignore_index=True)
+
 def calculate_effect_size(group1: np.ndarray, group2: np.ndarray) -> float:
     """Calculate Cohen's d effect size."""
     n1, n2 = len(group1), len(group2)
@@ -729,20 +1623,338 @@ def calculate_effect_size(group1: np.ndarray, group2: np.ndarray) -> float:
     
     return (np.mean(group1) - np.mean(group2)) / pooled_std
 
-def bootstrap_confidence_interval(data: np.ndarray, statistic_func=np.mean, n_bootstrap=1000, confidence_level=0.95) -> Tuple[float, float]:
-    """Calculate bootstrap confidence interval."""
-    bootstrap_stats = []
+def _resolve_rng(rng: Optional[Union[int, np.random.Generator]] = None) -> np.random.Generator:
+    """Return a NumPy Generator from a seed, an existing Generator or None."""
+    if isinstance(rng, np.random.Generator):
+        return rng
+    return np.random.default_rng(rng)
+
+def _evaluate_statistic_rows(samples: np.ndarray, statistic_func: Callable) -> np.ndarray:
+    """
+    Evaluate a statistic on every row of a 2D sample matrix.
+    
+    Vectorisable NumPy reductions (np.mean, np.median, np.std, ...) are called once
+    with axis=1; any other callable falls back to a per-row evaluation.
+    """
+    try:
+        values = np.asarray(statistic_func(samples, axis=1), dtype=float)
+        if values.shape == (samples.shape[0],):
+            return values
+    except TypeError:
+        pass
+    return np.array([statistic_func(row) for row in samples], dtype=float)
+
+def bootstrap_distribution(data: np.ndarray, statistic_func: Callable = np.mean, n_bootstrap: int = 1000,
+                           rng: Optional[Union[int, np.random.Generator]] = None,
+                           max_batch_elements: int = 2 ** 22) -> np.ndarray:
+    """
+    Draw the bootstrap distribution of a statistic in memory-bounded batches.
+    
+    Resample indices are drawn as an (batch, n) matrix so that each batch holds at most
+    max_batch_elements indices, and the statistic is evaluated along axis 1.
+    
+    Args:
+        data: 1D array of observations (booleans give proportions with np.mean)
+        statistic_func: Statistic to bootstrap, ideally accepting an axis argument
+        n_bootstrap: Number of bootstrap resamples
+        rng: np.random.Generator or integer seed for reproducible resampling
+        max_batch_elements: Upper bound on resample indices held in memory at once
+        
+    Returns:
+        np.ndarray: Array of n_bootstrap bootstrap statistics
+    """
+    data = np.asarray(data)
+    n = len(data)
+    if n == 0:
+        return np.full(n_bootstrap, np.nan)
+    
+    rng = _resolve_rng(rng)
+    batch_size = max(1, min(n_bootstrap, max_batch_elements // n))
+    bootstrap_stats = np.empty(n_bootstrap, dtype=float)
+    
+    for start in range(0, n_bootstrap, batch_size):
+        stop = min(start + batch_size, n_bootstrap)
+        indices = rng.integers(0, n, size=(stop - start, n))
+        bootstrap_stats[start:stop] = _evaluate_statistic_rows(data[indices], statistic_func)
+    
+    return bootstrap_stats
+
+def _jackknife_statistics(data: np.ndarray, statistic_func: Callable,
+                          max_batch_elements: int = 2 ** 22) -> np.ndarray:
+    """Leave-one-out statistics, built as batched (batch, n - 1) index matrices."""
     n = len(data)
+    positions = np.arange(n - 1)
+    batch_size = max(1, min(n, max_batch_elements // max(n - 1, 1)))
+    jackknife_stats = np.empty(n, dtype=float)
+    
+    for start in range(0, n, batch_size):
+        left_out = np.arange(start, min(start + batch_size, n))
+        # Row i skips position i: indices >= i are shifted by one
+        indices = positions[None, :] + (positions[None, :] >= left_out[:, None])
+        jackknife_stats[start:start + len(left_out)] = _evaluate_statistic_rows(data[indices], statistic_func)
+    
+    return jackknife_stats
+
+def bootstrap_confidence_interval(data: np.ndarray, statistic_func=np.mean, n_bootstrap=1000, confidence_level=0.95,
+                                  method: str = 'percentile',
+                                  rng: Optional[Union[int, np.random.Generator]] = None,
+                                  max_batch_elements: int = 2 ** 22) -> np.ndarray:
+    """
+    Calculate bootstrap confidence interval.
     
-    for _ in range(n_bootstrap):
-        bootstrap_sample = np.random.choice(data, size=n, replace=True)
-        bootstrap_stats.append(statistic_func(bootstrap_sample))
+    Args:
+        data: 1D array of observations
+        statistic_func: Statistic to bootstrap (np.mean, np.median, ... are evaluated along an axis)
+        n_bootstrap: Number of bootstrap resamples
+        confidence_level: Two-sided confidence level
+        method: 'percentile' or 'bca' (bias-corrected and accelerated)
+        rng: np.random.Generator or integer seed for reproducible resampling
+        max_batch_elements: Upper bound on resample indices held in memory at once
+        
+    Returns:
+        np.ndarray: [lower, upper] interval bounds
+    """
+    if method not in ('percentile', 'bca'):
+        raise ValueError(f"Unknown bootstrap interval method: {method}")
+    
+    data = np.asarray(data)
+    bootstrap_stats = bootstrap_distribution(data, statistic_func, n_bootstrap, rng, max_batch_elements)
     
     alpha = 1 - confidence_level
-    lower_percentile = (alpha / 2) * 100
-    upper_percentile = (1 - alpha / 2) * 100
+    quantiles = np.array([alpha / 2, 1 - alpha / 2])
+    
+    if method == 'bca' and len(data) > 1:
+        theta_hat = float(statistic_func(data))
+        # Bias correction from the share of resamples below the point estimate
+        below = np.mean(bootstrap_stats < theta_hat) + 0.5 * np.mean(bootstrap_stats == theta_hat)
+        z0 = stats.norm.ppf(np.clip(below, 1e-10, 1 - 1e-10))
+        
+        # Acceleration from the jackknife skewness
+        jackknife_stats = _jackknife_statistics(data, statistic_func, max_batch_elements)
+        deviations = jackknife_stats.mean() - jackknife_stats
+        denominator = 6.0 * np.sum(deviations ** 2) ** 1.5
+        acceleration = np.sum(deviations ** 3) / denominator if denominator > 0 else 0.0
+        
+        z_alpha = stats.norm.ppf(quantiles)
+        adjusted = z0 + (z0 + z_alpha) / (1 - acceleration * (z0 + z_alpha))
+        quantiles = stats.norm.cdf(adjusted)
+    
+    return np.nanpercentile(bootstrap_stats, quantiles * 100)
+
+def _kruskal_statistics(label_matrix: np.ndarray, ranks: np.ndarray, group_sizes: np.ndarray,
+                        tie_correction: float) -> np.ndarray:
+    """Kruskal-Wallis H for every row of a (batch, n) matrix of group labels."""
+    n_rows, n = label_matrix.shape
+    n_groups = len(group_sizes)
+    keys = (np.arange(n_rows)[:, None] * n_groups + label_matrix).ravel()
+    rank_sums = np.bincount(keys, weights=np.tile(ranks, n_rows), minlength=n_rows * n_groups)
+    rank_sums = rank_sums.reshape(n_rows, n_groups)
+    h = 12.0 / (n * (n + 1)) * np.sum(rank_sums ** 2 / group_sizes, axis=1) - 3 * (n + 1)
+    return h / tie_correction
+
+def _chi2_statistics(label_matrix: np.ndarray, row_codes: np.ndarray, expected: np.ndarray) -> np.ndarray:
+    """Pearson chi-square for every row of a (batch, n) matrix of column codes against fixed row codes."""
+    n_rows = label_matrix.shape[0]
+    n_row_levels, n_col_levels = expected.shape
+    cells = n_row_levels * n_col_levels
+    keys = (np.arange(n_rows)[:, None] * cells + row_codes * n_col_levels + label_matrix).ravel()
+    tables = np.bincount(keys, minlength=n_rows * cells).reshape(n_rows, n_row_levels, n_col_levels)
+    return np.sum((tables - expected) ** 2 / expected, axis=(1, 2))
+
+def _count_arrangements(labels: np.ndarray) -> float:
+    """Number of distinct arrangements of a label vector (multinomial coefficient)."""
+    counts = np.bincount(labels)
+    log_count = special.gammaln(len(labels) + 1) - np.sum(special.gammaln(counts + 1))
+    return float(np.exp(min(log_count, 700.0)))
+
+def _enumerate_arrangements(labels: np.ndarray) -> np.ndarray:
+    """All distinct arrangements of a label vector, one per row."""
+    n = len(labels)
+    counts = np.bincount(labels)
+    arrangements = []
+    
+    def assign(free_positions: Tuple[int, ...], level: int, current: np.ndarray):
+        if level == len(counts) - 1:
+            current[list(free_positions)] = level
+            arrangements.append(current.copy())
+            return
+        for chosen in combinations(free_positions, counts[level]):
+            current[list(chosen)] = level
+            chosen_set = set(chosen)
+            assign(tuple(p for p in free_positions if p not in chosen_set), level + 1, current)
     
-    return np.percentile(bootstrap_stats, [lower_percentile, upper_percentile])
+    assign(tuple(range(n)), 0, np.empty(n, dtype=labels.dtype))
+    return np.array(arrangements)
+
+def _permutation_exceedances(statistic: Callable, labels: np.ndarray, context: Dict[str, Any],
+                             observed: float, n_permutations: int, seed: np.random.SeedSequence) -> int:
+    """Count shuffled statistics at least as extreme as the observed one (runs in worker processes)."""
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permuted(np.tile(labels, (n_permutations, 1)), axis=1)
+    permuted_stats = statistic(shuffled, **context)
+    return int(np.sum(permuted_stats >= observed - 1e-9 * max(1.0, abs(observed))))
+
+def _run_permutation_test(statistic: Callable, labels: np.ndarray, context: Dict[str, Any], observed: float,
+                          n_permutations: int = 9999, method: str = 'auto',
+                          rng: Optional[Union[int, np.random.Generator]] = None,
+                          early_stopping: bool = True, alpha: float = 0.05, n_jobs: int = 1,
+                          batch_size: int = 1000, max_exact_arrangements: int = 100000,
+                          executor: Optional[Executor] = None) -> Dict[str, Any]:
+    """
+    Shared engine for exact and Monte-Carlo permutation tests.
+    
+    Shuffles are generated as (batch, n) label matrices and scored in one vectorised call.
+    With early_stopping, batches stop once a 99.9% Clopper-Pearson interval on the running
+    p-value lies entirely above or below alpha. With n_jobs > 1, batches run in rounds
+    across a process pool (the given executor, or a temporary one) using independent child seeds.
+    """
+    if method not in ('auto', 'exact', 'monte_carlo'):
+        raise ValueError(f"Unknown permutation method: {method}")
+    
+    n_arrangements = _count_arrangements(labels)
+    if method == 'exact' or (method == 'auto' and n_arrangements <= min(n_permutations, max_exact_arrangements)):
+        if n_arrangements > max_exact_arrangements:
+            raise ValueError(f"Exact test needs {n_arrangements:.3g} arrangements (limit {max_exact_arrangements})")
+        all_stats = statistic(_enumerate_arrangements(labels), **context)
+        exceed = int(np.sum(all_stats >= observed - 1e-9 * max(1.0, abs(observed))))
+        return {
+            'method': 'exact',
+            'p_value': exceed / len(all_stats),
+            'n_permutations': len(all_stats),
+            'stopped_early': False
+        }
+    
+    rng = _resolve_rng(rng)
+    batch_size = max(1, min(batch_size, n_permutations, 2 ** 22 // max(len(labels), 1)))
+    batch_sizes = [batch_size] * (n_permutations // batch_size)
+    if n_permutations % batch_size:
+        batch_sizes.append(n_permutations % batch_size)
+    seeds = np.random.SeedSequence(int(rng.integers(2 ** 63))).spawn(len(batch_sizes))
+    
+    if n_jobs is not None and n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = max(1, n_jobs or 1)
+    owns_executor = executor is None and n_jobs > 1
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=n_jobs)
+    
+    exceed, done, stopped_early = 0, 0, False
+    try:
+        for start in range(0, len(batch_sizes), n_jobs):
+            round_sizes = batch_sizes[start:start + n_jobs]
+            round_seeds = seeds[start:start + n_jobs]
+            if executor is not None:
+                futures = [executor.submit(_permutation_exceedances, statistic, labels, context, observed, size, seed)
+                           for size, seed in zip(round_sizes, round_seeds)]
+                exceed += sum(future.result() for future in futures)
+            else:
+                exceed += sum(_permutation_exceedances(statistic, labels, context, observed, size, seed)
+                              for size, seed in zip(round_sizes, round_seeds))
+            done += sum(round_sizes)
+            
+            if early_stopping and done < n_permutations:
+                lower = stats.beta.ppf(0.0005, exceed, done - exceed + 1) if exceed > 0 else 0.0
+                upper = stats.beta.ppf(0.9995, exceed + 1, done - exceed) if exceed < done else 1.0
+                if upper < alpha or lower > alpha:
+                    stopped_early = True
+                    break
+    finally:
+        if owns_executor:
+            executor.shutdown()
+    
+    return {
+        'method': 'monte_carlo',
+        'p_value': (exceed + 1) / (done + 1),
+        'n_permutations': done,
+        'stopped_early': stopped_early
+    }
+
+def permutation_kruskal_test(groups: List[np.ndarray], n_permutations: int = 9999, method: str = 'auto',
+                             rng: Optional[Union[int, np.random.Generator]] = None,
+                             early_stopping: bool = True, alpha: float = 0.05, n_jobs: int = 1,
+                             executor: Optional[Executor] = None) -> Dict[str, Any]:
+    """
+    Permutation variant of the Kruskal-Wallis test.
+    
+    Args:
+        groups: List of 1D arrays, one per group
+        n_permutations: Maximum number of Monte-Carlo shuffles
+        method: 'auto' (exact when all arrangements fit in n_permutations), 'exact' or 'monte_carlo'
+        rng: np.random.Generator or integer seed
+        early_stopping: Stop once the p-value is clearly above or below alpha
+        alpha: Significance level used for early stopping and the 'significant' flag
+        n_jobs: Worker processes for the shuffles (-1 uses all cores)
+        executor: Optional shared process pool, reused across many tests
+    """
+    groups = [np.asarray(group, dtype=float) for group in groups if len(group) > 0]
+    values = np.concatenate(groups)
+    labels = np.repeat(np.arange(len(groups)), [len(group) for group in groups])
+    n = len(values)
+    
+    ranks = stats.rankdata(values)
+    _, tie_counts = np.unique(values, return_counts=True)
+    tie_correction = 1.0 - np.sum(tie_counts ** 3 - tie_counts) / (n ** 3 - n)
+    if tie_correction == 0:
+        raise ValueError('All values are identical')
+    
+    context = {
+        'ranks': ranks,
+        'group_sizes': np.bincount(labels).astype(float),
+        'tie_correction': tie_correction
+    }
+    observed = float(_kruskal_statistics(labels[None, :], **context)[0])
+    result = _run_permutation_test(_kruskal_statistics, labels, context, observed, n_permutations, method,
+                                   rng, early_stopping, alpha, n_jobs, executor=executor)
+    
+    return {
+        'test': 'Kruskal-Wallis permutation',
+        'statistic': observed,
+        **result,
+        'significant': result['p_value'] < alpha
+    }
+
+def permutation_chi2_test(row_values: pd.Series, col_values: pd.Series, n_permutations: int = 9999,
+                          method: str = 'auto', rng: Optional[Union[int, np.random.Generator]] = None,
+                          early_stopping: bool = True, alpha: float = 0.05, n_jobs: int = 1,
+                          executor: Optional[Executor] = None) -> Dict[str, Any]:
+    """
+    Permutation variant of the chi-square test of independence.
+    
+    Takes the paired observations behind a contingency table and shuffles the column
+    variable, which keeps both margins fixed.
+    
+    Args:
+        row_values: Row variable, one entry per observation
+        col_values: Column variable, one entry per observation
+        n_permutations: Maximum number of Monte-Carlo shuffles
+        method: 'auto', 'exact' or 'monte_carlo'
+        rng: np.random.Generator or integer seed
+        early_stopping: Stop once the p-value is clearly above or below alpha
+        alpha: Significance level used for early stopping and the 'significant' flag
+        n_jobs: Worker processes for the shuffles (-1 uses all cores)
+        executor: Optional shared process pool, reused across many tests
+    """
+    paired = pd.DataFrame({'row': np.asarray(row_values), 'col': np.asarray(col_values)}).dropna()
+    row_codes, row_levels = pd.factorize(paired['row'])
+    col_codes, col_levels = pd.factorize(paired['col'])
+    n = len(paired)
+    
+    table = np.bincount(row_codes * len(col_levels) + col_codes,
+                        minlength=len(row_levels) * len(col_levels)).reshape(len(row_levels), len(col_levels))
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    
+    context = {'row_codes': row_codes, 'expected': expected}
+    observed = float(_chi2_statistics(col_codes[None, :], **context)[0])
+    result = _run_permutation_test(_chi2_statistics, col_codes, context, observed, n_permutations, method,
+                                   rng, early_stopping, alpha, n_jobs, executor=executor)
+    
+    return {
+        'test': 'Chi-square permutation',
+        'chi2_statistic': observed,
+        'cramers_v': np.sqrt(observed / (n * (min(table.shape) - 1))),
+        **result,
+        'significant': result['p_value'] < alpha
+    }
 
 def main():
     """Command-line interface for analysis functions."""
@@ -755,43 +1967,141 @@ def main():
     parser.add_argument('--output_file', type=str,
                        default='../results/statistics/comprehensive_analysis.json',
                        help='Output file for analysis results')
+    parser.add_argument('--permutations', type=int, default=0,
+                       help='Shuffles for permutation variants of the statistical tests (0 disables them)')
+    parser.add_argument('--n_jobs', type=int, default=1,
+                       help='Worker processes for permutation tests (-1 uses all cores)')
+    parser.add_argument('--sketch', action='store_true',
+                       help='Use bounded-memory sketches for distinct counts, top-N values and quantiles')
+    parser.add_argument('--sketch_memory', type=int, default=1 << 16,
+                       help='Memory budget in bytes for each sketch in --sketch mode')
+    parser.add_argument('--chunksize', type=int, default=0,
+                       help='Stream entities/relations in chunks of this many rows (out-of-core mode; 0 loads them in memory)')
+    parser.add_argument('--backend', choices=['pandas', 'duckdb'], default='pandas',
+                       help='Execution backend (duckdb runs the report in the embedded SQL engine; requires duckdb)')
+    parser.add_argument('--cache_dir', type=str, default=None,
+                       help='Cache report sections here, keyed by input column fingerprints and code version')
+    parser.add_argument('--table_output', type=str, default=None,
+                       help='Also write tidy per-section tables: a .parquet/.arrow file or a directory, plus a JSON index')
+    parser.add_argument('--profile', action='store_true',
+                       help='Record and print per-section wall/CPU time, peak traced memory and input rows')
+    parser.add_argument('--sections', type=str, default=None,
+                       help='Comma-separated report sections to compute, e.g. posicionamento,temporal (default: all)')
+    parser.add_argument('--preview', action='store_true',
+                       help='Write a fast approximate preview (scaled estimates with bootstrap error bars) from a stratified document sample')
+    parser.add_argument('--preview_rows', type=int, default=None,
+                       help='Row budget (entity + relation rows) of the --preview sample')
+    parser.add_argument('--preview_seconds', type=float, default=None,
+                       help='Time budget in seconds for drawing the --preview sample')
+    parser.add_argument('--check_parity', action='store_true',
+                       help='Compare the pandas and duckdb reports on --data_dir and exit')
     
     args = parser.parse_args()
     
     # Load data
     import json
     from pathlib import Path
+    from report_tables import to_json_compatible, write_report_tables
     
     data_dir = Path(args.data_dir)
+    sections = args.sections.split(',') if args.sections else None
+    try:
+        resolve_report_sections(sections)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.check_parity:
+        from sql_backend import check_backend_parity
+        differences = check_backend_parity(data_dir)
+        for difference in differences:
+            print(difference)
+        print(f"Backend parity: {'OK' if not differences else f'{len(differences)} differences'}")
+        raise SystemExit(1 if differences else 0)
     
     try:
-        entities_df = pd.read_csv(data_dir / 'entities.csv')
-        relations_df = pd.read_csv(data_dir / 'relations.csv')  
-        documents_df = pd.read_csv(data_dir / 'documents.csv')
-        
-        # Initialize analyzer
-        analyzer = AnnotationAnalyzer(entities_df, relations_df, documents_df)
-        
-        # Generate comprehensive report
-        report = analyzer.generate_summary_report()
+        if args.backend == 'duckdb':
+            from sql_backend import DuckDBAnnotationAnalyzer
+            if args.permutations:
+                print("Note: permutation tests need the row-level tables and are skipped on the duckdb backend")
+            analyzer = DuckDBAnnotationAnalyzer(data_dir)
+            report = analyzer.generate_summary_report(sections=sections)
+        elif args.chunksize > 0:
+            # Out-of-core mode: fold chunk aggregates instead of loading the tables
+            from streaming_analysis import StreamingAnnotationAnalyzer
+            if args.permutations:
+                print("Note: permutation tests need the row-level tables and are skipped in chunked mode")
+            analyzer = StreamingAnnotationAnalyzer(data_dir, chunksize=args.chunksize,
+                                                   sketch_memory_budget=args.sketch_memory)
+            report = analyzer.generate_summary_report(sections=sections)
+        else:
+            entities_df = pd.read_csv(data_dir / 'entities.csv')
+            relations_df = pd.read_csv(data_dir / 'relations.csv')  
+            documents_df = pd.read_csv(data_dir / 'documents.csv')
+            
+            if args.preview:
+                from preview import PreviewAnalyzer
+                report = PreviewAnalyzer(entities_df, relations_df, documents_df, row_budget=args.preview_rows,
+                                         time_budget=args.preview_seconds).generate_preview_report()
+                print(f"Preview sample: {report['metadata']['sampled_documents']} of "
+                      f"{report['metadata']['population_documents']} documents, "
+                      f"{report['metadata']['sampled_rows']} of {report['metadata']['population_rows']} rows")
+            else:
+                # Initialize analyzer
+                analyzer = AnnotationAnalyzer(entities_df, relations_df, documents_df,
+                                              sketch_mode=args.sketch, sketch_memory_budget=args.sketch_memory,
+                                              cache_dir=args.cache_dir, profile=args.profile)
+                
+                # Generate comprehensive report
+                report = analyzer.generate_summary_report(n_permutations=args.permutations, n_jobs=args.n_jobs,
+                                                          sections=sections)
+                
+                if args.cache_dir:
+                    for section, status in analyzer.cache_status.items():
+                        print(f"Cache {status}: {section}")
         
-        # Save report
+        # Save report, unless every section key matches the existing file (only analysis_date would change)
         output_path = Path(args.output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        unchanged = False
+        if 'section_cache_keys' in report['metadata'] and output_path.exists():
+            try:
+                with open(output_path, encoding='utf-8') as f:
+                    previous_keys = json.load(f).get('metadata', {}).get('section_cache_keys')
+                unchanged = previous_keys == report['metadata']['section_cache_keys']
+            except (OSError, ValueError):
+                pass
+        
+        if not unchanged:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(to_json_compatible(report), f, indent=2, ensure_ascii=False)
+        
+        if args.table_output:
+            index_path = write_report_tables(report, args.table_output)
+            print(f"Report tables index: {index_path}")
+        
+        if '_profile' in report:
+            print(f"\n=== SECTION PROFILE ===")
+            print(f"{'section':<26}{'wall s':>10}{'cpu s':>10}{'peak MiB':>10}  input rows")
+            for section, record in sorted(report['_profile'].items(), key=lambda item: -item[1]['wall_seconds']):
+                rows = ', '.join(f'{table}={count}' for table, count in record['input_rows'].items())
+                print(f"{section:<26}{record['wall_seconds']:>10.3f}{record['cpu_seconds']:>10.3f}"
+                      f"{record['peak_traced_bytes'] / 2**20:>10.1f}  {rows}")
         
         print(f"\n=== ANALYSIS COMPLETE ===")
-        print(f"Comprehensive analysis saved to: {output_path}")
+        print(f"Comprehensive analysis {'unchanged at' if unchanged else 'saved to'}: {output_path}")
         print(f"Documents analyzed: {report['metadata']['total_files_analyzed']}")
-        print(f"Municipalities: {len(report['corpus_statistics']['corpus_overview']['municipality_list'])}")
+        if 'selected_sections' in report['metadata']:
+            print(f"Sections: {', '.join(report['metadata']['selected_sections'])}")
+        corpus_statistics = report.get('corpus_statistics', {})
+        if 'corpus_overview' in corpus_statistics:
+            print(f"Municipalities: {len(corpus_statistics['corpus_overview']['municipality_list'])}")
         
-        if 'entity_overview' in report['corpus_statistics']:
-            print(f"Total entities: {report['corpus_statistics']['entity_overview']['total_entities']}")
+        if 'entity_overview' in corpus_statistics:
+            print(f"Total entities: {corpus_statistics['entity_overview']['total_entities']}")
         
-        if 'relation_overview' in report['corpus_statistics']:
-            print(f"Total relations: {report['corpus_statistics']['relation_overview']['total_relations']}")
+        if 'relation_overview' in corpus_statistics:
+            print(f"Total relations: {corpus_statistics['relation_overview']['total_relations']}")
             
     except FileNotFoundError as e:
         print(f"Error: Required CSV files not found in {data_dir}")
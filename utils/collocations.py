@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""
+Collocation and Association Statistics for Assunto Keywords
+
+This module scores associations between two categorical variables observed on the same
+units (keyword entities, sections, ...) from sparse count matrices: pointwise mutual
+information (PMI), normalised PMI and Dunning's log-likelihood ratio (G²) of the 2x2 table
+of every observed pair. Co-occurrence counts are sparse products of binary incidence
+matrices (units × values), so only observed pairs are ever materialised and the full
+vocabulary × Tema table stays tractable. Rows and columns below a minimum count are pruned
+before scoring, and results are reported as the top-k rows per column.
+"""
+
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse, special
+
+ASSOCIATION_MEASURES = ('llr', 'pmi', 'npmi', 'count')
+
+
+def incidence_matrix(units: Sequence, values: Sequence,
+                     unit_levels: Optional[pd.Index] = None) -> Tuple[sparse.csr_matrix, pd.Index, pd.Index]:
+    """
+    Binary units × values matrix (1 where a value occurs in a unit at least once).
+
+    Args:
+        units: Unit of each observation (e.g. keyword entity or section id)
+        values: Value of each observation (e.g. word, Tema or municipality); missing values are skipped
+        unit_levels: Fixed unit order, so several matrices over the same units line up
+
+    Returns:
+        Tuple: (csr matrix, unit levels, value levels)
+    """
+    units = pd.Series(units, dtype=object).reset_index(drop=True)
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    valid = units.notna() & values.notna()
+    units, values = units[valid], values[valid]
+
+    if unit_levels is None:
+        unit_codes, unit_levels = pd.factorize(units, sort=True)
+        unit_levels = pd.Index(unit_levels)
+    else:
+        unit_codes = unit_levels.get_indexer(units)
+    value_codes, value_levels = pd.factorize(values, sort=True)
+
+    keep = unit_codes >= 0
+    matrix = sparse.csr_matrix((np.ones(keep.sum(), dtype=np.int64), (unit_codes[keep], value_codes[keep])),
+                               shape=(len(unit_levels), len(value_levels)))
+    matrix.data[:] = 1  # duplicates were summed; presence only
+    return matrix, unit_levels, pd.Index(value_levels)
+
+
+def association_scores(cooccurrence: sparse.spmatrix, row_totals: np.ndarray, col_totals: np.ndarray,
+                       total: int, min_count: int = 3) -> pd.DataFrame:
+    """
+    PMI, NPMI and log-likelihood ratio for every observed cell of a co-occurrence matrix.
+
+    Args:
+        cooccurrence: Sparse rows × columns counts of units holding both values
+        row_totals: Units holding each row value
+        col_totals: Units holding each column value
+        total: Number of units
+        min_count: Minimum cell count (and minimum row/column total) to keep
+
+    Returns:
+        pd.DataFrame: row, col, count, expected, pmi, npmi, llr (one row per kept cell)
+    """
+    cells = sparse.coo_matrix(cooccurrence)
+    row_totals = np.asarray(row_totals, dtype=float)
+    col_totals = np.asarray(col_totals, dtype=float)
+    keep = ((cells.data >= min_count) & (row_totals[cells.row] >= min_count) & (col_totals[cells.col] >= min_count))
+    rows, cols, k11 = cells.row[keep], cells.col[keep], cells.data[keep].astype(float)
+
+    row_total, col_total = row_totals[rows], col_totals[cols]
+    expected = row_total * col_total / total
+    pmi = np.log2(k11 / expected)
+    joint = k11 / total
+    with np.errstate(divide='ignore', invalid='ignore'):
+        npmi = np.where(joint < 1, pmi / -np.log2(joint), 1.0)
+
+    # Dunning's G² over the 2x2 table [[k11, k12], [k21, k22]]
+    k12, k21 = row_total - k11, col_total - k11
+    k22 = total - row_total - col_total + k11
+    observed = np.stack([k11, k12, k21, k22])
+    margins = np.stack([row_total * col_total, row_total * (total - col_total),
+                        (total - row_total) * col_total, (total - row_total) * (total - col_total)]) / total
+    llr = 2 * (special.xlogy(observed, observed) - special.xlogy(observed, margins)).sum(axis=0)
+
+    return pd.DataFrame({'row': rows, 'col': cols, 'count': k11.astype(np.int64), 'expected': expected,
+                         'pmi': pmi, 'npmi': npmi, 'llr': np.maximum(llr, 0.0)})
+
+
+def top_associations(scores: pd.DataFrame, row_levels: pd.Index, col_levels: pd.Index,
+                     top_k: int = 10, measure: str = 'llr') -> Dict[Any, List[Dict[str, Any]]]:
+    """
+    Top-k positively associated row values for every column value.
+
+    Only cells observed more often than expected (PMI > 0) are ranked.
+    """
+    if measure not in ASSOCIATION_MEASURES:
+        raise ValueError(f"Unknown association measure: {measure}")
+
+    positive = scores[scores['pmi'] > 0].sort_values(['col', measure, 'count'], ascending=[True, False, False],
+                                                     kind='stable')
+    top = positive.groupby('col', sort=False).head(top_k)
+
+    results = {}
+    for col, group in top.groupby('col', sort=False):
+        results[col_levels[col]] = [
+            {'value': row_levels[row], 'count': int(count), 'pmi': round(float(pmi), 4),
+             'npmi': round(float(npmi), 4), 'llr': round(float(llr), 4)}
+            for row, count, pmi, npmi, llr in group[['row', 'count', 'pmi', 'npmi', 'llr']].itertuples(index=False)
+        ]
+    return results
+
+
+def association_table(row_incidence: sparse.csr_matrix, col_incidence: sparse.csr_matrix,
+                      row_levels: pd.Index, col_levels: pd.Index, min_count: int = 3, top_k: int = 10,
+                      measure: str = 'llr') -> Dict[str, Any]:
+    """
+    Associations between two incidence matrices over the same units.
+
+    Args:
+        row_incidence: Units × row values (binary)
+        col_incidence: Units × column values (binary)
+        row_levels: Row value labels
+        col_levels: Column value labels
+        min_count: Minimum co-occurrence and marginal count
+        top_k: Row values reported per column value
+        measure: Ranking measure ('llr', 'pmi', 'npmi' or 'count')
+    """
+    total = row_incidence.shape[0]
+    row_totals = np.asarray(row_incidence.sum(axis=0)).ravel()
+    col_totals = np.asarray(col_incidence.sum(axis=0)).ravel()
+    cooccurrence = (row_incidence.T @ col_incidence).tocsr()
+    scores = association_scores(cooccurrence, row_totals, col_totals, total, min_count)
+
+    return {
+        'units': int(total),
+        'row_values': len(row_levels),
+        'column_values': len(col_levels),
+        'observed_pairs': int(cooccurrence.nnz),
+        'scored_pairs': len(scores),
+        'measure': measure,
+        'top_by_column': top_associations(scores, row_levels, col_levels, top_k, measure)
+    }
+
+
+def pair_collocations(incidence: sparse.csr_matrix, levels: pd.Index, min_count: int = 3,
+                      top_n: int = 25, measure: str = 'llr') -> List[Dict[str, Any]]:
+    """Strongest associated pairs of values occurring in the same units (e.g. word pairs within keywords)."""
+    total = incidence.shape[0]
+    totals = np.asarray(incidence.sum(axis=0)).ravel()
+    cooccurrence = sparse.triu(incidence.T @ incidence, k=1)
+    scores = association_scores(cooccurrence, totals, totals, total, min_count)
+    scores = scores[scores['pmi'] > 0].sort_values([measure, 'count'], ascending=False, kind='stable').head(top_n)
+    return [
+        {'pair': (levels[row], levels[col]), 'count': int(count), 'pmi': round(float(pmi), 4),
+         'npmi': round(float(npmi), 4), 'llr': round(float(llr), 4)}
+        for row, col, count, pmi, npmi, llr in scores[['row', 'col', 'count', 'pmi', 'npmi', 'llr']].itertuples(index=False)
+    ]
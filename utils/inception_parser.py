@@ -9,15 +9,33 @@ information about entities, relations, and text content for analysis.
 import json
 import logging
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 from dataclasses import dataclass
 from collections import defaultdict
+import numpy as np
 import pandas as pd
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SENTENCE_TYPE = 'de.tudarmstadt.ukp.dkpro.core.api.segmentation.type.Sentence'
+TOKEN_TYPE = 'de.tudarmstadt.ukp.dkpro.core.api.segmentation.type.Token'
+
+
+def token_spans_aligned(tokens: List[str], max_whitespace_share: float = 0.01) -> bool:
+    """
+    Whether token strings sliced at the Token offsets look like tokens.
+
+    Some exports carry offsets shifted against the sofa text, so spans start inside newlines and
+    cut words in half; such spans contain whitespace far more often than max_whitespace_share.
+    """
+    if not tokens:
+        return False
+    with_whitespace = sum(1 for token in tokens if token != token.strip() or len(token.split()) > 1)
+    return with_whitespace <= max_whitespace_share * len(tokens)
+
+
 @dataclass
 class EntitySpan:
     """Represents a single entity span annotation."""
@@ -62,10 +80,16 @@ class AssuntoSection:
     text: str
     section_number: Optional[int] = None
     keyword_entities: List[EntitySpan] = None  # ASSUNTO entities with Tema within this section
+    length: Optional[int] = None  # Characters of the stripped section text
+    token_count: Optional[int] = None
     
     def __post_init__(self):
         if self.keyword_entities is None:
             self.keyword_entities = []
+        if self.length is None:
+            self.length = len(self.text)
+        if self.token_count is None:
+            self.token_count = len(self.text.split())
 
 @dataclass
 class DocumentAnnotation:
@@ -79,6 +103,11 @@ class DocumentAnnotation:
     relations: List[RelationAnnotation]
     assunto_sections: List[AssuntoSection]
     metadata: Dict[str, Any]
+    # DKPro segmentation layers as sorted (n, 2) arrays of begin/end offsets
+    sentence_spans: Optional[np.ndarray] = None
+    token_spans: Optional[np.ndarray] = None
+    # False when the Token offsets do not line up with text_content (see token_spans_aligned)
+    segmentation_aligned: bool = True
 
 class InceptionParser:
     """Parser for INCEpTION JSON annotation files."""
@@ -109,6 +138,11 @@ class InceptionParser:
             # Parse assunto sections
             assunto_sections = self._parse_assunto_sections(entity_spans, text_content)
             
+            # Extract DKPro sentence and token segmentation
+            sentence_spans, token_spans = self._parse_segmentation(data)
+            segmentation_aligned = len(token_spans) == 0 or token_spans_aligned(
+                [text_content[begin:end] for begin, end in token_spans.tolist()])
+            
             # Create document annotation
             doc_annotation = DocumentAnnotation(
                 filename=filename,
@@ -119,7 +153,10 @@ class InceptionParser:
                 entity_spans=entity_spans,
                 relations=relations,
                 assunto_sections=assunto_sections,
-                metadata=document_info
+                metadata=document_info,
+                sentence_spans=sentence_spans,
+                token_spans=token_spans,
+                segmentation_aligned=segmentation_aligned
             )
             
             logger.info(f"Successfully parsed {filename}: {len(entity_spans)} entities, {len(relations)} relations")
@@ -152,6 +189,34 @@ class InceptionParser:
         self.parsed_documents = parsed_docs
         return parsed_docs
     
+    def iter_documents(self, directory_path: Path, order_by_date: bool = True) -> Iterator[DocumentAnnotation]:
+        """
+        Parse INCEpTION JSON files one at a time without keeping them in parsed_documents.
+        
+        Args:
+            directory_path: Directory containing INCEpTION JSON files
+            order_by_date: Yield documents by meeting date, then filename. Filename dates are
+                normalised (YYYY-MM-DD / YYYY-DD-MM) and stored as metadata['normalized_date']
+        """
+        json_files = sorted(directory_path.glob("*.json"))
+        normalized_dates = {}
+        if order_by_date and json_files:
+            from analysis_functions import normalize_document_dates
+            
+            file_metadata = [self._extract_file_metadata(path.name) for path in json_files]
+            dates = normalize_document_dates(pd.Series([metadata['date'] for _, metadata in file_metadata]),
+                                             pd.Series([municipality for municipality, _ in file_metadata]))
+            normalized_dates = dict(zip(json_files, dates.dt.strftime('%Y-%m-%d').fillna('')))
+            # Unparseable dates sort last
+            json_files.sort(key=lambda path: (normalized_dates[path] == '', normalized_dates[path], path.name))
+        
+        for json_file in json_files:
+            doc = self.parse_file(json_file)
+            if doc:
+                if json_file in normalized_dates:
+                    doc.metadata['normalized_date'] = normalized_dates[json_file]
+                yield doc
+    
     def _extract_file_metadata(self, filename: str) -> Tuple[str, Dict[str, Any]]:
         """Extract municipality and metadata from filename."""
         # Filename format: Municipality_cm_XXX_YYYY-MM-DD.json
@@ -289,6 +354,21 @@ class InceptionParser:
         
         return entity_spans
     
+    def _parse_segmentation(self, data: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """Extract DKPro Sentence and Token offsets as sorted (n, 2) int arrays."""
+        spans = {SENTENCE_TYPE: [], TOKEN_TYPE: []}
+        
+        for feature_struct in data.get('%FEATURE_STRUCTURES', []):
+            layer = spans.get(feature_struct.get('%TYPE'))
+            if layer is not None:
+                layer.append((feature_struct.get('begin', 0), feature_struct.get('end', 0)))
+        
+        arrays = []
+        for layer in (spans[SENTENCE_TYPE], spans[TOKEN_TYPE]):
+            array = np.array(layer, dtype=np.int64).reshape(-1, 2)
+            arrays.append(array[np.lexsort((array[:, 1], array[:, 0]))])
+        return arrays[0], arrays[1]
+    
     def _parse_relations(self, data: Dict, entity_spans: List[EntitySpan]) -> List[RelationAnnotation]:
         """Parse relation annotations."""
         relations = []
@@ -449,6 +529,126 @@ class InceptionParser:
         
         return pd.DataFrame(entity_data)
     
+    def create_section_dataframe(self, documents: Optional[List[DocumentAnnotation]] = None,
+                                 include_text: bool = False) -> pd.DataFrame:
+        """
+        Create a pandas DataFrame with one row per Fronteira-delimited assunto section.
+        
+        Sections are keyed by filename + section_id (section ids restart in every document).
+        Tema codes of the keyword entities inside a section are joined with ' | ' in the
+        temas column; create_section_keyword_dataframe has one row per keyword instead.
+        
+        Args:
+            documents: Parsed documents (defaults to all parsed documents)
+            include_text: Also include the section text (needed only for word frequencies)
+        """
+        if documents is None:
+            documents = self.parsed_documents
+        
+        section_data = []
+        for doc in documents:
+            for section in doc.assunto_sections:
+                temas = list(dict.fromkeys(entity.tema for entity in section.keyword_entities if entity.tema))
+                section_record = {
+                    'filename': doc.filename,
+                    'municipality': doc.municipality,
+                    'document_id': doc.document_id,
+                    'date': doc.date,
+                    'section_id': section.id,
+                    'section_number': section.section_number,
+                    'begin': section.begin,
+                    'end': section.end,
+                    'length': section.length,
+                    'token_count': section.token_count,
+                    'keyword_count': len(section.keyword_entities),
+                    'tema_count': len(temas),
+                    'temas': ' | '.join(temas) if temas else None
+                }
+                if include_text:
+                    section_record['text'] = section.text
+                
+                section_data.append(section_record)
+        
+        columns = ['filename', 'municipality', 'document_id', 'date', 'section_id', 'section_number',
+                   'begin', 'end', 'length', 'token_count', 'keyword_count', 'tema_count', 'temas']
+        return pd.DataFrame(section_data, columns=columns + (['text'] if include_text else []))
+    
+    def create_section_keyword_dataframe(self, documents: Optional[List[DocumentAnnotation]] = None) -> pd.DataFrame:
+        """Create a link table between assunto sections and the ASSUNTO keyword entities they contain."""
+        if documents is None:
+            documents = self.parsed_documents
+        
+        link_data = []
+        for doc in documents:
+            for section in doc.assunto_sections:
+                for entity in section.keyword_entities:
+                    link_data.append({
+                        'filename': doc.filename,
+                        'municipality': doc.municipality,
+                        'section_id': section.id,
+                        'entity_id': entity.id,
+                        'tema': entity.tema,
+                        'text': entity.text,
+                        'begin': entity.begin,
+                        'end': entity.end
+                    })
+        
+        columns = ['filename', 'municipality', 'section_id', 'entity_id', 'tema', 'text', 'begin', 'end']
+        return pd.DataFrame(link_data, columns=columns)
+    
+    def create_sentence_dataframe(self, documents: Optional[List[DocumentAnnotation]] = None) -> pd.DataFrame:
+        """
+        Create a pandas DataFrame with one row per DKPro sentence.
+        
+        token_count is the number of DKPro tokens starting inside the sentence; segmentation_aligned
+        is False for documents whose Token offsets do not line up with the text.
+        """
+        if documents is None:
+            documents = self.parsed_documents
+        
+        frames = []
+        for doc in documents:
+            sentences = doc.sentence_spans if doc.sentence_spans is not None else np.empty((0, 2), dtype=np.int64)
+            tokens = doc.token_spans if doc.token_spans is not None else np.empty((0, 2), dtype=np.int64)
+            token_begins = tokens[:, 0]
+            token_counts = (np.searchsorted(token_begins, sentences[:, 1], side='left') -
+                            np.searchsorted(token_begins, sentences[:, 0], side='left'))
+            frames.append(pd.DataFrame({
+                'filename': doc.filename,
+                'municipality': doc.municipality,
+                'document_id': doc.document_id,
+                'date': doc.date,
+                'sentence_index': np.arange(len(sentences)),
+                'begin': sentences[:, 0],
+                'end': sentences[:, 1],
+                'token_count': token_counts,
+                'segmentation_aligned': doc.segmentation_aligned
+            }))
+        
+        columns = ['filename', 'municipality', 'document_id', 'date', 'sentence_index', 'begin', 'end', 'token_count',
+                   'segmentation_aligned']
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    
+    def create_token_dataframe(self, documents: Optional[List[DocumentAnnotation]] = None) -> pd.DataFrame:
+        """Create a compact pandas DataFrame of DKPro token offsets (filename, begin, end, segmentation_aligned)."""
+        if documents is None:
+            documents = self.parsed_documents
+        
+        filenames = [doc.filename for doc in documents]
+        token_spans = [doc.token_spans if doc.token_spans is not None else np.empty((0, 2), dtype=np.int64)
+                       for doc in documents]
+        if not token_spans:
+            return pd.DataFrame(columns=['filename', 'begin', 'end', 'segmentation_aligned'])
+        
+        offsets = np.concatenate(token_spans)
+        codes = np.repeat(np.arange(len(filenames)), [len(spans) for spans in token_spans])
+        return pd.DataFrame({
+            'filename': pd.Categorical(np.array(filenames, dtype=object)[codes], categories=list(dict.fromkeys(filenames))),
+            'begin': pd.to_numeric(offsets[:, 0], downcast='integer'),
+            'end': pd.to_numeric(offsets[:, 1], downcast='integer'),
+            'segmentation_aligned': np.array([doc.segmentation_aligned for doc in documents], dtype=bool)[codes]
+        })
+    
     def create_voting_analysis_dataframe(self, documents: Optional[List[DocumentAnnotation]] = None) -> pd.DataFrame:
         """
         Create a DataFrame specifically for voting analysis by properly extracting 
@@ -622,6 +822,10 @@ def main():
     parser.add_argument('--output_dir', type=str,
                        default='../results/statistics',
                        help='Output directory for parsed data')
+    parser.add_argument('--tokens', action='store_true',
+                       help='Also write the DKPro token offsets (tokens.csv, one row per token)')
+    parser.add_argument('--near_duplicates', action='store_true',
+                       help='Flag near-duplicate sections in sections.csv (MinHash/LSH, see near_duplicates.py)')
     
     args = parser.parse_args()
     
@@ -640,11 +844,24 @@ def main():
     entities_df = inception_parser.create_entity_dataframe()
     relations_df = inception_parser.create_relations_dataframe()
     documents_df = inception_parser.create_document_dataframe()
+    if args.near_duplicates:
+        from near_duplicates import flag_section_dataframe
+        sections_df = flag_section_dataframe(inception_parser.create_section_dataframe(include_text=True))
+        sections_df = sections_df.drop(columns='text')
+    else:
+        sections_df = inception_parser.create_section_dataframe()
+    section_keywords_df = inception_parser.create_section_keyword_dataframe()
+    sentences_df = inception_parser.create_sentence_dataframe()
     
     # Save DataFrames
     entities_df.to_csv(output_dir / 'entities.csv', index=False)
     relations_df.to_csv(output_dir / 'relations.csv', index=False)
     documents_df.to_csv(output_dir / 'documents.csv', index=False)
+    sections_df.to_csv(output_dir / 'sections.csv', index=False)
+    section_keywords_df.to_csv(output_dir / 'section_keywords.csv', index=False)
+    sentences_df.to_csv(output_dir / 'sentences.csv', index=False)
+    if args.tokens:
+        inception_parser.create_token_dataframe().to_csv(output_dir / 'tokens.csv', index=False)
     
     # Save parsing summary
     summary = inception_parser.get_parsing_summary()
@@ -663,6 +880,11 @@ def main():
     print(f"- entities.csv: {len(entities_df)} rows")
     print(f"- relations.csv: {len(relations_df)} rows") 
     print(f"- documents.csv: {len(documents_df)} rows")
+    print(f"- sections.csv: {len(sections_df)} rows")
+    if args.near_duplicates:
+        print(f"  ({int(sections_df['is_near_duplicate'].sum())} flagged as near-duplicates)")
+    print(f"- section_keywords.csv: {len(section_keywords_df)} rows")
+    print(f"- sentences.csv: {len(sentences_df)} rows")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+"""
+MinHash/LSH Near-Duplicate Detection for Segments and Sections
+
+Recurring boilerplate ("Aprovada, por unanimidade, pelos presentes...") and agenda items
+copied from one meeting to the next inflate counts and leak between train/test splits. This
+module finds near-duplicate texts among publication dataset segments (text_pt) and Fronteira
+sections without comparing all pairs:
+
+- every text becomes a set of hashed word shingles (accent-folded tokens, rolling hash);
+- MinHash signatures estimate the Jaccard similarity of two shingle sets as the share of
+  agreeing signature rows;
+- LSH banding hashes each band of rows to a bucket, and only texts sharing a bucket in at
+  least one band become candidates, which are then verified against the threshold;
+- verified pairs are joined into clusters (connected components). The earliest text of a
+  cluster is kept as its representative, and all other members get is_near_duplicate = True.
+
+The flags table (id, cluster_id, duplicate_of, is_near_duplicate, ...) can be filtered with
+drop_near_duplicates, and cluster_id can be used as a group key when splitting train/test.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from text_statistics import tokenize, token_id
+
+HASH_PRIME = np.uint64(4294967291)
+SHINGLE_BASE = np.uint64(1099511628211)
+HASH_MASK = np.uint64(0xFFFFFFFF)
+FLAG_COLUMNS = ['cluster_id', 'cluster_size', 'duplicate_of', 'similarity', 'is_near_duplicate']
+
+
+def lsh_parameters(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Bands and rows per band whose S-curve threshold (1/b)^(1/r) is closest to threshold.
+
+    Args:
+        num_perm: Signature length (b * r <= num_perm)
+        threshold: Target Jaccard similarity
+
+    Returns:
+        Tuple[int, int]: (bands, rows)
+    """
+    if not 0 < threshold < 1:
+        raise ValueError(f"threshold must be between 0 and 1, got {threshold}")
+    options = [(bands, num_perm // bands) for bands in range(1, num_perm + 1)]
+    return min(options, key=lambda option: (abs((1 / option[0]) ** (1 / option[1]) - threshold), -option[0]))
+
+
+class ShingleHasher:
+    """Hashed word k-shingles of a text (32-bit, de-duplicated), with a token-ID cache shared across texts."""
+
+    def __init__(self, shingle_size: int = 5):
+        if shingle_size < 1:
+            raise ValueError('shingle_size must be at least 1')
+        self.shingle_size = shingle_size
+        self._ids = {}
+
+    def _token_ids(self, tokens: List[str]) -> np.ndarray:
+        ids = self._ids
+        for token in tokens:
+            if token not in ids:
+                ids[token] = token_id(token)
+        return np.fromiter((ids[token] for token in tokens), dtype=np.uint64, count=len(tokens))
+
+    def __call__(self, text: str) -> np.ndarray:
+        """Sorted unique shingle hashes; texts shorter than one shingle yield one hash of all their tokens."""
+        tokens = tokenize(text or '', fold=True)
+        if not tokens:
+            return np.empty(0, dtype=np.uint64)
+        ids = self._token_ids(tokens)
+        width = min(self.shingle_size, len(ids))
+        hashes = np.zeros(len(ids) - width + 1, dtype=np.uint64)
+        # Rolling polynomial over the token IDs; uint64 arithmetic wraps modulo 2^64
+        for offset in range(width):
+            hashes = hashes * SHINGLE_BASE + ids[offset:len(ids) - width + 1 + offset]
+        return np.unique((hashes >> np.uint64(32)) ^ (hashes & HASH_MASK))
+
+
+def minhash_signatures(shingle_sets: List[np.ndarray], num_perm: int = 128, seed: int = 42,
+                       batch_shingles: int = 1 << 16) -> np.ndarray:
+    """
+    MinHash signatures of non-empty shingle sets.
+
+    Each of the num_perm hash functions is (a * x + b) mod p with p = 2^32 - 5 and a, b < p, so
+    products with 32-bit shingle hashes stay exact in uint64. Texts are processed in batches
+    of about batch_shingles shingles and minima are taken with np.minimum.reduceat.
+
+    Args:
+        shingle_sets: One non-empty array of 32-bit shingle hashes per text
+        num_perm: Signature length
+        seed: Seed of the hash functions
+        batch_shingles: Shingles hashed per batch (bounds memory to num_perm * batch_shingles)
+
+    Returns:
+        np.ndarray: (texts, num_perm) uint64 signatures
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, HASH_PRIME, size=(num_perm, 1), dtype=np.uint64)
+    b = rng.integers(0, HASH_PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    signatures = np.empty((len(shingle_sets), num_perm), dtype=np.uint64)
+    start = 0
+    while start < len(shingle_sets):
+        stop, size = start, 0
+        while stop < len(shingle_sets) and (stop == start or size + len(shingle_sets[stop]) <= batch_shingles):
+            size += len(shingle_sets[stop])
+            stop += 1
+        batch = shingle_sets[start:stop]
+        offsets = np.concatenate([[0], np.cumsum([len(shingles) for shingles in batch])[:-1]])
+        hashed = (a * (np.concatenate(batch)[None, :] % HASH_PRIME) + b) % HASH_PRIME
+        signatures[start:stop] = np.minimum.reduceat(hashed, offsets, axis=1).T
+        start = stop
+    return signatures
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int, rows: int,
+                        groups: Optional[np.ndarray] = None, max_bucket_size: int = 64) -> np.ndarray:
+    """
+    Candidate pairs of texts that share a bucket in at least one LSH band.
+
+    Buckets of up to max_bucket_size texts yield all their pairs. Larger buckets (boilerplate
+    repeated in hundreds of meetings) pair every member with the bucket's first member and with
+    its predecessor in the bucket only, so their candidates grow linearly with bucket size; a
+    link between two members of a large bucket is then found only if it survives verification
+    through one of those pairs.
+
+    Args:
+        signatures: (texts, bands * rows) MinHash signatures
+        bands: LSH bands
+        rows: Signature rows per band
+        groups: Integer group per text; buckets never span groups (default: one group)
+        max_bucket_size: Largest bucket whose members are all paired with each other
+
+    Returns:
+        np.ndarray: (pairs, 2) unique row positions with i < j
+    """
+    n_texts = len(signatures)
+    weights = SHINGLE_BASE ** np.arange(rows, dtype=np.uint64)
+    groups = np.zeros(n_texts, dtype=np.int64) if groups is None else np.asarray(groups)
+    pairs = []
+    for band in range(bands):
+        keys = (signatures[:, band * rows:(band + 1) * rows] * weights).sum(axis=1)
+        order = np.lexsort((keys, groups))
+        sorted_keys, sorted_groups = keys[order], groups[order]
+        new_bucket = np.r_[True, (sorted_keys[1:] != sorted_keys[:-1]) | (sorted_groups[1:] != sorted_groups[:-1])]
+        starts = np.flatnonzero(new_bucket)
+        bucket = np.cumsum(new_bucket) - 1
+        sizes = np.bincount(bucket)
+        small = sizes[bucket] <= max_bucket_size
+
+        leaders = order[starts[bucket]]
+        to_leader = ~small & (leaders != order)
+        pairs.append(np.column_stack([leaders[to_leader], order[to_leader]]))
+
+        # Members offset positions apart in the sorted band: every pair of a small bucket,
+        # and the predecessor pair (offset 1) of a large one
+        small_sizes = sizes[sizes <= max_bucket_size]
+        largest_small = int(small_sizes.max()) if len(small_sizes) else 0
+        for offset in range(1, max(largest_small, 2)):
+            near = bucket[offset:] == bucket[:-offset]
+            if offset > 1:
+                near &= small[offset:]
+            pairs.append(np.column_stack([order[:-offset][near], order[offset:][near]]))
+
+    if not pairs or not any(len(band_pairs) for band_pairs in pairs):
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.sort(np.vstack(pairs), axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def near_duplicate_flags(records: Iterable[Dict[str, Any]], threshold: float = 0.8, num_perm: int = 128,
+                         shingle_size: int = 5, bands: Optional[int] = None, seed: int = 42,
+                         across_sources: bool = False) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Cluster near-duplicate texts and flag every member except each cluster's representative.
+
+    Args:
+        records: Stream of dicts with id, text and optionally source, document, municipality and
+            date (e.g. section_index.fronteira_section_records / publication_segment_records);
+            dates may be raw YYYY-MM-DD / YYYY-DD-MM filename dates
+        threshold: Estimated Jaccard similarity of shingle sets above which two texts are
+            near-duplicates
+        num_perm: MinHash signature length
+        shingle_size: Words per shingle
+        bands: LSH bands (default: chosen so the banding S-curve is centred on threshold)
+        seed: Seed of the MinHash functions
+        across_sources: Also match sections against segments (off by default, as a segment and
+            the section it was cut from are the same text)
+
+    Returns:
+        Tuple[pd.DataFrame, Dict]: Flags table (id, source, document, municipality, date,
+        shingles, cluster_id, cluster_size, duplicate_of, similarity, is_near_duplicate, snippet)
+        and detection statistics. similarity is the estimated Jaccard similarity to the representative
+        and can fall below threshold for members linked to it only through other members.
+    """
+    if bands is None:
+        bands, rows = lsh_parameters(num_perm, threshold)
+    else:
+        rows = num_perm // bands
+        if rows < 1:
+            raise ValueError(f"bands ({bands}) cannot exceed num_perm ({num_perm})")
+
+    hasher = ShingleHasher(shingle_size)
+    metadata, shingle_sets = [], []
+    for record in records:
+        shingles = hasher(record.get('text'))
+        metadata.append({
+            'id': record['id'],
+            'source': record.get('source'),
+            'document': record.get('document'),
+            'municipality': record.get('municipality'),
+            'date': record.get('date'),
+            'shingles': len(shingles),
+            'snippet': ' '.join((record.get('text') or '').split())[:120]
+        })
+        shingle_sets.append(shingles)
+
+    table = pd.DataFrame(metadata, columns=['id', 'source', 'document', 'municipality', 'date', 'shingles',
+                                            'snippet'])
+    if table.empty:
+        raise ValueError('No texts to compare')
+
+    # Signature rows ordered by id, so bucket pairs (and the result) do not depend on stream order
+    hashed = np.flatnonzero(table['shingles'].to_numpy() > 0)
+    hashed = hashed[np.argsort(table['id'].to_numpy(dtype=str)[hashed], kind='stable')]
+    signatures = minhash_signatures([shingle_sets[position] for position in hashed], num_perm, seed)
+    del shingle_sets
+
+    # Sources are bucketed separately unless matched across, so a bucket led by a text of another
+    # source cannot hide links between texts of the same source
+    groups = None if across_sources else pd.factorize(table['source'].to_numpy(dtype=object)[hashed])[0]
+    candidates = lsh_candidate_pairs(signatures[:, :bands * rows], bands, rows, groups)
+    agreement = (signatures[candidates[:, 0]] == signatures[candidates[:, 1]]).mean(axis=1)
+    verified = candidates[agreement >= threshold]
+
+    graph = sparse.coo_matrix((np.ones(len(verified)), (verified[:, 0], verified[:, 1])),
+                              shape=(len(hashed), len(hashed)))
+    _, components = connected_components(graph, directed=False)
+
+    # Representative: earliest dated member of the component (undated last), then id. Raw
+    # YYYY-DD-MM filename dates (Fundão) are normalised per municipality first
+    from analysis_functions import normalize_document_dates
+
+    sort_dates = normalize_document_dates(table['date'], table['municipality'])
+    hashed_table = table.iloc[hashed].assign(row=np.arange(len(hashed)), component=components,
+                                             sort_date=sort_dates.iloc[hashed])
+    hashed_table = hashed_table.sort_values(['component', 'sort_date', 'id'], na_position='last')
+    grouped = hashed_table.groupby('component')
+    sizes = grouped['row'].transform('size').to_numpy()
+    member_rows = hashed_table['row'].to_numpy()
+    representative_rows = grouped['row'].transform('first').to_numpy()
+    clustered = sizes > 1
+    duplicate = clustered & (member_rows != representative_rows)
+
+    table['cluster_id'] = None
+    table['cluster_size'] = 1
+    table['duplicate_of'] = None
+    table['similarity'] = np.nan
+    table['is_near_duplicate'] = False
+    cluster_codes = pd.factorize(hashed_table['component'].to_numpy()[clustered])[0]
+    table.loc[hashed_table.index[clustered], 'cluster_id'] = [f"dup_{code:05d}" for code in cluster_codes]
+    table.loc[hashed_table.index, 'cluster_size'] = sizes
+
+    # Estimated similarity of every duplicate to its representative
+    duplicates = hashed_table.index[duplicate]
+    member_rows, representative_rows = member_rows[duplicate], representative_rows[duplicate]
+    table.loc[duplicates, 'duplicate_of'] = table['id'].to_numpy()[hashed[representative_rows]]
+    table.loc[duplicates, 'similarity'] = (signatures[member_rows] == signatures[representative_rows]).mean(axis=1)
+    table.loc[duplicates, 'is_near_duplicate'] = True
+
+    statistics = {
+        'threshold': threshold,
+        'num_perm': num_perm,
+        'shingle_size': shingle_size,
+        'bands': bands,
+        'rows_per_band': rows,
+        'across_sources': across_sources,
+        'texts': len(table),
+        'texts_without_shingles': int(len(table) - len(hashed)),
+        'candidate_pairs': int(len(candidates)),
+        'verified_pairs': int(len(verified)),
+        'comparisons_avoided': float(1 - len(candidates) / max(1, len(hashed) * (len(hashed) - 1) / 2))
+    }
+    columns = ['id', 'source', 'document', 'municipality', 'date', 'shingles'] + FLAG_COLUMNS + ['snippet']
+    return table[columns], statistics
+
+
+def near_duplicate_summary(flags: pd.DataFrame, statistics: Dict[str, Any], top_clusters: int = 20) -> Dict[str, Any]:
+    """
+    JSON-ready summary of a flags table: duplicate rates per source and municipality and the
+    largest clusters with a snippet of their representative.
+    """
+    summary = dict(statistics)
+    summary['clusters'] = int(flags['cluster_id'].nunique())
+    summary['near_duplicates'] = int(flags['is_near_duplicate'].sum())
+    summary['near_duplicate_rate'] = float(flags['is_near_duplicate'].mean())
+
+    by_group = {}
+    for column in ('source', 'municipality'):
+        grouped = flags.groupby(column, dropna=False).agg(texts=('id', 'size'),
+                                                          near_duplicates=('is_near_duplicate', 'sum'),
+                                                          clusters=('cluster_id', 'nunique'))
+        grouped['near_duplicate_rate'] = (grouped['near_duplicates'] / grouped['texts']).round(4)
+        by_group[column] = grouped.astype({'near_duplicates': int}).to_dict('index')
+    summary['by_source'] = by_group['source']
+    summary['by_municipality'] = by_group['municipality']
+
+    clustered = flags[flags['cluster_id'].notna()]
+    representatives = clustered[~clustered['is_near_duplicate']].set_index('cluster_id')
+    largest = clustered.groupby('cluster_id').agg(size=('id', 'size'), documents=('document', 'nunique'),
+                                                  municipalities=('municipality', 'nunique'),
+                                                  min_similarity=('similarity', 'min'))
+    largest = largest.sort_values(['size', 'documents'], ascending=False).head(top_clusters)
+    summary['largest_clusters'] = [{
+        'cluster_id': cluster_id,
+        'size': int(row['size']),
+        'documents': int(row['documents']),
+        'municipalities': int(row['municipalities']),
+        'min_similarity': float(row['min_similarity']),
+        'representative': representatives.loc[cluster_id, 'id'],
+        'snippet': representatives.loc[cluster_id, 'snippet']
+    } for cluster_id, row in largest.iterrows()]
+    return summary
+
+
+def drop_near_duplicates(df: pd.DataFrame, flags: Optional[pd.DataFrame] = None,
+                         id_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    Rows of df that are not flagged as near-duplicates.
+
+    Args:
+        df: Table to filter; used as is when it already has an is_near_duplicate column
+        flags: Flags table from near_duplicate_flags (joined on id when df has no flag column)
+        id_column: Column of df holding the record ids of the flags table (default 'id')
+    """
+    if 'is_near_duplicate' in df.columns:
+        return df[~df['is_near_duplicate'].fillna(False).astype(bool)]
+    if flags is None:
+        raise ValueError('df has no is_near_duplicate column and no flags table was given')
+    flagged = set(flags.loc[flags['is_near_duplicate'], 'id'])
+    return df[~df[id_column or 'id'].isin(flagged)]
+
+
+def flag_section_dataframe(sections_df: pd.DataFrame, **options) -> pd.DataFrame:
+    """
+    Add near-duplicate flag columns to a section table.
+
+    Args:
+        sections_df: Section table from InceptionParser.create_section_dataframe(include_text=True)
+        **options: Passed to near_duplicate_flags
+
+    Returns:
+        pd.DataFrame: sections_df with cluster_id, cluster_size, duplicate_of, similarity and
+        is_near_duplicate (ids are 'filename#section_id')
+    """
+    if 'text' not in sections_df.columns:
+        raise ValueError('Near-duplicate flags need the section text (create_section_dataframe(include_text=True))')
+
+    ids = sections_df['filename'].astype(str) + '#' + sections_df['section_id'].astype(str)
+    records = ({'id': record_id, 'source': 'section', 'document': filename, 'municipality': municipality,
+                'date': date, 'text': text}
+               for record_id, filename, municipality, date, text in zip(
+                   ids, sections_df['filename'], sections_df['municipality'], sections_df['date'], sections_df['text']))
+    flags, _ = near_duplicate_flags(records, **options)
+    flags = flags.drop_duplicates('id').set_index('id')[FLAG_COLUMNS]
+    flagged = flags.reindex(ids)
+    flagged.index = sections_df.index
+    return pd.concat([sections_df, flagged], axis=1)
+
+
+def main():
+    """Command-line interface: flag near-duplicate sections and publication segments."""
+    import argparse
+    from inception_parser import InceptionParser
+    from section_index import fronteira_section_records, publication_segment_records
+
+    parser = argparse.ArgumentParser(description='MinHash/LSH near-duplicate detection for segments and sections')
+    parser.add_argument('--data_dir', type=str, default='../data/shared/inception',
+                       help='Path to directory containing INCEpTION JSON files (Fronteira sections)')
+    parser.add_argument('--publication_dir', type=str, default=None,
+                       help='Publication dataset directory with *_dataset.json files (text_pt segments)')
+    parser.add_argument('--no_sections', action='store_true',
+                       help='Only check publication segments')
+    parser.add_argument('--output_dir', type=str, default='../results/near_duplicates',
+                       help='Output directory for near_duplicates.csv and near_duplicates_summary.json')
+    parser.add_argument('--threshold', type=float, default=0.8,
+                       help='Estimated Jaccard similarity of shingle sets for near-duplicates')
+    parser.add_argument('--num_perm', type=int, default=128, help='MinHash signature length')
+    parser.add_argument('--shingle_size', type=int, default=5, help='Words per shingle')
+    parser.add_argument('--across_sources', action='store_true',
+                       help='Also match sections against publication segments')
+
+    args = parser.parse_args()
+
+    streams = []
+    if not args.no_sections:
+        streams.append(fronteira_section_records(InceptionParser().iter_documents(Path(args.data_dir))))
+    if args.publication_dir:
+        streams.append(publication_segment_records(args.publication_dir))
+    if not streams:
+        parser.error('Nothing to check: give --publication_dir or leave out --no_sections')
+
+    from itertools import chain
+    flags, statistics = near_duplicate_flags(chain.from_iterable(streams), threshold=args.threshold,
+                                             num_perm=args.num_perm, shingle_size=args.shingle_size,
+                                             across_sources=args.across_sources)
+    summary = near_duplicate_summary(flags, statistics)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    flags.to_csv(output_dir / 'near_duplicates.csv', index=False)
+    with open(output_dir / 'near_duplicates_summary.json', 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+
+    print(f"Checked {summary['texts']} texts: {summary['candidate_pairs']} candidate pairs, "
+          f"{summary['verified_pairs']} verified")
+    for source, row in summary['by_source'].items():
+        print(f"- {source}: {row['near_duplicates']} near-duplicates of {row['texts']} "
+              f"({row['near_duplicate_rate']:.1%}) in {row['clusters']} clusters")
+    print(f"\nFlags saved to: {output_dir / 'near_duplicates.csv'}")
+
+
+if __name__ == "__main__":
+    main()
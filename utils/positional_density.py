@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""
+Positional Entity-Density Profiles Along Meeting Minutes
+
+This module places every entity span at its relative position in the minutes (offset divided
+by the document's text length, 0 = opening, 1 = closing) and builds per-label and
+per-label × municipality profiles: fixed-bin histograms from a single np.histogram2d over
+(group, position) for the whole entity table, and Gaussian KDE curves computed by smoothing a
+fine binned histogram with reflecting boundaries at 0 and 1. positional_density_figure turns
+the profiles into a Plotly figure for figure_utils.save_figure.
+"""
+
+from typing import Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from scipy import ndimage
+
+ALL_MUNICIPALITIES = 'all'
+
+
+def relative_positions(entities_df: pd.DataFrame, documents_df: pd.DataFrame,
+                       anchor: str = 'begin') -> pd.Series:
+    """
+    Offset of each span divided by its document's text length, clipped to [0, 1].
+
+    Args:
+        entities_df: Entity table with filename and begin/end offsets
+        documents_df: Document table with filename and text_length
+        anchor: 'begin', 'end' or 'center' of the span
+
+    Returns:
+        pd.Series: Relative positions aligned with entities_df (NaN where the length is unknown)
+    """
+    if anchor == 'begin':
+        offsets = entities_df['begin'].astype(float)
+    elif anchor == 'end':
+        offsets = entities_df['end'].astype(float)
+    elif anchor == 'center':
+        offsets = (entities_df['begin'].astype(float) + entities_df['end'].astype(float)) / 2
+    else:
+        raise ValueError(f"Unknown anchor: {anchor} (expected 'begin', 'end' or 'center')")
+
+    lengths = documents_df.drop_duplicates('filename').set_index('filename')['text_length'].astype(float)
+    lengths = entities_df['filename'].map(lengths).astype(float).where(lambda length: length > 0)
+    return (offsets / lengths).clip(0, 1)
+
+
+def _binned_counts(positions: np.ndarray, group_codes: np.ndarray, n_groups: int, bins: int) -> np.ndarray:
+    """(n_groups, bins) histogram counts of positions in [0, 1] for every group at once."""
+    counts, _, _ = np.histogram2d(group_codes, positions, bins=[n_groups, bins],
+                                  range=[[-0.5, n_groups - 0.5], [0, 1]])
+    return counts
+
+
+def _silverman_bandwidths(positions: pd.Series, group_codes: np.ndarray) -> np.ndarray:
+    """Silverman's rule 0.9 * min(sd, IQR / 1.34) * n^(-1/5) for every group."""
+    grouped = positions.groupby(group_codes)
+    spread = np.minimum(grouped.std().to_numpy(),
+                        (grouped.quantile(0.75) - grouped.quantile(0.25)).to_numpy() / 1.34)
+    spread = np.where(spread > 0, spread, grouped.std().to_numpy())
+    bandwidths = 0.9 * spread * grouped.size().to_numpy() ** -0.2
+    # Single spans or identical positions: fall back to a narrow fixed kernel
+    return np.where(np.isfinite(bandwidths) & (bandwidths > 0), bandwidths, 0.02)
+
+
+def _kde_profiles(fine_counts: np.ndarray, bandwidths: np.ndarray) -> np.ndarray:
+    """Binned Gaussian KDE of every row, reflected at both ends so [0, 1] keeps all mass."""
+    grid_size = fine_counts.shape[1]
+    totals = fine_counts.sum(axis=1, keepdims=True)
+    smoothed = np.vstack([ndimage.gaussian_filter1d(row, sigma=bandwidth * grid_size, mode='reflect')
+                          for row, bandwidth in zip(fine_counts, bandwidths)])
+    return np.divide(smoothed * grid_size, totals, out=np.zeros_like(smoothed), where=totals > 0)
+
+
+def _group_profiles(positions: pd.Series, keys: pd.DataFrame, bins: int, grid_size: int,
+                    bandwidth: Optional[float], zones: Tuple[float, float]) -> Dict[Tuple, Dict[str, Any]]:
+    group_codes, levels = pd.MultiIndex.from_frame(keys).factorize()
+    values = positions.to_numpy()
+    n_groups = len(levels)
+
+    histograms = _binned_counts(values, group_codes, n_groups, bins)
+    fine_counts = _binned_counts(values, group_codes, n_groups, grid_size)
+    bandwidths = (np.full(n_groups, float(bandwidth)) if bandwidth is not None
+                  else _silverman_bandwidths(positions, group_codes))
+    kde = _kde_profiles(fine_counts, bandwidths)
+
+    zone_edges = [0.0, zones[0], zones[1], 1.0]
+    zone_counts = np.histogram2d(group_codes, values, bins=[np.arange(n_groups + 1) - 0.5, zone_edges])[0]
+    grouped = positions.groupby(group_codes)
+    means, medians = grouped.mean().to_numpy(), grouped.median().to_numpy()
+
+    profiles = {}
+    for code, key in enumerate(levels):
+        count = histograms[code].sum()
+        profiles[key] = {
+            'count': int(count),
+            'mean_position': float(means[code]),
+            'median_position': float(medians[code]),
+            'zone_shares': dict(zip(['opening', 'middle', 'closing'], (zone_counts[code] / count).tolist())),
+            'histogram': (histograms[code] * bins / count).tolist(),
+            'kde': kde[code].tolist(),
+            'bandwidth': float(bandwidths[code])
+        }
+    return profiles
+
+
+def positional_profiles(entities_df: pd.DataFrame, documents_df: pd.DataFrame, bins: int = 20,
+                        grid_size: int = 200, bandwidth: Optional[float] = None,
+                        zones: Tuple[float, float] = (0.1, 0.9), anchor: str = 'begin',
+                        group_by: str = 'entity_label') -> Dict[str, Any]:
+    """
+    Histogram and KDE profiles of relative span positions per label and label × municipality.
+
+    Args:
+        entities_df: Entity table from InceptionParser.create_entity_dataframe
+        documents_df: Document table with text_length
+        bins: Histogram bins over [0, 1]
+        grid_size: KDE evaluation points over [0, 1]
+        bandwidth: Fixed KDE bandwidth in relative-position units (default: Silverman per group)
+        zones: Upper bound of the opening zone and lower bound of the closing zone
+        anchor: Span offset to place ('begin', 'end' or 'center')
+        group_by: Entity column to profile (default entity_label)
+
+    Returns:
+        Dict: bin_edges, grid and profiles[label][municipality or 'all'] with count, mean/median
+        position, zone_shares, histogram (density), kde (density) and bandwidth
+    """
+    if not 0 < zones[0] < zones[1] < 1:
+        raise ValueError(f"zones must satisfy 0 < opening < closing < 1, got {zones}")
+
+    positions = relative_positions(entities_df, documents_df, anchor)
+    valid = positions.notna() & entities_df[group_by].notna()
+    if not valid.any():
+        return {'error': 'No entity positions available (missing document text lengths)'}
+
+    positions = positions[valid]
+    labels = entities_df.loc[valid, group_by].astype(str).reset_index(drop=True)
+    municipalities = entities_df.loc[valid, 'municipality'].astype(str).reset_index(drop=True)
+    positions = positions.reset_index(drop=True)
+
+    by_label = _group_profiles(positions, pd.DataFrame({'label': labels}), bins, grid_size, bandwidth, zones)
+    by_municipality = _group_profiles(positions, pd.DataFrame({'label': labels, 'municipality': municipalities}),
+                                      bins, grid_size, bandwidth, zones)
+
+    profiles = {}
+    for (label,), profile in sorted(by_label.items()):
+        profiles[label] = {ALL_MUNICIPALITIES: profile}
+    for (label, municipality), profile in sorted(by_municipality.items()):
+        profiles[label][municipality] = profile
+
+    return {
+        'anchor': anchor,
+        'group_by': group_by,
+        'entities_positioned': int(valid.sum()),
+        'entities_without_position': int((~valid).sum()),
+        'zones': {'opening': [0.0, zones[0]], 'middle': [zones[0], zones[1]], 'closing': [zones[1], 1.0]},
+        'bin_edges': np.linspace(0, 1, bins + 1).tolist(),
+        'grid': ((np.arange(grid_size) + 0.5) / grid_size).tolist(),
+        'profiles': profiles
+    }
+
+
+def positional_density_figure(density: Dict[str, Any], labels: Optional[Sequence[str]] = None,
+                              municipality: Optional[str] = ALL_MUNICIPALITIES, kind: str = 'kde',
+                              title: Optional[str] = None):
+    """
+    Plotly figure of positional profiles, ready for figure_utils.save_figure.
+
+    Args:
+        density: Result of positional_profiles
+        labels: Labels to draw (default: all)
+        municipality: Municipality to draw ('all' pools municipalities; None draws one trace per
+            municipality for each label)
+        kind: 'kde' (smooth curves) or 'histogram' (step curves over the bins)
+        title: Figure title
+    """
+    try:
+        import plotly.graph_objects as go
+    except ImportError:
+        raise ImportError('Positional density figures require plotly (pip install plotly)')
+
+    if kind not in ('kde', 'histogram'):
+        raise ValueError(f"Unknown profile kind: {kind} (expected 'kde' or 'histogram')")
+
+    profiles = density['profiles']
+    labels = list(profiles) if labels is None else list(labels)
+    if kind == 'kde':
+        x = density['grid']
+    else:
+        edges = np.asarray(density['bin_edges'])
+        x = ((edges[:-1] + edges[1:]) / 2).tolist()
+
+    fig = go.Figure()
+    for label in labels:
+        if municipality is None:
+            series = [(f"{label} – {name}", profile) for name, profile in profiles[label].items()
+                      if name != ALL_MUNICIPALITIES]
+        elif municipality in profiles[label]:
+            series = [(label, profiles[label][municipality])]
+        else:
+            series = []
+        for name, profile in series:
+            fig.add_trace(go.Scatter(x=x, y=profile[kind], mode='lines', name=f"{name} (n={profile['count']})",
+                                     line_shape='hvh' if kind == 'histogram' else 'linear'))
+
+    zones = density['zones']
+    fig.add_vrect(x0=zones['opening'][0], x1=zones['opening'][1], fillcolor='lightgrey', opacity=0.3,
+                  line_width=0, annotation_text='opening', annotation_position='top left')
+    fig.add_vrect(x0=zones['closing'][0], x1=zones['closing'][1], fillcolor='lightgrey', opacity=0.3,
+                  line_width=0, annotation_text='closing', annotation_position='top right')
+    fig.update_layout(
+        title_text=title or f"Entity positions along the minutes ({municipality or 'by municipality'})",
+        xaxis_title='Relative position in document (0 = opening, 1 = closing)',
+        yaxis_title='Density',
+        xaxis_range=[0, 1],
+        height=500
+    )
+    return fig
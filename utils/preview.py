@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+"""
+Preview Reports on a Stratified Document Sample
+
+This module produces a fast, approximate preview of the summary report for interactive
+exploration. Documents are stratified by municipality and year and visited in a stratified
+random order (two documents per stratum first, then proportionally interleaved), so every
+prefix of the order is a near-proportional stratified sample. Documents are consumed in
+growing batches until a row budget (entity + relation rows) or a time budget is spent.
+
+Every frequency and mean is reported as a Horvitz-Thompson estimate scaled back to the full
+corpus (each sampled document weighs N_h / n_h in its stratum) together with a bootstrap
+standard error and percentile interval. Replicates use the Rao-Wu rescaled bootstrap
+(n_h - 1 draws with replacement within each stratum, with the finite population correction,
+so a fully read stratum contributes no variance) and are evaluated for all statistics at once
+as a replicate-weight matrix product. Budgets never stop sampling before every stratum has
+two documents (or all of its documents), even when that minimum alone exceeds the row budget
+(reported as budget_exhausted='minimum_sample'); should a stratum still hold a single sampled document
+out of several, its variance cannot be estimated and the affected error bars are NaN.
+"""
+
+import logging
+import time
+from typing import Dict, List, Any, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from analysis_functions import normalize_frame_dtypes, normalize_document_dates, _resolve_rng
+
+logger = logging.getLogger(__name__)
+
+
+class PreviewAnalyzer:
+    """Approximate summary statistics from a budgeted stratified sample of documents."""
+
+    def __init__(self, entities_df: pd.DataFrame, relations_df: pd.DataFrame, documents_df: pd.DataFrame,
+                 row_budget: Optional[int] = None, time_budget: Optional[float] = None,
+                 n_bootstrap: int = 200, confidence_level: float = 0.95,
+                 rng: Optional[Union[int, np.random.Generator]] = 42):
+        """
+        Args:
+            entities_df: Entity table from InceptionParser.create_entity_dataframe
+            relations_df: Relation table from InceptionParser.create_relations_dataframe
+            documents_df: Document table (entity_count/relation_count size the row budget)
+            row_budget: Stop once the sampled documents hold this many entity + relation rows
+            time_budget: Stop sampling more documents after this many seconds
+            n_bootstrap: Bootstrap replicates for the error bars
+            confidence_level: Two-sided level of the percentile intervals
+            rng: np.random.Generator or integer seed for the sample and the bootstrap
+        """
+        normalized = normalize_frame_dtypes({'entities': entities_df, 'relations': relations_df,
+                                             'documents': documents_df})
+        self.entities_df = normalized['entities']
+        self.relations_df = normalized['relations']
+        self.documents_df = normalized['documents'].drop_duplicates('filename').reset_index(drop=True)
+        self.row_budget = row_budget
+        self.time_budget = time_budget
+        self.n_bootstrap = n_bootstrap
+        self.confidence_level = confidence_level
+        self.rng = _resolve_rng(rng)
+
+        docs = self.documents_df
+        dates = normalize_document_dates(docs['date'], docs['municipality']) if 'date' in docs.columns else \
+            pd.Series(pd.NaT, index=docs.index)
+        self.strata = pd.DataFrame({
+            'municipality': docs['municipality'].astype(str).to_numpy(),
+            'year': dates.dt.year.astype('Int64').astype(str).to_numpy()
+        })
+        self.stratum_codes = self.strata.groupby(['municipality', 'year'], sort=True).ngroup().to_numpy()
+        self.document_rows = (docs['entity_count'].fillna(0).to_numpy(dtype=np.int64) +
+                              docs['relation_count'].fillna(0).to_numpy(dtype=np.int64))
+
+    def sampling_order(self) -> np.ndarray:
+        """
+        Document positions in stratified random order.
+
+        The first two documents of every stratum come first (the Rao-Wu bootstrap needs two per
+        stratum); the rest are ordered by (rank + U) / N_h, which interleaves strata in
+        proportion to their sizes.
+        """
+        n = len(self.documents_df)
+        shuffled = self.rng.permutation(n)
+        codes = self.stratum_codes[shuffled]
+        ranks = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+        sizes = np.bincount(codes)[codes]
+        priority = (ranks + self.rng.random(n)) / sizes
+        priority[ranks < 2] -= 1
+        return shuffled[np.argsort(priority, kind='stable')]
+
+    def _document_features(self, positions: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-document totals (counts and length sums) for the documents at these positions."""
+        filenames = self.documents_df['filename'].to_numpy()[positions]
+        index = pd.Index(filenames)
+        features = {
+            'documents': np.ones(len(positions)),
+            'text_length': self.documents_df['text_length'].to_numpy(dtype=float)[positions],
+            'token_count': self.documents_df['token_count'].to_numpy(dtype=float)[positions]
+        }
+
+        def add_counts(frame: pd.DataFrame, prefix: str, column: str, sums: Tuple[str, ...] = ()):
+            rows = frame[frame['filename'].isin(index)]
+            doc = index.get_indexer(rows['filename'])
+            if column not in frame.columns:
+                return rows, doc
+            levels = frame[column].cat.categories if isinstance(frame[column].dtype, pd.CategoricalDtype) \
+                else pd.Index(frame[column].dropna().unique())
+            codes = pd.Categorical(rows[column], categories=levels).codes
+            valid = codes >= 0
+            keys = doc[valid].astype(np.int64) * len(levels) + codes[valid]
+            size = len(positions) * len(levels)
+            counts = np.bincount(keys, minlength=size).reshape(len(positions), len(levels))
+            for level_index, level in enumerate(levels):
+                features[f'{prefix}:{level}'] = counts[:, level_index].astype(float)
+            for sum_column in sums:
+                weights = rows[sum_column].to_numpy(dtype=float)[valid]
+                totals = np.bincount(keys, weights=weights, minlength=size).reshape(len(positions), len(levels))
+                for level_index, level in enumerate(levels):
+                    features[f'{prefix}_{sum_column}:{level}'] = totals[:, level_index]
+            return rows, doc
+
+        _, entity_doc = add_counts(self.entities_df, 'entity_label', 'entity_label', ('length', 'token_count'))
+        features['entities'] = np.bincount(entity_doc, minlength=len(positions)).astype(float)
+        _, relation_doc = add_counts(self.relations_df, 'relation_label', 'relation_label')
+        features['relations'] = np.bincount(relation_doc, minlength=len(positions)).astype(float)
+        add_counts(self.relations_df, 'posicionamento', 'posicionamento')
+        add_counts(self.relations_df, 'resultado', 'resultado')
+        return features
+
+    def draw_sample(self) -> Tuple[np.ndarray, pd.DataFrame, Optional[str]]:
+        """
+        Consume the sampling order in doubling batches until a budget is spent.
+
+        Returns:
+            Tuple: (sampled document positions, per-document feature frame, exhausted budget
+            ('rows', 'time', 'minimum_sample' when the stratified minimum alone went over the
+            row budget, or None when the whole corpus was read))
+        """
+        order = self.sampling_order()
+        cumulative_rows = np.cumsum(self.document_rows[order])
+        # Documents needed for two per stratum (or the whole stratum when it is smaller)
+        minimum = int(np.minimum(np.bincount(self.stratum_codes), 2).sum()) if len(order) else 0
+        over_budget = self.row_budget is not None and minimum > 0 and cumulative_rows[minimum - 1] > self.row_budget
+        if over_budget:
+            logger.warning(f"The stratified minimum of {minimum} documents holds {int(cumulative_rows[minimum - 1])} "
+                           f"rows, over the row budget of {self.row_budget}; sampling it anyway")
+
+        start = time.perf_counter()
+        taken, batch, exhausted = 0, max(minimum, 1), None
+        frames = []
+        while taken < len(order):
+            if self.time_budget is not None and frames and time.perf_counter() - start >= self.time_budget:
+                exhausted = 'time'
+                break
+            end = min(taken + batch, len(order))
+            if self.row_budget is not None:
+                # Always take two documents per stratum, then respect the row budget
+                within_budget = int(np.searchsorted(cumulative_rows, self.row_budget, side='right'))
+                end = min(end, max(within_budget, minimum))
+                if end <= taken:
+                    exhausted = 'rows'
+                    break
+            frames.append(pd.DataFrame(self._document_features(order[taken:end])))
+            taken, batch = end, batch * 2
+
+        if exhausted is None and taken < len(order):
+            exhausted = 'rows'
+        if over_budget and exhausted != 'time':
+            exhausted = 'minimum_sample'
+        features = pd.concat(frames, ignore_index=True).fillna(0) if frames else pd.DataFrame()
+        return order[:taken], features, exhausted
+
+    def _replicate_weights(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Design weights N_h / n_h, (n_bootstrap, n) Rao-Wu rescaled bootstrap weights and a mask of
+        documents in strata whose variance cannot be estimated (one sampled document out of several).
+        """
+        codes = self.stratum_codes[positions]
+        population = np.bincount(self.stratum_codes, minlength=codes.max() + 1)
+        sampled = np.bincount(codes, minlength=len(population))
+        weights = population[codes] / sampled[codes]
+
+        adjustment = np.ones((self.n_bootstrap, len(positions)))
+        replicate_rows = np.arange(self.n_bootstrap)[:, None]
+        unestimable = (sampled[codes] < 2) & (population[codes] > sampled[codes])
+        for stratum in np.unique(codes):
+            members = np.flatnonzero(codes == stratum)
+            n = len(members)
+            if n < 2:
+                # Census of a one-document stratum (no variance) or flagged in unestimable
+                continue
+            # n - 1 draws with replacement, rescaled so the variance carries the finite population correction
+            multiplicity = np.zeros((self.n_bootstrap, len(positions)))
+            draws = self.rng.integers(0, n, size=(self.n_bootstrap, n - 1))
+            np.add.at(multiplicity, (replicate_rows, members[draws]), 1)
+            scale = np.sqrt(1 - n / population[stratum])
+            adjustment[:, members] = 1 - scale + scale * n / (n - 1) * multiplicity[:, members]
+        return weights, adjustment * weights, unestimable
+
+    def _interval(self, estimate: float, replicates: np.ndarray, estimable: bool = True) -> Dict[str, float]:
+        alpha = 1 - self.confidence_level
+        replicates = replicates[np.isfinite(replicates)]
+        if not estimable:
+            return {'estimate': round(float(estimate), 4), 'se': np.nan, 'ci_lower': np.nan, 'ci_upper': np.nan}
+        if len(replicates) == 0:
+            return {'estimate': estimate, 'se': np.nan, 'ci_lower': np.nan, 'ci_upper': np.nan}
+        lower, upper = np.quantile(replicates, [alpha / 2, 1 - alpha / 2])
+        se = replicates.std(ddof=1) if len(replicates) > 1 else 0.0
+        return {'estimate': round(float(estimate), 4), 'se': round(float(se), 4),
+                'ci_lower': round(float(lower), 4), 'ci_upper': round(float(upper), 4)}
+
+    def _estimates(self, features: pd.DataFrame, weights: np.ndarray, replicate_weights: np.ndarray,
+                   unestimable: np.ndarray, mask: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Scaled totals, shares and means (with error bars) over all documents or a domain mask."""
+        values = features.to_numpy()
+        if mask is not None:
+            values = values * mask[:, None]
+        totals = pd.Series(weights @ values, index=features.columns)
+        replicate_totals = pd.DataFrame(replicate_weights @ values, columns=features.columns)
+        # Statistics fed by a stratum without variance estimate get NaN error bars rather than 0
+        estimable = pd.Series(~(values[unestimable] != 0).any(axis=0), index=features.columns)
+
+        def total(column):
+            return self._interval(totals[column], replicate_totals[column].to_numpy(), estimable[column])
+
+        def ratio(numerator, denominator, scale=1.0):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                estimate = totals[numerator] / totals[denominator] * scale if totals[denominator] else np.nan
+                replicates = replicate_totals[numerator].to_numpy() / replicate_totals[denominator].to_numpy() * scale
+            return self._interval(estimate, replicates, estimable[numerator] and estimable[denominator])
+
+        def levels(prefix):
+            # Levels observed in the sampled documents (categories are shared across tables)
+            return [column.split(':', 1)[1] for column in features.columns
+                    if column.startswith(f'{prefix}:') and totals[column] > 0]
+
+        estimates = {
+            'totals': {name: total(name) for name in ('documents', 'entities', 'relations')},
+            'means_per_document': {
+                'entities': ratio('entities', 'documents'),
+                'relations': ratio('relations', 'documents'),
+                'text_length': ratio('text_length', 'documents'),
+                'token_count': ratio('token_count', 'documents')
+            },
+            'entity_label_counts': {label: total(f'entity_label:{label}') for label in levels('entity_label')},
+            'entity_label_shares': {label: ratio(f'entity_label:{label}', 'entities') for label in levels('entity_label')},
+            'entity_length_by_label': {
+                label: {'mean_length_chars': ratio(f'entity_label_length:{label}', f'entity_label:{label}'),
+                        'mean_length_tokens': ratio(f'entity_label_token_count:{label}', f'entity_label:{label}')}
+                for label in levels('entity_label')
+            },
+            'relation_label_counts': {label: total(f'relation_label:{label}') for label in levels('relation_label')},
+            'posicionamento_counts': {value: total(f'posicionamento:{value}') for value in levels('posicionamento')},
+            'resultado_counts': {value: total(f'resultado:{value}') for value in levels('resultado')}
+        }
+        return estimates
+
+    def generate_preview_report(self) -> Dict[str, Any]:
+        """
+        Preview report: scaled estimates with bootstrap error bars for the corpus and per municipality.
+
+        Every statistic is a dict with estimate, se, ci_lower and ci_upper.
+        """
+        if self.documents_df.empty:
+            return {'error': 'No document data available'}
+
+        start = time.perf_counter()
+        positions, features, exhausted = self.draw_sample()
+        weights, replicate_weights, unestimable = self._replicate_weights(positions)
+
+        municipalities = self.strata['municipality'].to_numpy()[positions]
+        population_strata = pd.Series(self.stratum_codes).nunique()
+        report = {
+            'metadata': {
+                'analysis_date': pd.Timestamp.now().isoformat(),
+                'total_files_analyzed': len(self.documents_df),
+                'preview': True,
+                'sampled_documents': len(positions),
+                'population_documents': len(self.documents_df),
+                'sampled_rows': int(self.document_rows[positions].sum()),
+                'population_rows': int(self.document_rows.sum()),
+                'strata': int(population_strata),
+                'sampled_strata': int(pd.Series(self.stratum_codes[positions]).nunique()),
+                'strata_without_variance': int(pd.Series(self.stratum_codes[positions][unestimable]).nunique()),
+                'row_budget': self.row_budget,
+                'time_budget': self.time_budget,
+                'budget_exhausted': exhausted,
+                'n_bootstrap': self.n_bootstrap,
+                'confidence_level': self.confidence_level
+            },
+            'corpus_estimates': self._estimates(features, weights, replicate_weights, unestimable),
+            'municipality_estimates': {
+                municipality: self._estimates(features, weights, replicate_weights, unestimable,
+                                              (municipalities == municipality).astype(float))
+                for municipality in sorted(set(municipalities))
+            }
+        }
+        report['metadata']['elapsed_seconds'] = round(time.perf_counter() - start, 4)
+        return report
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+Tidy Table Output for Analysis Reports
+
+This module converts the nested summary report of AnnotationAnalyzer into typed long-format
+tables, one per report section, and writes them as a single Parquet or Arrow file (one row
+group per section) or as a directory of per-section Parquet files, next to a small JSON
+index. Readers load only the sections they need with load_report_table.
+
+It also provides to_json_compatible, which turns NumPy/pandas scalars, tuple keys and
+timestamps into plain Python values so the nested report can be written with json.dump.
+"""
+
+import json
+import math
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union
+import numpy as np
+import pandas as pd
+
+INDEX_VERSION = 1
+
+
+def _plain_key(key: Any) -> Union[str, int, float, bool, None]:
+    if isinstance(key, tuple):
+        return '_'.join(str(_plain_key(part)) for part in key)
+    if isinstance(key, (np.integer, np.floating, np.bool_)):
+        return key.item()
+    if isinstance(key, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(key).isoformat()
+    if key is None or isinstance(key, (str, int, float, bool)):
+        return key
+    return str(key)
+
+
+def to_json_compatible(value: Any) -> Any:
+    """Recursively convert a report into values json.dump accepts (tuple keys become 'a_b')."""
+    if isinstance(value, Mapping):
+        return {_plain_key(key): to_json_compatible(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, np.ndarray, pd.Index, pd.Series)):
+        return [to_json_compatible(item) for item in value]
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+
+def _value_type(value: Any) -> str:
+    if value is None or value is pd.NA or (isinstance(value, float) and math.isnan(value)):
+        return 'null'
+    if isinstance(value, (bool, np.bool_)):
+        return 'bool'
+    if isinstance(value, (int, np.integer)):
+        return 'int'
+    if isinstance(value, (float, np.floating)):
+        return 'float'
+    return 'str'
+
+
+def _flatten(value: Any, path: tuple, rows: List[tuple]):
+    if isinstance(value, Mapping):
+        for key, item in value.items():
+            _flatten(item, path + (_plain_key(key),), rows)
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        for position, item in enumerate(value):
+            _flatten(item, path + (position,), rows)
+    else:
+        rows.append((path, to_json_compatible(value)))
+
+
+def section_to_table(section: Any) -> pd.DataFrame:
+    """
+    Flatten one report section into a long table.
+
+    Columns key_1..key_n hold the nested dictionary keys (as strings, null-padded to the
+    deepest path), value_type is one of int/float/bool/str/null, number holds numeric and
+    boolean values and text holds string values.
+    """
+    rows = []
+    _flatten(section, (), rows)
+    depth = max((len(path) for path, _ in rows), default=0)
+
+    table = {f'key_{level + 1}': pd.array([None if len(path) <= level or path[level] is None else str(path[level])
+                                           for path, _ in rows], dtype='string')
+             for level in range(depth)}
+    value_types = [_value_type(value) for _, value in rows]
+    table['value_type'] = pd.Categorical(value_types, categories=['int', 'float', 'bool', 'str', 'null'])
+    table['number'] = np.array([float(value) if kind in ('int', 'float', 'bool') else np.nan
+                                for (_, value), kind in zip(rows, value_types)], dtype=np.float64)
+    table['text'] = pd.array([str(value) if kind == 'str' else None
+                              for (_, value), kind in zip(rows, value_types)], dtype='string')
+    return pd.DataFrame(table)
+
+
+def report_to_tables(report: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+    """One long table per top-level report section."""
+    return {section: section_to_table(content) for section, content in report.items()}
+
+
+def write_report_tables(report: Dict[str, Any], output_path: str) -> Path:
+    """
+    Write the report as tidy tables plus a JSON index.
+
+    Args:
+        report: Summary report from AnnotationAnalyzer.generate_summary_report
+        output_path: A .parquet or .arrow/.feather file (all sections in one file, one row group
+            per section, with a section column) or a directory (one Parquet file per section)
+
+    Returns:
+        Path: The JSON index (<file>.index.json, or index.json inside the directory)
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        import pyarrow.feather as feather
+    except ImportError:
+        raise ImportError('Writing report tables requires pyarrow (pip install pyarrow)')
+
+    output_path = Path(output_path)
+    tables = report_to_tables(report)
+    index = {
+        'version': INDEX_VERSION,
+        'metadata': to_json_compatible(report.get('metadata', {})),
+        'sections': {}
+    }
+
+    if output_path.suffix in ('.parquet', '.arrow', '.feather'):
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        depth = max((sum(column.startswith('key_') for column in table.columns) for table in tables.values()), default=0)
+        key_columns = [f'key_{level + 1}' for level in range(depth)]
+        combined = []
+        for section, table in tables.items():
+            combined.append(table.reindex(columns=key_columns + ['value_type', 'number', 'text'])
+                            .astype({column: 'string' for column in key_columns})
+                            .assign(section=section))
+        combined = pd.concat(combined, ignore_index=True)
+        combined['section'] = combined['section'].astype('category')
+        arrow_table = pa.Table.from_pandas(combined, preserve_index=False)
+
+        offset = 0
+        for row_group, (section, table) in enumerate(tables.items()):
+            index['sections'][section] = {'file': output_path.name, 'row_group': row_group,
+                                          'offset': offset, 'rows': len(table)}
+            offset += len(table)
+
+        if output_path.suffix == '.parquet':
+            with pq.ParquetWriter(output_path, arrow_table.schema) as writer:
+                for section, entry in index['sections'].items():
+                    writer.write_table(arrow_table.slice(entry['offset'], entry['rows']))
+        else:
+            feather.write_feather(arrow_table, output_path)
+        index_path = output_path.with_name(output_path.name + '.index.json')
+    else:
+        output_path.mkdir(parents=True, exist_ok=True)
+        for section, table in tables.items():
+            table.to_parquet(output_path / f'{section}.parquet', index=False)
+            index['sections'][section] = {'file': f'{section}.parquet', 'rows': len(table)}
+        index_path = output_path / 'index.json'
+
+    for section, table in tables.items():
+        index['sections'][section]['columns'] = table.columns.tolist()
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return index_path
+
+
+def load_report_table(index_path: str, section: str) -> pd.DataFrame:
+    """
+    Load one section table without reading the others.
+
+    Args:
+        index_path: JSON index written by write_report_tables
+        section: Report section name (e.g. 'entity_analysis')
+    """
+    index_path = Path(index_path)
+    with open(index_path, encoding='utf-8') as f:
+        index = json.load(f)
+    if section not in index['sections']:
+        raise KeyError(f"Section '{section}' not in report index (available: {sorted(index['sections'])})")
+
+    entry = index['sections'][section]
+    path = index_path.parent / entry['file']
+    if 'row_group' not in entry:
+        return pd.read_parquet(path)
+
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    if path.suffix == '.parquet':
+        table = pq.ParquetFile(path).read_row_group(entry['row_group'])
+    else:
+        # Arrow IPC files are memory-mapped, so slicing reads only this section's rows
+        table = feather.read_table(path, memory_map=True).slice(entry['offset'], entry['rows'])
+    return table.to_pandas()[entry['columns']]
+
+
+def report_table_sections(index_path: str) -> List[str]:
+    """Section names listed in a report index."""
+    with open(index_path, encoding='utf-8') as f:
+        return list(json.load(f)['sections'])
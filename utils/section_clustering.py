@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+"""
+Tema Clustering of Fronteira Sections
+
+This module clusters the assunto sections delimited by Fronteira Inicial/Final markers by
+their text and compares the clusters with the annotated Tema values. Section texts are
+streamed from the parser one document at a time, vectorised with a hashing vectorizer (fixed
+feature space, no vocabulary pass, log-scaled term counts with L2 normalisation) and clustered
+with mini-batch k-means through partial_fit, so the model can be trained incrementally as new
+meetings are parsed. A second streaming pass assigns every section to its cluster and keeps
+only compact per-section records plus, for each cluster, the words behind its strongest
+centroid features.
+
+scikit-learn is an optional dependency and is imported when a clusterer is created.
+"""
+
+from collections import Counter, defaultdict
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Callable, Sequence
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from text_statistics import tokenize, PORTUGUESE_STOPWORDS
+from collocations import incidence_matrix, association_table
+
+
+def iter_section_records(documents: Iterable) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one record per assunto section (filename, municipality, date, section_id, temas, text).
+
+    Documents are consumed lazily, so with InceptionParser.iter_documents only the sections of
+    the current document are held in memory.
+    """
+    for doc in documents:
+        for section in doc.assunto_sections:
+            yield {
+                'filename': doc.filename,
+                'municipality': doc.municipality,
+                'date': doc.metadata.get('normalized_date') or doc.date,
+                'section_id': section.id,
+                'temas': list(dict.fromkeys(entity.tema for entity in section.keyword_entities if entity.tema)),
+                'text': section.text
+            }
+
+
+def sections_from_directory(directory_path: str) -> Callable[[], Iterator[Dict[str, Any]]]:
+    """Factory of fresh section-record streams over a directory of INCEpTION JSON files."""
+    from inception_parser import InceptionParser
+
+    def stream():
+        return iter_section_records(InceptionParser().iter_documents(Path(directory_path)))
+    return stream
+
+
+def _batches(records: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _pretokenized(tokens: List[str]) -> List[str]:
+    return tokens
+
+
+class SectionTemaClusterer:
+    """
+    Incremental hashing-vectorizer + mini-batch k-means clustering of section texts.
+
+    partial_fit can be called on any number of batches (e.g. as new meetings arrive); assign
+    labels a stream of sections with the current model.
+    """
+
+    def __init__(self, n_clusters: int = 20, n_features: int = 2 ** 18, batch_size: int = 256,
+                 min_token_length: int = 3, random_state: int = 42, top_terms: int = 10):
+        """
+        Args:
+            n_clusters: Number of k-means clusters
+            n_features: Hashed feature space size (memory is bounded by n_clusters * n_features)
+            batch_size: Sections per mini-batch
+            min_token_length: Minimum token length in characters
+            random_state: Seed for k-means initialisation and batch sampling
+            top_terms: Strongest centroid features to label each cluster with
+        """
+        try:
+            from sklearn.cluster import MiniBatchKMeans
+            from sklearn.feature_extraction.text import HashingVectorizer
+            from sklearn.utils import murmurhash3_32
+        except ImportError:
+            raise ImportError('Section clustering requires scikit-learn (pip install scikit-learn)')
+
+        if batch_size < n_clusters:
+            raise ValueError(f"batch_size ({batch_size}) must be at least n_clusters ({n_clusters})")
+        self.n_clusters = n_clusters
+        self.n_features = n_features
+        self.batch_size = batch_size
+        self.min_token_length = min_token_length
+        self.top_terms = top_terms
+        self.vectorizer = HashingVectorizer(n_features=n_features, analyzer=_pretokenized,
+                                            alternate_sign=False, norm=None)
+        self.model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size,
+                                     random_state=random_state, n_init=3)
+        self.sections_seen = 0
+        self._pending = []
+        self._murmurhash = murmurhash3_32
+
+    def _tokens(self, text: str) -> List[str]:
+        return tokenize(text or '', stopwords=PORTUGUESE_STOPWORDS, min_token_length=self.min_token_length)
+
+    def _vectorize(self, token_lists: List[List[str]]) -> sparse.csr_matrix:
+        """Log-scaled hashed term counts with unit L2 norm per section."""
+        from sklearn.preprocessing import normalize
+
+        matrix = self.vectorizer.transform(token_lists).tocsr()
+        matrix.data = np.log1p(matrix.data)
+        return normalize(matrix)
+
+    def partial_fit(self, records: Iterable[Dict[str, Any]]) -> 'SectionTemaClusterer':
+        """Update the model with a stream of section records; short final batches are kept for later."""
+        for batch in _batches(records, self.batch_size):
+            self._pending.extend(self._tokens(record['text']) for record in batch)
+            if len(self._pending) >= self.batch_size:
+                self._fit_pending()
+        return self
+
+    def _fit_pending(self):
+        self.model.partial_fit(self._vectorize(self._pending))
+        self.sections_seen += len(self._pending)
+        self._pending = []
+
+    def flush(self) -> 'SectionTemaClusterer':
+        """Fit buffered sections (at least n_clusters are needed before the first update)."""
+        if self._pending and (self.sections_seen or len(self._pending) >= self.n_clusters):
+            self._fit_pending()
+        return self
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.sections_seen > 0
+
+    def assign(self, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Assign a stream of sections to clusters.
+
+        Returns:
+            Dict: 'sections' (DataFrame of filename, municipality, date, section_id, temas,
+            token_count, cluster, distance) and 'cluster_terms' {cluster: [words]}
+        """
+        if not self.is_fitted:
+            raise ValueError('The clusterer has not been fitted yet (call partial_fit and flush first)')
+
+        centroids = self.model.cluster_centers_
+        top_features = np.argsort(-centroids, axis=1)[:, :self.top_terms]
+        top_feature_sets = [set(features.tolist()) for features in top_features]
+        term_counts = [defaultdict(Counter) for _ in range(self.n_clusters)]
+
+        rows = []
+        for batch in _batches(records, self.batch_size):
+            token_lists = [self._tokens(record['text']) for record in batch]
+            vectors = self._vectorize(token_lists)
+            clusters = self.model.predict(vectors)
+            distances = self.model.transform(vectors)[np.arange(len(batch)), clusters]
+
+            for record, tokens, cluster, distance in zip(batch, token_lists, clusters, distances):
+                rows.append({
+                    'filename': record['filename'],
+                    'municipality': record['municipality'],
+                    'date': record['date'],
+                    'section_id': record['section_id'],
+                    'temas': ' | '.join(record['temas']) if record['temas'] else None,
+                    'token_count': len(tokens),
+                    'cluster': int(cluster),
+                    'distance': float(distance)
+                })
+                # Recover the words behind the cluster's strongest hashed features
+                for token in set(tokens):
+                    feature = self._feature_index(token)
+                    if feature in top_feature_sets[cluster]:
+                        term_counts[cluster][feature][token] += 1
+
+        cluster_terms = {}
+        for cluster in range(self.n_clusters):
+            words = []
+            for feature in top_features[cluster]:
+                candidates = term_counts[cluster].get(int(feature))
+                if candidates:
+                    words.append(candidates.most_common(1)[0][0])
+            cluster_terms[cluster] = words
+
+        columns = ['filename', 'municipality', 'date', 'section_id', 'temas', 'token_count', 'cluster', 'distance']
+        return {'sections': pd.DataFrame(rows, columns=columns), 'cluster_terms': cluster_terms}
+
+    def _feature_index(self, token: str) -> int:
+        """Hashed feature of a token, as computed by HashingVectorizer."""
+        return abs(self._murmurhash(token, seed=0)) % self.n_features
+
+
+def _pairs_sharing_value(value_sets: List[List[str]], strata: Optional[Sequence] = None) -> int:
+    """
+    Pairs of units whose value sets intersect (within the same stratum when given).
+
+    Counted from contingency counts by inclusion-exclusion: the sum over value subsets S of
+    (-1)^(|S|+1) * C(n_S, 2), where n_S is the number of units holding every value of S. A
+    section carries one or two Temas, so the subsets stay few and no unit × unit matrix is built.
+    """
+    counts = Counter()
+    for index, values in enumerate(value_sets):
+        stratum = None if strata is None else strata[index]
+        values = sorted(set(values))
+        for size in range(1, len(values) + 1):
+            for subset in combinations(values, size):
+                counts[stratum, subset] += 1
+    return int(sum((-1) ** (len(subset) + 1) * (n * (n - 1) // 2) for (_, subset), n in counts.items()))
+
+
+def compare_with_tema(sections: pd.DataFrame, min_count: int = 2, top_k: int = 10) -> Dict[str, Any]:
+    """
+    Compare section clusters with the annotated Tema values.
+
+    Tema labels are nearly unique free text, so clusters are compared on pairs of sections:
+    pairs with an identical Tema (or a shared Tema word) that fall in the same cluster, and
+    same-cluster pairs that share a Tema word. Tema words most associated with each cluster
+    (log-likelihood ratio) describe what the cluster captured.
+
+    Identical-Tema and same-cluster pair counts come from the cluster × Tema contingency counts;
+    shared-word pairs are counted one cluster's sections at a time, so memory grows with the
+    largest cluster rather than with the square of the number of sections.
+
+    Args:
+        sections: 'sections' table from SectionTemaClusterer.assign
+        min_count: Minimum sections for a Tema word-cluster association
+        top_k: Tema words reported per cluster
+    """
+    annotated = sections[sections['temas'].notna()].reset_index(drop=True)
+    if annotated.empty:
+        return {'error': 'No sections with Tema annotations'}
+
+    units = pd.Series(np.arange(len(annotated)))
+    unit_levels = pd.Index(units)
+    temas = annotated['temas'].str.split(' | ', regex=False)
+    tema_units = np.repeat(units.to_numpy(), temas.str.len())
+    tema_values = [tema.strip().lower() for values in temas for tema in values]
+    tema_words = [tokenize(tema, stopwords=PORTUGUESE_STOPWORDS, min_token_length=3) for tema in tema_values]
+
+    word_matrix, _, word_levels = incidence_matrix(np.repeat(tema_units, [len(words) for words in tema_words]),
+                                                   [word for words in tema_words for word in words], unit_levels)
+    cluster_matrix, _, cluster_levels = incidence_matrix(units, annotated['cluster'], unit_levels)
+
+    section_temas = pd.Series(tema_values).groupby(tema_units).agg(list).reindex(units, fill_value=[]).tolist()
+    clusters = annotated['cluster'].to_numpy()
+    cluster_sizes = annotated['cluster'].value_counts().to_numpy()
+    same_cluster = int((cluster_sizes * (cluster_sizes - 1) // 2).sum())
+    same_tema = _pairs_sharing_value(section_temas)
+    same_tema_together = _pairs_sharing_value(section_temas, clusters)
+
+    # Ordered pairs from each cluster's rows against all sections (and against the cluster
+    # itself), minus each section paired with itself
+    with_words = np.diff(word_matrix.indptr) > 0
+    shared_word, together = 0, 0
+    for members in annotated.groupby('cluster').indices.values():
+        products = (word_matrix[members] @ word_matrix.T).tocsc()
+        self_pairs = int(with_words[members].sum())
+        shared_word += int(products.count_nonzero()) - self_pairs
+        together += int(products[:, members].count_nonzero()) - self_pairs
+    shared_word, together = shared_word // 2, together // 2
+
+    def share(part: int, whole: int) -> Optional[float]:
+        return part / whole if whole else None
+
+    n_pairs = len(annotated) * (len(annotated) - 1) // 2
+    return {
+        'annotated_sections': len(annotated),
+        'identical_tema_pairs': same_tema,
+        'identical_tema_pairs_same_cluster': share(same_tema_together, same_tema),
+        'shared_word_pairs_same_cluster': share(together, shared_word),
+        'same_cluster_pairs_sharing_tema_word': share(together, same_cluster),
+        'baseline_pairs_sharing_tema_word': share(shared_word, n_pairs),
+        'cluster_tema_words': association_table(word_matrix, cluster_matrix, word_levels, cluster_levels,
+                                                min_count=min_count, top_k=top_k)['top_by_column']
+    }
+
+
+def cluster_sections(section_stream: Callable[[], Iterable[Dict[str, Any]]], n_clusters: int = 20,
+                     epochs: int = 1, **options) -> Dict[str, Any]:
+    """
+    Fit section clusters on a stream of sections, assign them and compare with Tema.
+
+    Args:
+        section_stream: Callable returning a fresh iterable of section records (the stream is
+            read epochs + 1 times), e.g. sections_from_directory(data_dir)
+        n_clusters: Number of clusters
+        epochs: Training passes over the stream
+        **options: Further SectionTemaClusterer options
+
+    Returns:
+        Dict: 'summary', 'clusters' (size, municipalities, top terms, top Temas),
+        'tema_comparison' and 'sections' (DataFrame of assignments)
+    """
+    clusterer = SectionTemaClusterer(n_clusters=n_clusters, **options)
+    for _ in range(epochs):
+        clusterer.partial_fit(section_stream())
+    clusterer.flush()
+    if not clusterer.is_fitted:
+        return {'error': f'Fewer sections than clusters ({n_clusters})'}
+
+    assignment = clusterer.assign(section_stream())
+    sections = assignment['sections']
+
+    clusters = {}
+    for cluster, members in sections.groupby('cluster', sort=True):
+        temas = members['temas'].dropna().str.split(' | ', regex=False).explode()
+        clusters[int(cluster)] = {
+            'sections': len(members),
+            'mean_distance': float(members['distance'].mean()),
+            'municipalities': members['municipality'].value_counts().to_dict(),
+            'top_terms': assignment['cluster_terms'][cluster],
+            'top_temas': temas.value_counts().head(5).to_dict()
+        }
+
+    return {
+        'summary': {
+            'sections': len(sections),
+            'sections_trained': clusterer.sections_seen,
+            'n_clusters': n_clusters,
+            'n_features': clusterer.n_features,
+            'inertia_per_section': float((sections['distance'] ** 2).mean()),
+            'empty_clusters': n_clusters - len(clusters)
+        },
+        'clusters': clusters,
+        'tema_comparison': compare_with_tema(sections),
+        'sections': sections
+    }
+
+
+def main():
+    """Command-line interface for section clustering."""
+    import argparse
+    import json
+    from report_tables import to_json_compatible
+
+    parser = argparse.ArgumentParser(description='Cluster Fronteira sections and compare with Tema annotations')
+    parser.add_argument('--data_dir', type=str,
+                       default='../data/shared/inception',
+                       help='Path to directory containing INCEpTION JSON files')
+    parser.add_argument('--output_dir', type=str,
+                       default='../results/statistics',
+                       help='Output directory for section_clusters.json and section_clusters.csv')
+    parser.add_argument('--n_clusters', type=int, default=20, help='Number of clusters')
+    parser.add_argument('--n_features', type=int, default=2 ** 18, help='Hashed feature space size')
+    parser.add_argument('--batch_size', type=int, default=256, help='Sections per mini-batch')
+    parser.add_argument('--epochs', type=int, default=1, help='Training passes over the sections')
+
+    args = parser.parse_args()
+
+    result = cluster_sections(sections_from_directory(args.data_dir), n_clusters=args.n_clusters,
+                              epochs=args.epochs, n_features=args.n_features, batch_size=args.batch_size)
+    if 'error' in result:
+        print(result['error'])
+        return
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sections = result.pop('sections')
+    sections.to_csv(output_dir / 'section_clusters.csv', index=False)
+    with open(output_dir / 'section_clusters.json', 'w', encoding='utf-8') as f:
+        json.dump(to_json_compatible(result), f, indent=2, ensure_ascii=False)
+
+    print(f"\n=== SECTION CLUSTERS ===")
+    for cluster, info in result['clusters'].items():
+        print(f"{cluster:>3}: {info['sections']:>4} sections | {', '.join(info['top_terms'][:6])}")
+    comparison = result['tema_comparison']
+    if 'error' not in comparison:
+        print(f"\nIdentical-Tema pairs in the same cluster: {comparison['identical_tema_pairs_same_cluster']:.3f}")
+        print(f"Same-cluster pairs sharing a Tema word: {comparison['same_cluster_pairs_sharing_tema_word']:.3f} "
+              f"(baseline {comparison['baseline_pairs_sharing_tema_word']:.3f})")
+    print(f"\nResults saved to: {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
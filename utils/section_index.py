@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+"""
+Similar-Section Retrieval Index
+
+This module answers "which other meetings discussed this same subject?" with a persistent
+nearest-neighbour index over Fronteira sections (streamed from the INCEpTION files) and
+publication dataset segments (text_pt). Texts are turned into sublinear TF-IDF vectors over
+hashed token IDs (no vocabulary is stored), projected to a small dense space with a truncated
+SVD (LSA) and organised in an inverted-file structure: k-means cells over the dense vectors,
+of which a query probes only the closest few. Candidates from the probed cells are re-ranked
+by exact cosine similarity on the sparse TF-IDF vectors.
+
+The index is built and persisted with `python section_index.py build` and queried with
+`python section_index.py query` or SectionIndex.load(...).query(text or id, k).
+"""
+
+import json
+import math
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Sequence, Union
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.cluster.vq import kmeans2
+from scipy.sparse.linalg import svds
+
+from text_statistics import tokenize, token_id, strip_accents, PORTUGUESE_STOPWORDS
+
+INDEX_VERSION = 1
+SNIPPET_LENGTH = 200
+STOPWORDS = frozenset(map(strip_accents, PORTUGUESE_STOPWORDS))
+
+
+def fronteira_section_records(documents: Iterable) -> Iterator[Dict[str, Any]]:
+    """Index records for the Fronteira sections of parsed documents (streamed lazily)."""
+    for doc in documents:
+        date = doc.metadata.get('normalized_date') or doc.date
+        for section in doc.assunto_sections:
+            temas = list(dict.fromkeys(entity.tema for entity in section.keyword_entities if entity.tema))
+            yield {
+                'id': f"{doc.filename}#{section.id}",
+                'source': 'section',
+                'document': doc.filename,
+                'municipality': doc.municipality,
+                'date': date,
+                'tema': ' | '.join(temas) if temas else None,
+                'text': section.text
+            }
+
+
+def publication_segment_records(publication_dir: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Index records for the text_pt segments of the publication dataset (*_dataset.json files).
+
+    Dates come from the document ids and are normalised (YYYY-MM-DD / YYYY-DD-MM) like
+    InceptionParser.iter_documents does for the sections of the same meetings.
+    """
+    from analysis_functions import normalize_document_dates
+
+    for path in sorted(Path(publication_dir).glob('**/*_dataset.json')):
+        with open(path, encoding='utf-8') as f:
+            segments = json.load(f).get('segments', [])
+        parts = [(segment.get('document_id') or '').split('_') for segment in segments]
+        municipalities = pd.Series([fields[0] if fields[0] else None for fields in parts], dtype=object)
+        raw_dates = pd.Series([fields[3] if len(fields) > 3 else None for fields in parts], dtype=object)
+        dates = normalize_document_dates(raw_dates, municipalities).dt.strftime('%Y-%m-%d')
+        dates = dates.astype(object).where(dates.notna(), raw_dates)
+        for segment, municipality, date in zip(segments, municipalities, dates):
+            document_id = segment.get('document_id') or ''
+            yield {
+                'id': f"{document_id}#segment_{segment.get('segment_id')}",
+                'source': 'segment',
+                'document': document_id,
+                'municipality': municipality,
+                'date': date,
+                'tema': segment.get('tema') or None,
+                'text': segment.get('text_pt') or ''
+            }
+
+
+class SectionIndex:
+    """
+    Hashed TF-IDF + LSA + inverted-file nearest-neighbour index over section texts.
+
+    Build with SectionIndex(...).build(records), persist with save(directory) and reopen with
+    SectionIndex.load(directory).
+    """
+
+    def __init__(self, n_features: int = 2 ** 20, n_components: int = 128, n_lists: Optional[int] = None,
+                 min_token_length: int = 3, random_state: int = 42):
+        """
+        Args:
+            n_features: Hashed feature space size (only features that occur are stored)
+            n_components: Dimensions of the dense (LSA) vectors used for the approximate search
+            n_lists: Inverted-file cells (default: about sqrt of the number of texts)
+            min_token_length: Minimum token length in characters
+            random_state: Seed for the SVD and the k-means cells
+        """
+        self.n_features = n_features
+        self.n_components = n_components
+        self.n_lists = n_lists
+        self.min_token_length = min_token_length
+        self.random_state = random_state
+        self.metadata = pd.DataFrame()
+        self.features = None
+        self.idf = None
+        self.tfidf = None
+        self.components = None
+        self.vectors = None
+        self.centroids = None
+        self.list_offsets = None
+        self.list_members = None
+        self._positions = {}
+        self._sources = None
+        self._meetings = None
+
+    def _term_counts(self, text: str) -> Counter:
+        tokens = tokenize(text or '', fold=True, stopwords=STOPWORDS, min_token_length=self.min_token_length)
+        return Counter(token_id(token) % self.n_features for token in tokens)
+
+    def _rows(self, counters: List[Counter]) -> sparse.csr_matrix:
+        """
+        Sublinear term-frequency rows (1 + log tf) over the indexed features.
+
+        Columns are the hashed features seen at build time (self.features, sorted), so the
+        matrices and SVD components scale with the corpus vocabulary rather than n_features;
+        query terms never seen in the corpus are dropped.
+        """
+        lengths = [len(counts) for counts in counters]
+        hashed = np.fromiter((feature for counts in counters for feature in counts), dtype=np.int64,
+                             count=sum(lengths))
+        data = np.fromiter((count for counts in counters for count in counts.values()), dtype=np.float32,
+                           count=sum(lengths))
+        rows = np.repeat(np.arange(len(counters)), lengths)
+
+        columns = np.minimum(np.searchsorted(self.features, hashed), len(self.features) - 1)
+        known = self.features[columns] == hashed
+        return sparse.csr_matrix((1 + np.log(data[known]), (rows[known], columns[known])),
+                                 shape=(len(counters), len(self.features)))
+
+    def _weight(self, rows: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Apply IDF weights and L2-normalise rows."""
+        rows = rows.multiply(self.idf).tocsr().astype(np.float32)
+        norms = np.sqrt(np.asarray(rows.multiply(rows).sum(axis=1)).ravel())
+        return sparse.diags(np.divide(1, norms, out=np.zeros_like(norms), where=norms > 0)) @ rows
+
+    def _project(self, rows: sparse.csr_matrix) -> np.ndarray:
+        dense = np.asarray(rows @ self.components.T, dtype=np.float32)
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        return np.divide(dense, norms, out=np.zeros_like(dense), where=norms > 0)
+
+    def build(self, records: Iterable[Dict[str, Any]]) -> 'SectionIndex':
+        """
+        Index a stream of records with id, source, document, municipality, date, tema and text.
+
+        Texts are reduced to hashed term counts as they stream by; only the sparse vectors and
+        a short snippet per record are kept.
+        """
+        counters, rows = [], []
+        for record in records:
+            counts = self._term_counts(record['text'])
+            if not counts:
+                continue
+            counters.append(counts)
+            text = ' '.join((record['text'] or '').split())
+            rows.append({key: record.get(key) for key in ('id', 'source', 'document', 'municipality', 'date', 'tema')})
+            rows[-1]['snippet'] = text[:SNIPPET_LENGTH]
+        if len(counters) < 2:
+            raise ValueError('At least two non-empty texts are needed to build an index')
+
+        self.metadata = pd.DataFrame(rows).drop_duplicates('id', keep='first')
+        counters = [counters[position] for position in self.metadata.index]
+        self.metadata = self.metadata.reset_index(drop=True)
+
+        self.features = np.unique(np.fromiter((feature for counts in counters for feature in counts),
+                                              dtype=np.int64))
+        term_frequencies = self._rows(counters)
+        n_documents = term_frequencies.shape[0]
+        document_frequencies = np.bincount(term_frequencies.indices, minlength=len(self.features))
+        self.idf = (np.log((1 + n_documents) / (1 + document_frequencies)) + 1).astype(np.float32)
+        self.tfidf = self._weight(term_frequencies)
+
+        n_components = min(self.n_components, n_documents - 1)
+        _, _, components = svds(self.tfidf.astype(np.float64), k=n_components, random_state=self.random_state)
+        self.components = components.astype(np.float32)
+        self.vectors = self._project(self.tfidf)
+        self._build_lists()
+        self._prepare_lookups()
+        return self
+
+    def _build_lists(self):
+        """Inverted file: k-means cells over the dense vectors, members stored contiguously per cell."""
+        n_lists = self.n_lists or max(1, int(round(math.sqrt(len(self.vectors)))))
+        n_lists = min(n_lists, len(self.vectors))
+        centroids, labels = kmeans2(self.vectors, n_lists, minit='++', seed=self.random_state)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = np.divide(centroids, norms, out=np.zeros_like(centroids), where=norms > 0).astype(np.float32)
+        order = np.argsort(labels, kind='stable')
+        self.list_members = order.astype(np.int32)
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=n_lists))]).astype(np.int64)
+
+    def _prepare_lookups(self):
+        self._positions = dict(zip(self.metadata['id'], range(len(self.metadata))))
+        self._sources = self.metadata['source'].to_numpy(dtype=object)
+        # Sections carry the JSON filename, segments the bare document id of the same meeting
+        self._meetings = self.metadata['document'].str.replace(r'\.json$', '', regex=True).to_numpy(dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    def query(self, query: str, k: int = 10, n_probe: int = 8, rerank: int = 5,
+              sources: Optional[Sequence[str]] = None, exclude_same_document: bool = True) -> pd.DataFrame:
+        """
+        Most similar indexed texts to a free-text query or an indexed id.
+
+        Args:
+            query: An indexed id (e.g. 'Porto_cm_046_2023-11-06.json#section_3' or
+                'Porto_cm_046_2023-11-06#segment_1') or any text
+            k: Results to return
+            n_probe: Inverted-file cells to search (more is slower and closer to exact)
+            rerank: Candidates per result re-ranked with exact TF-IDF cosine
+            sources: Restrict results to 'section' and/or 'segment'
+            exclude_same_document: For id queries, leave out texts from the same meeting
+
+        Returns:
+            pd.DataFrame: id, source, document, municipality, date, tema, score (TF-IDF cosine),
+            snippet, ordered by score; only texts sharing at least one indexed term with the query
+            (empty when the query has no indexed terms)
+        """
+        if self.vectors is None:
+            raise ValueError('The index is empty (build or load it first)')
+
+        position = self._positions.get(query)
+        if position is not None:
+            sparse_query = self.tfidf[position]
+            dense_query = self.vectors[position]
+        else:
+            sparse_query = self._weight(self._rows([self._term_counts(query)]))
+            dense_query = self._project(sparse_query)[0]
+
+        cells = np.argsort(-(self.centroids @ dense_query))[:max(1, n_probe)]
+        candidates = np.concatenate([self.list_members[self.list_offsets[cell]:self.list_offsets[cell + 1]]
+                                     for cell in cells])
+
+        keep = np.ones(len(candidates), dtype=bool)
+        if sources is not None:
+            keep &= np.isin(self._sources[candidates], list(sources))
+        if position is not None:
+            keep &= candidates != position
+            if exclude_same_document:
+                keep &= self._meetings[candidates] != self._meetings[position]
+        candidates = candidates[keep]
+
+        shortlist = candidates[np.argsort(-(self.vectors[candidates] @ dense_query))[:k * max(1, rerank)]]
+        scores = np.asarray((self.tfidf[shortlist] @ sparse_query.T).todense()).ravel()
+        # Candidates sharing no indexed term with the query are not matches
+        order = np.argsort(-scores, kind='stable')[:k]
+        order = order[scores[order] > 0]
+
+        results = self.metadata.iloc[shortlist[order]].copy()
+        results.insert(6, 'score', scores[order])
+        return results.reset_index(drop=True)
+
+    def save(self, directory: Union[str, Path]) -> Path:
+        """Persist the index to a directory (index.json, metadata.csv, arrays.npz, tfidf.npz)."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        config = {
+            'version': INDEX_VERSION,
+            'n_features': self.n_features,
+            'n_components': self.n_components,
+            'n_lists': self.n_lists,
+            'min_token_length': self.min_token_length,
+            'random_state': self.random_state,
+            'entries': len(self.metadata),
+            'sources': self.metadata['source'].value_counts().to_dict()
+        }
+        with open(directory / 'index.json', 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+        self.metadata.to_csv(directory / 'metadata.csv', index=False)
+        sparse.save_npz(directory / 'tfidf.npz', self.tfidf)
+        np.savez(directory / 'arrays.npz', features=self.features, idf=self.idf, components=self.components,
+                 vectors=self.vectors, centroids=self.centroids, list_offsets=self.list_offsets, list_members=self.list_members)
+        return directory
+
+    @classmethod
+    def load(cls, directory: Union[str, Path]) -> 'SectionIndex':
+        """Open an index written by save."""
+        directory = Path(directory)
+        with open(directory / 'index.json', encoding='utf-8') as f:
+            config = json.load(f)
+        if config.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version {config.get('version')} (expected {INDEX_VERSION})")
+
+        index = cls(n_features=config['n_features'], n_components=config['n_components'],
+                    n_lists=config['n_lists'], min_token_length=config['min_token_length'],
+                    random_state=config['random_state'])
+        index.metadata = pd.read_csv(directory / 'metadata.csv', dtype=str, keep_default_na=False).replace('', None)
+        index.tfidf = sparse.load_npz(directory / 'tfidf.npz').tocsr()
+        with np.load(directory / 'arrays.npz') as arrays:
+            for name in ('features', 'idf', 'components', 'vectors', 'centroids', 'list_offsets', 'list_members'):
+                setattr(index, name, arrays[name])
+        index._prepare_lookups()
+        return index
+
+
+def main():
+    """Command-line interface: build/persist an index, or query a persisted one."""
+    import argparse
+    from inception_parser import InceptionParser
+
+    parser = argparse.ArgumentParser(description='Similar-section retrieval over meetings and municipalities')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='Build and persist the index')
+    build.add_argument('--data_dir', type=str, default='../data/shared/inception',
+                       help='Path to directory containing INCEpTION JSON files (Fronteira sections)')
+    build.add_argument('--publication_dir', type=str, default=None,
+                       help='Publication dataset directory with *_dataset.json files (text_pt segments)')
+    build.add_argument('--index_dir', type=str, default='../results/section_index',
+                       help='Directory to write the index to')
+    build.add_argument('--n_components', type=int, default=128, help='Dense (LSA) dimensions')
+
+    query = commands.add_parser('query', help='Query a persisted index')
+    query.add_argument('query', type=str, help='Indexed id or free text')
+    query.add_argument('--index_dir', type=str, default='../results/section_index',
+                       help='Directory of a persisted index')
+    query.add_argument('--k', type=int, default=10, help='Number of results')
+    query.add_argument('--n_probe', type=int, default=8, help='Inverted-file cells to search')
+    query.add_argument('--source', choices=['section', 'segment'], default=None,
+                       help='Only return sections or only publication segments')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        records = fronteira_section_records(InceptionParser().iter_documents(Path(args.data_dir)))
+        if args.publication_dir:
+            from itertools import chain
+            records = chain(records, publication_segment_records(args.publication_dir))
+        index = SectionIndex(n_components=args.n_components).build(records)
+        index.save(args.index_dir)
+        print(f"Indexed {len(index)} texts ({index.metadata['source'].value_counts().to_dict()}) "
+              f"in {time.perf_counter() - start:.1f}s -> {args.index_dir}")
+    else:
+        index = SectionIndex.load(args.index_dir)
+        start = time.perf_counter()
+        results = index.query(args.query, k=args.k, n_probe=args.n_probe,
+                              sources=[args.source] if args.source else None)
+        elapsed = (time.perf_counter() - start) * 1000
+        with pd.option_context('display.max_colwidth', 80, 'display.width', 200):
+            print(results[['id', 'municipality', 'date', 'score', 'tema']].to_string(index=False))
+        print(f"\n{len(results)} results in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
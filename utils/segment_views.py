@@ -0,0 +1,378 @@
+#!/usr/bin/env python
+"""
+Sentence- and Section-Level Aggregation Views
+
+This module joins entity spans to the DKPro sentences and to the Fronteira-delimited assunto
+sections of their document, so densities can be normalised by sentences, tokens and sections
+instead of whole documents. Joins are vectorised interval lookups: every (filename, offset)
+pair is packed into one sortable int64 key, interval starts are sorted once and each span is
+placed with a single np.searchsorted, so a join costs O((n + m) log m) for n spans and m
+intervals regardless of how many documents they come from.
+
+Windowed co-occurrence uses the same packed keys: label pairs within ±N characters or tokens
+are counted with a sorted sweep and per-label prefix sums, and pairs within the same sentence
+or section from a sparse segment × label matrix, never by comparing spans pairwise.
+
+Documents whose DKPro Token offsets do not line up with their text (segmentation_aligned is
+False in the sentence and token tables) are left out of every sentence- and token-based metric
+and reported by name, since their sentence boundaries and token counts are meaningless.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+def _document_codes(frames: List[pd.DataFrame], key: str) -> List[np.ndarray]:
+    """Integer codes for the document key, shared across frames (categoricals are mapped via their categories)."""
+    factorized = []
+    for frame in frames:
+        values = frame[key]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            factorized.append((values.cat.codes.to_numpy(), values.cat.categories.astype(str)))
+        else:
+            codes, levels = pd.factorize(values.astype(str))
+            factorized.append((codes, pd.Index(levels)))
+
+    categories = pd.Index(pd.concat([levels.to_series() for _, levels in factorized], ignore_index=True).unique())
+    mapped = []
+    for codes, levels in factorized:
+        lookup = np.append(categories.get_indexer(levels), -1)
+        mapped.append(lookup[codes])
+    return mapped
+
+
+def _packed_keys(codes: np.ndarray, offsets: np.ndarray, stride: int) -> np.ndarray:
+    return codes.astype(np.int64) * stride + offsets.astype(np.int64)
+
+
+def join_spans_to_intervals(spans: pd.DataFrame, intervals: pd.DataFrame, key: str = 'filename',
+                            contained: bool = False) -> np.ndarray:
+    """
+    Position of the interval (row of intervals) holding each span, or -1.
+
+    Intervals must not overlap within a document (true for DKPro sentences and Fronteira
+    sections). A span belongs to the interval its begin offset falls in; with contained=True
+    its end must also lie inside the interval (the rule the parser uses for section keywords).
+
+    Args:
+        spans: Frame with key, begin and end columns
+        intervals: Frame with key, begin and end columns
+        key: Document key column shared by both frames
+        contained: Require the whole span to lie inside the interval
+
+    Returns:
+        np.ndarray: Row positions into intervals (int64, -1 where no interval matches)
+    """
+    if spans.empty or intervals.empty:
+        return np.full(len(spans), -1, dtype=np.int64)
+
+    span_codes, interval_codes = _document_codes([spans, intervals], key)
+    stride = int(max(spans['end'].max(), intervals['end'].max())) + 1
+
+    interval_begin = _packed_keys(interval_codes, intervals['begin'].to_numpy(), stride)
+    interval_end = _packed_keys(interval_codes, intervals['end'].to_numpy(), stride)
+    order = np.argsort(interval_begin, kind='stable')
+    sorted_begin = interval_begin[order]
+    sorted_end = interval_end[order]
+
+    span_begin = _packed_keys(span_codes, spans['begin'].to_numpy(), stride)
+    span_end = _packed_keys(span_codes, spans['end'].to_numpy(), stride)
+    position = np.searchsorted(sorted_begin, span_begin, side='right') - 1
+
+    candidate = np.clip(position, 0, None)
+    limit = sorted_end[candidate]
+    inside = (position >= 0) & ((span_end <= limit) if contained else (span_begin < limit))
+    return np.where(inside, order[candidate], -1)
+
+
+def count_points_in_intervals(points: pd.DataFrame, intervals: pd.DataFrame, key: str = 'filename') -> np.ndarray:
+    """
+    Number of points (e.g. DKPro tokens, by begin offset) inside each interval.
+
+    Intervals may overlap; each is counted with two searchsorted calls on the sorted points.
+    """
+    if points.empty or intervals.empty:
+        return np.zeros(len(intervals), dtype=np.int64)
+
+    point_codes, interval_codes = _document_codes([points, intervals], key)
+    stride = int(max(points['begin'].max(), intervals['end'].max())) + 1
+    point_keys = np.sort(_packed_keys(point_codes, points['begin'].to_numpy(), stride))
+    interval_begin = _packed_keys(interval_codes, intervals['begin'].to_numpy(), stride)
+    interval_end = _packed_keys(interval_codes, intervals['end'].to_numpy(), stride)
+    return np.searchsorted(point_keys, interval_end, side='left') - np.searchsorted(point_keys, interval_begin, side='left')
+
+
+def assign_segments(entities_df: pd.DataFrame, sentences_df: Optional[pd.DataFrame] = None,
+                    sections_df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Add sentence_index and section_id columns to the entity table.
+
+    Entities outside every sentence/section get a missing value.
+    """
+    assigned = entities_df.copy()
+    if sentences_df is not None:
+        position = join_spans_to_intervals(entities_df, sentences_df)
+        sentence_index = pd.Series(sentences_df['sentence_index'].to_numpy())
+        assigned['sentence_index'] = sentence_index.reindex(position).astype('Int64').to_numpy()
+    if sections_df is not None:
+        position = join_spans_to_intervals(entities_df, sections_df, contained=True)
+        section_ids = pd.Series(sections_df['section_id'].to_numpy(dtype=object))
+        assigned['section_id'] = section_ids.reindex(position).to_numpy()
+    return assigned
+
+
+def misaligned_documents(table: Optional[pd.DataFrame]) -> List[str]:
+    """Documents flagged segmentation_aligned=False in a sentence or token table (sorted filenames)."""
+    if table is None or 'segmentation_aligned' not in table.columns:
+        return []
+    flagged = table.loc[~table['segmentation_aligned'].to_numpy(dtype=bool), 'filename']
+    return sorted(set(flagged.astype(str)))
+
+
+def _drop_documents(frame: pd.DataFrame, documents: List[str]) -> pd.DataFrame:
+    if not documents:
+        return frame
+    return frame[~frame['filename'].isin(documents).to_numpy()]
+
+
+def _exclusion_report(entities_df: pd.DataFrame, documents: List[str]) -> Dict[str, Any]:
+    return {
+        'documents_excluded_misaligned': len(documents),
+        'entities_excluded_misaligned': int(entities_df['filename'].isin(documents).sum()) if documents else 0,
+        'misaligned_documents': documents
+    }
+
+
+def _density_table(entity_counts: pd.DataFrame, segment_totals: pd.DataFrame, segment_name: str) -> pd.DataFrame:
+    """Combine per-(municipality, label) entity counts with per-municipality segment totals."""
+    table = entity_counts.join(segment_totals, on='municipality')
+    table[f'entities_per_{segment_name}'] = table['entities'] / table[f'{segment_name}s']
+    table['entities_per_1k_tokens'] = table['entities'] / table['tokens'] * 1000
+    table[f'{segment_name}_coverage'] = table[f'{segment_name}s_with_label'] / table[f'{segment_name}s']
+    return table.replace([np.inf, -np.inf], np.nan).round(4)
+
+
+def _segment_density(entities_df: pd.DataFrame, segments_df: pd.DataFrame, position: np.ndarray,
+                     segment_name: str, token_counts: np.ndarray) -> Dict[str, Any]:
+    inside = position >= 0
+    matched = entities_df.loc[inside, ['municipality', 'entity_label']].astype(str).assign(segment=position[inside])
+
+    segments = pd.DataFrame({'municipality': segments_df['municipality'].astype(str).to_numpy(),
+                             'tokens': token_counts})
+    segment_totals = segments.groupby('municipality').agg(**{f'{segment_name}s': ('tokens', 'size'),
+                                                             'tokens': ('tokens', 'sum')})
+
+    by_label = matched.groupby(['municipality', 'entity_label']).agg(
+        entities=('segment', 'size'), **{f'{segment_name}s_with_label': ('segment', 'nunique')})
+    overall = matched.groupby('municipality').agg(
+        entities=('segment', 'size'), **{f'{segment_name}s_with_label': ('segment', 'nunique')})
+
+    by_municipality = _density_table(overall.reindex(segment_totals.index, fill_value=0), segment_totals, segment_name)
+    by_municipality_label = _density_table(by_label.reset_index('entity_label'), segment_totals, segment_name)
+    by_municipality_label = by_municipality_label.set_index('entity_label', append=True)
+
+    entities_per_segment = np.bincount(position[inside], minlength=len(segments_df))
+    return {
+        f'total_{segment_name}s': len(segments_df),
+        'total_tokens': int(token_counts.sum()),
+        f'entities_in_{segment_name}s': int(inside.sum()),
+        f'entities_outside_{segment_name}s': int((~inside).sum()),
+        f'entities_per_{segment_name}_distribution': {
+            'mean': float(entities_per_segment.mean()) if len(entities_per_segment) else 0.0,
+            'median': float(np.median(entities_per_segment)) if len(entities_per_segment) else 0.0,
+            'max': int(entities_per_segment.max()) if len(entities_per_segment) else 0,
+            f'{segment_name}s_without_entities': int((entities_per_segment == 0).sum())
+        },
+        'by_municipality': by_municipality.to_dict('index'),
+        'by_municipality_label': by_municipality_label.to_dict('index')
+    }
+
+
+def sentence_density_view(entities_df: pd.DataFrame, sentences_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Entities per sentence and per 1k DKPro tokens, by municipality and by municipality × label.
+
+    Args:
+        entities_df: Entity table (filename, municipality, entity_label, begin, end)
+        sentences_df: Sentence table from InceptionParser.create_sentence_dataframe
+    """
+    excluded = misaligned_documents(sentences_df)
+    entities = _drop_documents(entities_df, excluded)
+    sentences_df = _drop_documents(sentences_df, excluded)
+    position = join_spans_to_intervals(entities, sentences_df)
+    density = _segment_density(entities, sentences_df, position, 'sentence',
+                               sentences_df['token_count'].to_numpy(dtype=np.int64))
+    density.update(_exclusion_report(entities_df, excluded))
+    return density
+
+
+def section_density_view(entities_df: pd.DataFrame, sections_df: pd.DataFrame,
+                         tokens_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    Entities per Fronteira section and per 1k tokens, by municipality and by municipality × label.
+
+    Section token counts come from the DKPro token table when given (tokens starting inside
+    the section; documents with misaligned tokens are then left out), otherwise from the
+    whitespace token_count of the section table. Fronteira marker entities themselves lie
+    outside the sections they delimit.
+
+    Args:
+        entities_df: Entity table (filename, municipality, entity_label, begin, end)
+        sections_df: Section table from InceptionParser.create_section_dataframe
+        tokens_df: Optional token table from InceptionParser.create_token_dataframe
+    """
+    excluded = misaligned_documents(tokens_df)
+    entities = _drop_documents(entities_df, excluded)
+    sections_df = _drop_documents(sections_df, excluded)
+    if tokens_df is not None:
+        token_counts = count_points_in_intervals(_drop_documents(tokens_df, excluded), sections_df)
+    else:
+        token_counts = sections_df['token_count'].to_numpy(dtype=np.int64)
+    position = join_spans_to_intervals(entities, sections_df, contained=True)
+    density = _segment_density(entities, sections_df, position, 'section', token_counts)
+    if tokens_df is not None:
+        density.update(_exclusion_report(entities_df, excluded))
+    return density
+
+
+def _window_pair_counts(documents: np.ndarray, begins: np.ndarray, ends: np.ndarray, labels: np.ndarray,
+                        n_labels: int, size: int) -> np.ndarray:
+    """
+    Unordered label-pair counts of spans whose gap is at most size, by a sorted sweep.
+
+    Spans are sorted by (document, begin); span j after span i is in i's window when
+    begin_j <= end_i + size, so one searchsorted gives the window end of every span and
+    per-label prefix counts give the labels inside it, in O(n log n + n * n_labels).
+    """
+    counts = np.zeros((n_labels, n_labels), dtype=np.int64)
+    if len(begins) < 2:
+        return counts
+
+    stride = int(max(begins.max(), ends.max())) + size + 2
+    packed_begin = documents.astype(np.int64) * stride + begins
+    packed_end = documents.astype(np.int64) * stride + ends
+    order = np.argsort(packed_begin, kind='stable')
+    packed_begin, packed_end, labels = packed_begin[order], packed_end[order], labels[order]
+
+    window_end = np.searchsorted(packed_begin, packed_end + size, side='right')
+    following = np.arange(1, len(labels) + 1)
+    for label in range(n_labels):
+        prefix = np.concatenate([[0], np.cumsum(labels == label)])
+        in_window = np.clip(prefix[window_end] - prefix[following], 0, None)
+        counts[:, label] = np.bincount(labels, weights=in_window, minlength=n_labels).astype(np.int64)
+
+    # counts[a, b] holds pairs with the a-span first; fold into unordered pairs
+    return counts + counts.T - np.diag(np.diag(counts))
+
+
+def _segment_pair_counts(segments: np.ndarray, labels: np.ndarray, n_labels: int,
+                         n_segments: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Unordered label-pair counts and label co-presence counts over shared segments."""
+    from scipy import sparse
+
+    matrix = sparse.csr_matrix((np.ones(len(labels), dtype=np.int64), (segments, labels)),
+                               shape=(n_segments, n_labels))
+    products = (matrix.T @ matrix).toarray()
+    pairs = products.copy()
+    np.fill_diagonal(pairs, (np.diag(products) - np.asarray(matrix.sum(axis=0)).ravel()) // 2)
+    presence = (matrix > 0).astype(np.int64)
+    return pairs, (presence.T @ presence).toarray()
+
+
+def _cooccurrence_shard(task: Dict[str, Any]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    if task['mode'] == 'window':
+        return _window_pair_counts(task['documents'], task['begins'], task['ends'], task['labels'],
+                                   task['n_labels'], task['size']), None
+    return _segment_pair_counts(task['segments'], task['labels'], task['n_labels'], task['n_segments'])
+
+
+def _token_positions(entities_df: pd.DataFrame, tokens_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Global indices of the first and last DKPro token of each span (tokens sorted per document)."""
+    entity_codes, token_codes = _document_codes([entities_df, tokens_df], 'filename')
+    stride = int(max(entities_df['end'].max(), tokens_df['end'].max())) + 1
+    token_keys = np.sort(_packed_keys(token_codes, tokens_df['begin'].to_numpy(), stride))
+    first = np.searchsorted(token_keys, _packed_keys(entity_codes, entities_df['begin'].to_numpy(), stride), side='right') - 1
+    last = np.searchsorted(token_keys, _packed_keys(entity_codes, entities_df['end'].to_numpy(), stride), side='left') - 1
+    return np.clip(first, 0, None), np.maximum(np.clip(last, 0, None), np.clip(first, 0, None))
+
+
+def windowed_cooccurrence(entities_df: pd.DataFrame, window: str = 'sentence', size: int = 0,
+                          sentences_df: Optional[pd.DataFrame] = None, sections_df: Optional[pd.DataFrame] = None,
+                          tokens_df: Optional[pd.DataFrame] = None, n_jobs: int = 1) -> Dict[str, Any]:
+    """
+    Count entity label pairs that co-occur within a window.
+
+    Pairs are unordered pairs of distinct entity spans (same-label pairs are on the diagonal).
+    In sentence/section mode the result also counts segments in which both labels appear.
+    Sentence and token windows skip documents whose segmentation is flagged misaligned.
+
+    Args:
+        entities_df: Entity table (filename, entity_label, begin, end)
+        window: 'sentence' (same DKPro sentence), 'section' (same Fronteira section),
+            'chars' (at most size characters apart) or 'tokens' (at most size DKPro tokens apart)
+        size: Window size for 'chars' and 'tokens' (0 means touching or overlapping spans)
+        sentences_df: Sentence table, required for window='sentence'
+        sections_df: Section table, required for window='section'
+        tokens_df: Token table, required for window='tokens'
+        n_jobs: Worker processes; documents are sharded across them (-1 uses all cores)
+    """
+    required = {'sentence': sentences_df, 'section': sections_df, 'tokens': tokens_df, 'chars': entities_df}
+    if window not in required:
+        raise ValueError(f"Unknown co-occurrence window: {window}")
+    if required[window] is None:
+        return {'error': f"Window '{window}' needs the {window} table"}
+
+    labelled = entities_df[entities_df['entity_label'].notna()]
+    excluded = misaligned_documents({'sentence': sentences_df, 'tokens': tokens_df}.get(window))
+    skipped = int(labelled['filename'].isin(excluded).sum()) if excluded else 0
+    labelled = _drop_documents(labelled, excluded)
+    label_codes, label_levels = pd.factorize(labelled['entity_label'], sort=True)
+    n_labels = len(label_levels)
+    documents = _document_codes([labelled], 'filename')[0]
+
+    if window in ('sentence', 'section'):
+        segments_df = sentences_df if window == 'sentence' else sections_df
+        position = join_spans_to_intervals(labelled, segments_df, contained=(window == 'section'))
+        inside = position >= 0
+        documents, label_codes, position = documents[inside], label_codes[inside], position[inside]
+        base_task = {'mode': 'segment', 'n_labels': n_labels, 'n_segments': len(segments_df)}
+        columns = {'segments': position, 'labels': label_codes}
+    else:
+        if window == 'tokens':
+            begins, ends = _token_positions(labelled, _drop_documents(tokens_df, excluded))
+        else:
+            begins, ends = labelled['begin'].to_numpy(dtype=np.int64), labelled['end'].to_numpy(dtype=np.int64)
+        base_task = {'mode': 'window', 'n_labels': n_labels, 'size': int(size)}
+        columns = {'documents': documents, 'begins': begins, 'ends': ends, 'labels': label_codes}
+
+    if n_jobs is not None and n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_shards = max(1, min(n_jobs or 1, len(np.unique(documents)) if len(documents) else 1))
+    shard = documents % n_shards
+    tasks = [{**base_task, **{name: values[shard == index] for name, values in columns.items()}}
+             for index in range(n_shards)]
+
+    if n_shards > 1:
+        with ProcessPoolExecutor(max_workers=n_shards) as executor:
+            results = list(executor.map(_cooccurrence_shard, tasks))
+    else:
+        results = [_cooccurrence_shard(tasks[0])]
+
+    pairs = sum(result[0] for result in results)
+    labels = [str(label) for label in label_levels]
+    cooccurrence = {
+        'window': window,
+        'size': int(size) if window in ('chars', 'tokens') else None,
+        'entities_counted': int(len(label_codes)),
+        'entities_skipped_misaligned': skipped,
+        'documents_excluded_misaligned': len(excluded),
+        'total_pairs': int(np.triu(pairs).sum()),
+        'pair_counts': pd.DataFrame(pairs, index=labels, columns=labels).to_dict('index')
+    }
+    if window in ('sentence', 'section'):
+        presence = sum(result[1] for result in results)
+        cooccurrence[f'{window}s_with_both_labels'] = pd.DataFrame(presence, index=labels, columns=labels).to_dict('index')
+    return cooccurrence
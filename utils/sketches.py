@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+"""
+Bounded-Memory Sketches for Large-Scale Annotation Statistics
+
+This module provides the streaming summaries used by AnnotationAnalyzer's sketch mode.
+Every sketch takes values in vectorised chunks (pandas Series or NumPy arrays), holds a
+fixed amount of memory regardless of how many values it sees, and documents its error:
+
+- HyperLogLog: distinct counts, relative standard error 1.04 / sqrt(2^precision)
+- CountMinSketch: frequencies, overestimate <= e * N / width with probability 1 - e^-depth
+- SpaceSaving: heavy hitters, overestimate <= N / capacity; every value with frequency
+  above N / capacity is guaranteed to be tracked
+- TDigest: quantiles, rank error roughly proportional to q(1 - q) / compression
+"""
+
+import math
+from typing import Dict, List, Any, Optional, Union
+import numpy as np
+import pandas as pd
+
+ArrayLike = Union[pd.Series, np.ndarray, List]
+
+
+def hash_values(values: ArrayLike) -> np.ndarray:
+    """Stable 64-bit hashes of values (missing values are dropped)."""
+    series = pd.Series(values).dropna()
+    if series.empty:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_pandas_object(series.astype(str), index=False).to_numpy(dtype=np.uint64)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-value counter with 2^precision one-byte registers."""
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError('precision must be between 4 and 18')
+        self.precision = precision
+        self.n_registers = 1 << precision
+        self.registers = np.zeros(self.n_registers, dtype=np.uint8)
+
+    @classmethod
+    def from_memory_budget(cls, budget_bytes: int) -> 'HyperLogLog':
+        return cls(int(np.clip(math.floor(math.log2(max(budget_bytes, 16))), 4, 18)))
+
+    def update(self, values: ArrayLike) -> 'HyperLogLog':
+        hashes = hash_values(values)
+        if len(hashes) == 0:
+            return self
+
+        remaining_bits = 64 - self.precision
+        index = (hashes >> np.uint64(remaining_bits)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << remaining_bits) - 1)
+
+        # Rank = position of the leftmost 1-bit in the remaining bits; keep at most 53 bits
+        # so the float log2 below is exact
+        usable_bits = min(remaining_bits, 53)
+        remainder = remainder >> np.uint64(remaining_bits - usable_bits)
+        with np.errstate(divide='ignore'):
+            leading = np.floor(np.log2(remainder.astype(np.float64)))
+        rank = np.where(remainder > 0, usable_bits - leading, usable_bits + 1).astype(np.uint8)
+
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        m = self.n_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        empty = int(np.sum(self.registers == 0))
+        # Linear counting for small cardinalities
+        if raw <= 2.5 * m and empty > 0:
+            return m * math.log(m / empty)
+        return float(raw)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.n_registers)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.registers.nbytes
+
+
+class CountMinSketch:
+    """Count-Min frequency sketch with depth rows of width counters."""
+
+    _MULTIPLIERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9,
+                             0xD6E8FEB86659FD93, 0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53,
+                             0x27D4EB2F165667C5, 0x94D049BB133111EB], dtype=np.uint64)
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        if not 1 <= depth <= len(self._MULTIPLIERS):
+            raise ValueError(f'depth must be between 1 and {len(self._MULTIPLIERS)}')
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    @classmethod
+    def from_memory_budget(cls, budget_bytes: int, depth: int = 4) -> 'CountMinSketch':
+        return cls(max(16, budget_bytes // (8 * depth)), depth)
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        with np.errstate(over='ignore'):
+            mixed = hashes[None, :] * self._MULTIPLIERS[:self.depth, None]
+        return ((mixed >> np.uint64(32)) % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, values: ArrayLike, counts: Optional[np.ndarray] = None) -> 'CountMinSketch':
+        hashes = hash_values(values)
+        if len(hashes) == 0:
+            return self
+        weights = np.ones(len(hashes), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        columns = self._columns(hashes)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], weights=weights, minlength=self.width).astype(np.int64)
+        self.total += int(weights.sum())
+        return self
+
+    def estimate(self, values: ArrayLike) -> np.ndarray:
+        hashes = hash_values(values)
+        if len(hashes) == 0:
+            return np.empty(0, dtype=np.int64)
+        columns = self._columns(hashes)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    @property
+    def error_bound(self) -> float:
+        """Additive overestimate bound (holds with probability 1 - e^-depth)."""
+        return math.e * self.total / self.width
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.table.nbytes
+
+
+class SpaceSaving:
+    """
+    Mergeable Space-Saving heavy-hitter summary holding at most capacity counters.
+
+    Each chunk is reduced to exact counts and merged into the summary: values missing from
+    a full summary inherit its minimum count as overestimate, then the largest capacity
+    counters are kept.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+        self.total = 0
+
+    @classmethod
+    def from_memory_budget(cls, budget_bytes: int, bytes_per_counter: int = 128) -> 'SpaceSaving':
+        return cls(max(10, budget_bytes // bytes_per_counter))
+
+    def update(self, values: ArrayLike) -> 'SpaceSaving':
+        chunk_counts = pd.Series(values).dropna().value_counts()
+        return self.merge_counts(chunk_counts)
+
+    def merge_counts(self, chunk_counts: pd.Series, chunk_errors: Optional[pd.Series] = None,
+                     chunk_floor: int = 0) -> 'SpaceSaving':
+        if chunk_counts.empty:
+            return self
+        floor = int(self.counts.min()) if len(self.counts) >= self.capacity else 0
+        if chunk_errors is None:
+            chunk_errors = pd.Series(0, index=chunk_counts.index, dtype=np.int64)
+
+        index = self.counts.index.union(chunk_counts.index)
+        counts = (self.counts.reindex(index).fillna(floor) + chunk_counts.reindex(index).fillna(chunk_floor))
+        errors = (self.errors.reindex(index).fillna(floor) + chunk_errors.reindex(index).fillna(chunk_floor))
+
+        keep = counts.sort_values(ascending=False, kind='stable').index[:self.capacity]
+        self.counts = counts[keep].astype(np.int64)
+        self.errors = errors[keep].astype(np.int64)
+        self.total += int(chunk_counts.sum())
+        return self
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        other_floor = int(other.counts.min()) if len(other.counts) >= other.capacity else 0
+        total = self.total + other.total
+        self.merge_counts(other.counts, other.errors, other_floor)
+        self.total = total
+        return self
+
+    def top(self, n: int) -> pd.Series:
+        """Estimated counts of the n heaviest values (overestimates by at most errors)."""
+        return self.counts.sort_values(ascending=False, kind='stable').head(n)
+
+    @property
+    def error_bound(self) -> float:
+        return self.total / self.capacity
+
+    @property
+    def memory_bytes(self) -> int:
+        return int(self.counts.memory_usage(deep=True) + self.errors.memory_usage(deep=True))
+
+
+class HeavyHitters:
+    """Space-Saving candidates whose overestimated counts are tightened by a Count-Min sketch."""
+
+    def __init__(self, budget_bytes: int = 1 << 16):
+        self.space_saving = SpaceSaving.from_memory_budget(budget_bytes)
+        self.count_min = CountMinSketch.from_memory_budget(budget_bytes)
+
+    def update(self, values: ArrayLike) -> 'HeavyHitters':
+        chunk_counts = pd.Series(values).dropna().value_counts()
+        self.space_saving.merge_counts(chunk_counts)
+        self.count_min.update(chunk_counts.index.to_series(), chunk_counts.to_numpy())
+        return self
+
+    def top(self, n: int) -> Dict[Any, int]:
+        candidates = self.space_saving.top(max(n, min(2 * n, self.space_saving.capacity)))
+        estimates = np.minimum(candidates.to_numpy(), self.count_min.estimate(candidates.index.to_series()))
+        tightened = pd.Series(estimates, index=candidates.index).sort_values(ascending=False, kind='stable')
+        return {key: int(count) for key, count in tightened.head(n).items()}
+
+
+class TDigest:
+    """
+    Merging t-digest for streaming quantiles.
+
+    Incoming values are buffered; each flush sorts centroids and buffer together and
+    re-clusters them in one vectorised pass by binning the k1 scale function
+    k(q) = compression / (2 pi) * asin(2q - 1), so no centroid spans more than one unit of k.
+    """
+
+    def __init__(self, compression: int = 200, buffer_size: int = 10000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer = []
+        self._buffered = 0
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    @classmethod
+    def from_memory_budget(cls, budget_bytes: int) -> 'TDigest':
+        # Roughly compression centroids of two float64 plus the same again for the buffer
+        return cls(max(20, budget_bytes // 32), buffer_size=max(100, budget_bytes // 16))
+
+    def update(self, values: ArrayLike) -> 'TDigest':
+        values = pd.Series(values).dropna().to_numpy(dtype=np.float64)
+        if len(values) == 0:
+            return self
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.count += len(values)
+        self._buffer.append(values)
+        self._buffered += len(values)
+        if self._buffered >= self.buffer_size:
+            self._flush()
+        return self
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        other._flush()
+        self._flush()
+        self.means = np.concatenate([self.means, other.means])
+        self.weights = np.concatenate([self.weights, other.weights])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(self.means, self.weights)
+        return self
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        buffered = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._compress(np.concatenate([self.means, buffered]),
+                       np.concatenate([self.weights, np.ones(len(buffered))]))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+
+        q_left = (np.cumsum(weights) - weights) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+        bins = np.floor(k - k[0]).astype(np.int64)
+
+        _, starts = np.unique(bins, return_index=True)
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q: Union[float, List[float]]) -> Union[float, np.ndarray]:
+        self._flush()
+        scalar = np.isscalar(q)
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if self.count == 0:
+            result = np.full(len(q), np.nan)
+        elif len(self.means) == 1:
+            result = np.full(len(q), self.means[0])
+        else:
+            # Interpolate between centroid centres placed at their cumulative mid-weights
+            centres = (np.cumsum(self.weights) - self.weights / 2) / self.weights.sum()
+            result = np.interp(q, np.concatenate([[0.0], centres, [1.0]]),
+                               np.concatenate([[self.min], self.means, [self.max]]))
+        return float(result[0]) if scalar else result
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.means.nbytes + self.weights.nbytes + self.buffer_size * 8
+
+
+def sketch_error_bounds(budget_bytes: int) -> Dict[str, Any]:
+    """Documented error bounds of the sketches sized from a per-sketch memory budget."""
+    hll = HyperLogLog.from_memory_budget(budget_bytes)
+    count_min = CountMinSketch.from_memory_budget(budget_bytes)
+    space_saving = SpaceSaving.from_memory_budget(budget_bytes)
+    digest = TDigest.from_memory_budget(budget_bytes)
+    return {
+        'memory_budget_bytes_per_sketch': budget_bytes,
+        'distinct_counts': f'HyperLogLog with 2^{hll.precision} registers, '
+                           f'relative standard error {hll.relative_error:.4f}',
+        'frequencies': f'Count-Min {count_min.depth}x{count_min.width}, overestimate <= e*N/{count_min.width} '
+                       f'with probability {1 - math.exp(-count_min.depth):.3f}',
+        'heavy_hitters': f'Space-Saving with {space_saving.capacity} counters, overestimate <= N/{space_saving.capacity}',
+        'quantiles': f't-digest with compression {digest.compression}, '
+                     f'rank error roughly q(1-q)/{digest.compression}'
+    }
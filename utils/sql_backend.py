@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+"""
+Embedded SQL Backend for the Annotation Summary Report
+
+This module runs the AnnotationAnalyzer summary report on DuckDB, an in-process columnar SQL
+engine, directly over the parser's Parquet or CSV outputs. Groupbys, crosstabs, distinct
+counts, quantiles and top-N value counts execute multi-threaded inside the engine and only
+their (small) results are fetched into pandas. Word frequencies stream the text column
+through the Python tokenizer so the vocabulary matches the pandas backend.
+
+The report is assembled by the same section builders as the out-of-core analyzer, fed with
+exact aggregates instead of sketches, so it matches the default pandas report.
+check_backend_parity compares the two backends on a data directory. DuckDB is optional
+(pip install duckdb).
+"""
+
+import math
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union
+from itertools import combinations
+import numpy as np
+import pandas as pd
+
+from analysis_functions import AnnotationAnalyzer
+from streaming_analysis import (StreamingAnnotationAnalyzer, CountFold, MomentFold, find_table,
+                                ENTITY_COLUMNS, RELATION_COLUMNS, METADATA_COLUMNS)
+from text_statistics import WordFrequencyCounter
+
+# pandas.read_csv default missing-value markers, so both backends see the same nulls
+PANDAS_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+                    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+NUMERIC_COLUMNS = {'length', 'token_count'}
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class ExactSummary:
+    """Exact stand-in for a sketch: a distinct count, ordered value counts or quantiles from the engine."""
+
+    def __init__(self, distinct: Optional[int] = None, top_counts: Optional[Dict[Any, int]] = None,
+                 quantiles: Optional[Dict[float, float]] = None):
+        self.distinct = distinct
+        self.top_counts = top_counts or {}
+        self.quantiles = quantiles or {}
+
+    def estimate(self) -> int:
+        return self.distinct
+
+    def top(self, n: int) -> Dict[Any, int]:
+        return dict(list(self.top_counts.items())[:n])
+
+    def quantile(self, q: Union[float, List[float]]) -> Union[float, np.ndarray]:
+        if np.isscalar(q):
+            return self.quantiles.get(q, np.nan)
+        return np.array([self.quantiles.get(value, np.nan) for value in q])
+
+
+class DuckDBAnnotationAnalyzer(StreamingAnnotationAnalyzer):
+    """Summary report of AnnotationAnalyzer computed with DuckDB over the parsed tables."""
+
+    def __init__(self, data_dir: str, database: str = ':memory:', threads: Optional[int] = None,
+                 word_frequency_options: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            data_dir: Directory with entities, relations and documents tables (.parquet or .csv)
+            database: DuckDB database file (':memory:' keeps tables in memory, a file lets DuckDB spill)
+            threads: Engine worker threads (None uses DuckDB's default of all cores)
+            word_frequency_options: WordFrequencyCounter options for the word-frequency fields
+        """
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError('The DuckDB backend requires duckdb (pip install duckdb)')
+        super().__init__(data_dir, word_frequency_options=word_frequency_options)
+
+        self.connection = duckdb.connect(database)
+        if threads:
+            self.connection.execute(f'SET threads TO {int(threads)}')
+
+        # Materialise the needed columns once; table rowids keep file order for tie-breaking
+        self._create_table('entities', self.entities_path, ENTITY_COLUMNS, self.entity_columns)
+        self._create_table('relations', self.relations_path, RELATION_COLUMNS, self.relation_columns)
+        years = self.document_analyzer.document_dimension[['filename', 'year']].dropna(subset=['filename'])
+        self.connection.register('document_years', years.drop_duplicates('filename'))
+
+    def _create_table(self, name: str, path: Path, columns: List[str], available: set):
+        if path.suffix == '.parquet':
+            source = f'read_parquet({_literal(path)})'
+        else:
+            nulls = ', '.join(_literal(value) for value in PANDAS_NA_VALUES)
+            source = f'read_csv({_literal(path)}, header = true, all_varchar = true, nullstr = [{nulls}])'
+        selected = [f'TRY_CAST({_quote(column)} AS DOUBLE) AS {_quote(column)}' if column in NUMERIC_COLUMNS
+                    else f'CAST({_quote(column)} AS VARCHAR) AS {_quote(column)}'
+                    for column in columns if column in available]
+        self.connection.execute(f'CREATE OR REPLACE TABLE {name} AS SELECT {", ".join(selected)} FROM {source}')
+
+    def _execution_metadata(self) -> Dict[str, Any]:
+        import duckdb
+        return {'backend': {'engine': 'duckdb', 'version': duckdb.__version__}}
+
+    def _query(self, sql: str) -> pd.DataFrame:
+        frame = self.connection.execute(sql).fetchdf()
+        # Engine NULLs become NaN, matching pandas' missing values in keys
+        for column in frame.columns[frame.dtypes == object]:
+            frame[column] = frame[column].where(frame[column].notna(), np.nan)
+        return frame
+
+    def _scalar(self, sql: str) -> Any:
+        return self.connection.execute(sql).fetchone()[0]
+
+    @staticmethod
+    def _where(*conditions: Optional[str]) -> str:
+        conditions = [condition for condition in conditions if condition]
+        return f'WHERE {" AND ".join(conditions)}' if conditions else ''
+
+    @staticmethod
+    def _source(table: str, with_year: bool = False) -> str:
+        if with_year:
+            return f'(SELECT t.*, y.year FROM {table} t LEFT JOIN document_years y USING (filename))'
+        return table
+
+    def _counts(self, table: str, columns: List[str], where: Optional[str] = None,
+                dropna: bool = True) -> CountFold:
+        fold = CountFold(columns, dropna)
+        keys = ', '.join(_quote(column) for column in columns)
+        not_null = ' AND '.join(f'{_quote(column)} IS NOT NULL' for column in columns) if dropna else None
+        frame = self._query(f'SELECT {keys}, count(*) AS n FROM {self._source(table, "year" in columns)} '
+                            f'{self._where(where, not_null)} GROUP BY {keys}')
+        if not frame.empty:
+            fold.counts = frame.set_index(columns)['n']
+        return fold
+
+    def _moments(self, table: str, value: str, group_columns: Optional[List[str]] = None,
+                 where: Optional[str] = None) -> MomentFold:
+        fold = MomentFold(value, group_columns)
+        keys = ', '.join(_quote(column) for column in group_columns or [])
+        not_null = ' AND '.join(f'{_quote(column)} IS NOT NULL' for column in group_columns or [])
+        frame = self._query(
+            f'SELECT {keys + ", " if keys else ""}count({value}) AS count, avg({value}) AS mean, '
+            f'var_samp({value}) AS var, min({value}) AS min, max({value}) AS max '
+            f'FROM {table} {self._where(where, not_null)} {"GROUP BY " + keys if keys else ""}'
+        )
+        frame = frame[frame['count'] > 0]
+        if not frame.empty:
+            frame = frame.set_index(group_columns) if group_columns else frame.set_axis([0])
+            frame['m2'] = frame['var'].fillna(0) * (frame['count'] - 1)
+            fold.state = frame[['count', 'mean', 'min', 'max', 'm2']]
+        return fold
+
+    def _quantiles(self, table: str, value: str, quantiles: List[float], group_column: Optional[str] = None,
+                   where: Optional[str] = None) -> Union[ExactSummary, Dict[Any, ExactSummary]]:
+        selected = ', '.join(f'quantile_cont({value}, {q}) AS "q{i}"' for i, q in enumerate(quantiles))
+        if group_column is None:
+            frame = self._query(f'SELECT {selected} FROM {table} {self._where(where)}')
+            return ExactSummary(quantiles=dict(zip(quantiles, frame.iloc[0].tolist())))
+        frame = self._query(f'SELECT {_quote(group_column)}, {selected} FROM {table} '
+                            f'{self._where(where, f"{_quote(group_column)} IS NOT NULL")} GROUP BY 1')
+        return {row[0]: ExactSummary(quantiles=dict(zip(quantiles, row[1:])))
+                for row in frame.itertuples(index=False)}
+
+    def _top(self, table: str, column: str, n: int, partition: Optional[str] = None,
+             where: Optional[str] = None) -> Union[ExactSummary, Dict[Any, ExactSummary]]:
+        # Ties keep first-occurrence order, as Series.value_counts does
+        keys = f'{_quote(partition)}, {_quote(column)}' if partition else _quote(column)
+        over = f'PARTITION BY {_quote(partition)} ' if partition else ''
+        frame = self._query(
+            f'SELECT {keys}, count(*) AS n, min(rowid) AS first_row FROM {table} '
+            f'{self._where(where, f"{_quote(column)} IS NOT NULL")} GROUP BY {keys} '
+            f'QUALIFY row_number() OVER ({over}ORDER BY n DESC, first_row) <= {int(n)} '
+            f'ORDER BY {_quote(partition) + ", " if partition else ""}n DESC, first_row'
+        )
+        if partition is None:
+            return ExactSummary(top_counts=dict(zip(frame[column], frame['n'].astype(int))))
+        return {key: ExactSummary(top_counts=dict(zip(group[column], group['n'].astype(int))))
+                for key, group in frame.groupby(partition, sort=False)}
+
+    def _distinct(self, table: str, column: str, group_column: Optional[str] = None,
+                  where: Optional[str] = None) -> Union[ExactSummary, Dict[Any, ExactSummary]]:
+        if group_column is None:
+            return ExactSummary(distinct=int(self._scalar(
+                f'SELECT count(DISTINCT {_quote(column)}) FROM {table} {self._where(where)}')))
+        frame = self._query(f'SELECT {_quote(group_column)}, count(DISTINCT {_quote(column)}) AS n FROM {table} '
+                            f'{self._where(where, f"{_quote(group_column)} IS NOT NULL")} GROUP BY 1')
+        return {key: ExactSummary(distinct=int(count)) for key, count in zip(frame[group_column], frame['n'])}
+
+    def _documents(self, table: str, where: Optional[str] = None) -> set:
+        frame = self._query(f'SELECT DISTINCT filename FROM {table} {self._where(where, "filename IS NOT NULL")}')
+        return set(frame['filename'])
+
+    def _rows(self, table: str, where: Optional[str] = None) -> int:
+        return int(self._scalar(f'SELECT count(*) FROM {table} {self._where(where)}'))
+
+    def _fold_entities(self) -> Dict[str, Any]:
+        has = self.entity_columns.__contains__
+        assunto = "entity_label ILIKE '%assunto%'" + (' AND fronteira IS NULL' if has('fronteira') else '')
+        fronteira = 'fronteira IS NOT NULL' if has('fronteira') else 'false'
+
+        words = WordFrequencyCounter(**self.word_frequency_options)
+        cursor = self.connection.execute(f'SELECT text FROM entities WHERE {assunto} AND text IS NOT NULL ORDER BY rowid')
+        while True:
+            rows = cursor.fetchmany(10_000)
+            if not rows:
+                break
+            words.update(row[0] for row in rows)
+
+        label_counts = self._counts('entities', ['entity_label'])
+        label_texts = {label: ExactSummary() for label in label_counts.result().index}
+        label_texts.update(self._top('entities', 'text', 10, partition='entity_label'))
+        label_quantiles = self._quantiles('entities', 'length', [0.5], 'entity_label')
+        token_quantiles = self._quantiles('entities', 'token_count', [0.5], 'entity_label')
+
+        folds = {
+            'rows': self._rows('entities'),
+            'labels': label_counts,
+            'municipalities': self._counts('entities', ['municipality']),
+            'municipality_label': self._counts('entities', ['municipality', 'entity_label']),
+            'year_label': self._counts('entities', ['year', 'entity_label']),
+            'filename_label': self._counts('entities', ['filename', 'entity_label'], dropna=False),
+            'unlabelled_rows': self._rows('entities', 'entity_label IS NULL'),
+            'length': self._moments('entities', 'length'),
+            'tokens': self._moments('entities', 'token_count'),
+            'length_digest': self._quantiles('entities', 'length', [0.5, 0.25, 0.75, 0.95]),
+            'label_length': self._moments('entities', 'length', ['entity_label']),
+            'label_tokens': self._moments('entities', 'token_count', ['entity_label']),
+            'label_length_digests': label_quantiles,
+            'label_token_digests': token_quantiles,
+            'label_texts': label_texts,
+            'assunto_rows': self._rows('entities', assunto),
+            'assunto_documents': self._documents('entities', assunto),
+            'assunto_distinct': self._distinct('entities', 'text', where=assunto),
+            'assunto_texts': self._top('entities', 'text', 20, where=assunto),
+            'assunto_words': words,
+            'assunto_length': self._moments('entities', 'length', where=assunto),
+            'assunto_tokens': self._moments('entities', 'token_count', where=assunto),
+            'assunto_tema': self._counts('entities', ['tema'], assunto, dropna=False) if has('tema') else CountFold(['tema']),
+            'resumo_length': self._moments('entities', 'length(resumo)', where=f'{assunto} AND resumo IS NOT NULL')
+                             if has('resumo') else MomentFold('resumo'),
+            'resumo_texts': self._top('entities', 'resumo', 10, where=assunto) if has('resumo') else ExactSummary(),
+            'assunto_muni_text_count': self._counts('entities', ['municipality'], f'{assunto} AND text IS NOT NULL'),
+            'assunto_muni_distinct': self._distinct('entities', 'text', 'municipality', where=assunto),
+            'assunto_muni_length': self._moments('entities', 'length', ['municipality'], where=assunto),
+            'assunto_muni_tokens': self._moments('entities', 'token_count', ['municipality'], where=assunto),
+            'fronteira_documents': self._documents('entities', fronteira),
+            'fronteira_types': self._counts('entities', ['fronteira']) if has('fronteira') else CountFold(['fronteira']),
+            'fronteira_municipality': self._counts('entities', ['municipality', 'fronteira'])
+                                      if has('fronteira') else CountFold(['municipality', 'fronteira']),
+            'fronteira_label': self._counts('entities', ['entity_label', 'fronteira'])
+                               if has('fronteira') else CountFold(['entity_label', 'fronteira']),
+            'fronteira_length': self._moments('entities', 'length', where=fronteira),
+            'fronteira_tokens': self._moments('entities', 'token_count', where=fronteira),
+            'fronteira_type_length': self._moments('entities', 'length', ['fronteira'])
+                                     if has('fronteira') else MomentFold('length', ['fronteira']),
+            'cotabulation': None
+        }
+
+        for field in ('tipo_reuniao', 'presenca', 'partido'):
+            folds[field] = self._counts('entities', [field]) if has(field) else CountFold([field])
+        folds['municipality_partido'] = self._counts('entities', ['municipality', 'partido']) \
+            if has('partido') else CountFold(['municipality', 'partido'])
+        for field, n in (('participantes', 20), ('horario', 15)):
+            present = f'{_quote(field)} IS NOT NULL'
+            folds[f'{field}_rows'] = self._rows('entities', present) if has(field) else 0
+            folds[f'{field}_documents'] = self._documents('entities', present) if has(field) else set()
+            folds[field] = self._top('entities', field, n) if has(field) else ExactSummary()
+
+        cotabulation_columns = [column for column in METADATA_COLUMNS if has(column)]
+        if len(cotabulation_columns) > 1:
+            pair_queries = [
+                f'SELECT {_literal(first)} AS field_1, {_literal(second)} AS field_2, '
+                f'{_quote(first)} AS value_1, {_quote(second)} AS value_2, count(*) AS count FROM entities '
+                f'WHERE {_quote(first)} IS NOT NULL AND {_quote(second)} IS NOT NULL GROUP BY 3, 4'
+                for first, second in combinations(cotabulation_columns, 2)
+            ]
+            cotabulation = self._query(' UNION ALL '.join(pair_queries))
+            folds['cotabulation'] = cotabulation.set_index(['field_1', 'field_2', 'value_1', 'value_2'])['count']
+
+        return folds
+
+    def _fold_relations(self) -> Dict[str, Any]:
+        has = self.relation_columns.__contains__
+        folds = {
+            'rows': self._rows('relations'),
+            'labels': self._counts('relations', ['relation_label']),
+            'posicionamento_rows': self._rows('relations', 'posicionamento IS NOT NULL') if has('posicionamento') else 0,
+            'resultado_rows': self._rows('relations', 'resultado IS NOT NULL') if has('resultado') else 0
+        }
+        for name, columns, dropna in (('posicionamento', ['posicionamento'], False),
+                                      ('resultado', ['resultado'], False),
+                                      ('municipality_posicionamento', ['municipality', 'posicionamento'], True),
+                                      ('municipality_resultado', ['municipality', 'resultado'], True),
+                                      ('year_posicionamento', ['year', 'posicionamento'], True),
+                                      ('posicionamento_resultado', ['posicionamento', 'resultado'], True),
+                                      ('filename_posicionamento', ['filename', 'posicionamento'], True)):
+            available = all(has(column) for column in columns if column != 'year')
+            folds[name] = self._counts('relations', columns, dropna=dropna) if available else CountFold(columns, dropna)
+        return folds
+
+
+def compare_reports(expected: Any, actual: Any, rel_tol: float = 1e-9, path: str = '') -> List[str]:
+    """
+    Paths at which two report dictionaries differ.
+
+    Floats are compared with a relative tolerance and NaN equals NaN (also as dict keys).
+    """
+    def key(value):
+        return 'nan' if isinstance(value, float) and math.isnan(value) else value
+
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        expected = {key(k): v for k, v in expected.items()}
+        actual = {key(k): v for k, v in actual.items()}
+        differences = [f'{path}/{k}: missing in {"actual" if k in expected else "expected"}'
+                       for k in set(expected) ^ set(actual)]
+        for k in set(expected) & set(actual):
+            differences += compare_reports(expected[k], actual[k], rel_tol, f'{path}/{k}')
+        return differences
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        if len(expected) != len(actual):
+            return [f'{path}: length {len(expected)} != {len(actual)}']
+        return [difference for i, (a, b) in enumerate(zip(expected, actual))
+                for difference in compare_reports(a, b, rel_tol, f'{path}[{i}]')]
+    try:
+        if isinstance(expected, (float, np.floating)) or isinstance(actual, (float, np.floating)):
+            if pd.isna(expected) and pd.isna(actual):
+                return []
+            if math.isclose(float(expected), float(actual), rel_tol=rel_tol, abs_tol=1e-12):
+                return []
+        elif expected == actual:
+            return []
+    except (TypeError, ValueError):
+        pass
+    return [f'{path}: {expected!r} != {actual!r}']
+
+
+def check_backend_parity(data_dir: str, rel_tol: float = 1e-9) -> List[str]:
+    """
+    Run the summary report on the pandas and DuckDB backends and list the differing paths.
+
+    Args:
+        data_dir: Directory with the parsed tables (.parquet or .csv)
+        rel_tol: Relative tolerance for floating-point fields (summation order differs between engines)
+    """
+    data_dir = Path(data_dir)
+    tables = {}
+    for name in ('entities', 'relations', 'documents'):
+        path = find_table(data_dir, name)
+        tables[name] = pd.read_parquet(path) if path.suffix == '.parquet' else pd.read_csv(path)
+
+    expected = AnnotationAnalyzer(tables['entities'], tables['relations'], tables['documents']).generate_summary_report()
+    actual = DuckDBAnnotationAnalyzer(data_dir).generate_summary_report()
+    for report in (expected, actual):
+        report['metadata'].pop('analysis_date')
+    actual['metadata'].pop('backend')
+    return compare_reports(expected, actual, rel_tol)
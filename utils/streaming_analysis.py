@@ -0,0 +1,699 @@
+#!/usr/bin/env python
+"""
+Out-of-Core Analysis for Large INCEpTION Exports
+
+This module produces the AnnotationAnalyzer summary report without loading the entity and
+relation tables into memory. Each table is streamed once in row chunks (CSV chunks or
+Parquet row groups), reading only the columns the report needs, and every chunk is folded
+into running aggregates: value counts, mergeable moments, document sets and the bounded
+sketches from sketches.py. The document table (one row per document) is loaded whole.
+
+Fields that need the full column in memory are estimated with the same sketches as the
+analyzer's sketch mode: distinct texts (HyperLogLog), top-N texts (Space-Saving/Count-Min)
+and medians/percentiles (t-digest). Everything else matches the in-memory report.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+from analysis_functions import (AnnotationAnalyzer, ContingencyTable, pairwise_cotabulation, REPORT_SECTIONS,
+                                resolve_report_sections)
+from sketches import HyperLogLog, HeavyHitters, TDigest, sketch_error_bounds
+from text_statistics import WordFrequencyCounter
+
+METADATA_COLUMNS = ['fronteira', 'posicionamento', 'tema', 'tipo_reuniao', 'presenca', 'partido']
+
+ENTITY_TEXT_COLUMNS = ['filename', 'municipality', 'entity_label', 'text', 'resumo', 'participantes',
+                       'horario'] + METADATA_COLUMNS
+
+ENTITY_COLUMNS = ENTITY_TEXT_COLUMNS + ['length', 'token_count']
+
+RELATION_COLUMNS = ['filename', 'municipality', 'relation_label', 'posicionamento', 'resultado']
+
+DOCUMENT_COLUMNS = ['filename', 'municipality', 'date', 'text_length', 'token_count',
+                    'entity_count', 'relation_count']
+
+
+def find_table(data_dir: Path, name: str) -> Path:
+    """Path of a parsed table, preferring Parquet over CSV."""
+    for suffix in ('.parquet', '.csv'):
+        path = Path(data_dir) / f'{name}{suffix}'
+        if path.exists():
+            return path
+    raise FileNotFoundError(f'No {name}.parquet or {name}.csv in {data_dir}')
+
+
+def table_columns(path: Path) -> List[str]:
+    """Column names of a CSV or Parquet table without reading its rows."""
+    if path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).schema_arrow.names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def read_table(path: Path, columns: List[str]) -> pd.DataFrame:
+    """Read the available subset of columns of a whole CSV or Parquet table."""
+    available = set(table_columns(path))
+    columns = [column for column in columns if column in available]
+    if path.suffix == '.parquet':
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_table_chunks(path: Path, columns: Optional[List[str]] = None, chunksize: int = 100_000,
+                      text_columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV or Parquet table in row chunks.
+
+    Args:
+        path: Table path (.csv or .parquet; Parquet requires pyarrow)
+        columns: Columns to read (missing ones are skipped); None reads all
+        chunksize: Rows per chunk (Parquet batches never span row groups)
+        text_columns: CSV columns to read as strings, so a chunk where a column is entirely
+            empty or numeric-looking does not change its type
+    """
+    path = Path(path)
+    if columns is not None:
+        available = set(table_columns(path))
+        columns = [column for column in columns if column in available]
+
+    if path.suffix == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('Reading Parquet tables requires pyarrow (pip install pyarrow)')
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        dtype = {column: str for column in text_columns or []}
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize, dtype=dtype)
+
+
+class CountFold:
+    """Running counts of the value combinations of one or more columns."""
+
+    def __init__(self, columns: List[str], dropna: bool = True):
+        self.columns = columns
+        self.dropna = dropna
+        self.counts = None
+
+    def update(self, chunk: pd.DataFrame):
+        if chunk.empty or not all(column in chunk.columns for column in self.columns):
+            return
+        counts = chunk.groupby(self.columns, dropna=self.dropna).size()
+        self.counts = counts if self.counts is None else self.counts.add(counts, fill_value=0)
+
+    def result(self) -> pd.Series:
+        if self.counts is None:
+            return pd.Series(dtype=np.int64)
+        return self.counts.astype(np.int64).sort_index()
+
+    def table(self) -> pd.DataFrame:
+        """Two-column counts laid out like groupby(...).size().unstack(fill_value=0)."""
+        return self.result().unstack(fill_value=0)
+
+    def contingency_table(self) -> ContingencyTable:
+        table = self.table()
+        return ContingencyTable(self.columns[0], self.columns[1], table.index, table.columns, table.to_numpy())
+
+
+class MomentFold:
+    """Running count, mean, variance, min and max of a column, optionally per group (Chan et al. merge)."""
+
+    def __init__(self, value_column: str, group_columns: Optional[List[str]] = None):
+        self.value_column = value_column
+        self.group_columns = group_columns
+        self.state = None
+
+    def update(self, chunk: pd.DataFrame, values: Optional[pd.Series] = None):
+        if values is None:
+            if self.value_column not in chunk.columns:
+                return
+            values = chunk[self.value_column]
+        keys = [chunk[column] for column in self.group_columns] if self.group_columns else np.zeros(len(chunk), dtype=np.int8)
+        grouped = values.groupby(keys).agg(['count', 'mean', 'var', 'min', 'max'])
+        grouped = grouped[grouped['count'] > 0]
+        if grouped.empty:
+            return
+        grouped['m2'] = grouped['var'].fillna(0) * (grouped['count'] - 1)
+        grouped = grouped.drop(columns='var')
+        if self.state is None:
+            self.state = grouped
+            return
+
+        index = self.state.index.union(grouped.index)
+        a = self.state.reindex(index)
+        b = grouped.reindex(index)
+        n_a, n_b = a['count'].fillna(0), b['count'].fillna(0)
+        n = n_a + n_b
+        delta = b['mean'].fillna(0) - a['mean'].fillna(0)
+        self.state = pd.DataFrame({
+            'count': n,
+            'mean': (a['mean'].fillna(0) * n_a + b['mean'].fillna(0) * n_b) / n,
+            'min': np.fmin(a['min'], b['min']),
+            'max': np.fmax(a['max'], b['max']),
+            'm2': a['m2'].fillna(0) + b['m2'].fillna(0) + delta ** 2 * n_a * n_b / n
+        }, index=index)
+
+    def result(self) -> pd.DataFrame:
+        """count, mean, std (ddof=1), min, max per group (a single row 0 when ungrouped)."""
+        if self.state is None:
+            return pd.DataFrame(columns=['count', 'mean', 'std', 'min', 'max'])
+        state = self.state.sort_index()
+        return pd.DataFrame({
+            'count': state['count'].astype(np.int64),
+            'mean': state['mean'],
+            'std': np.sqrt(state['m2'] / (state['count'] - 1)).where(state['count'] > 1),
+            'min': state['min'],
+            'max': state['max']
+        })
+
+    def overall(self, statistic: str) -> float:
+        result = self.result()
+        return result[statistic].iloc[0] if not result.empty else np.nan
+
+
+class StreamingAnnotationAnalyzer:
+    """Summary report of AnnotationAnalyzer computed from streamed table chunks."""
+
+    def __init__(self, data_dir: str, chunksize: int = 100_000, sketch_memory_budget: int = 1 << 16,
+                 word_frequency_options: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            data_dir: Directory with entities, relations and documents tables (.parquet or .csv)
+            chunksize: Rows per streamed chunk
+            sketch_memory_budget: Memory budget in bytes for each sketch
+            word_frequency_options: WordFrequencyCounter options for the word-frequency fields
+        """
+        self.data_dir = Path(data_dir)
+        self.chunksize = chunksize
+        self.sketch_memory_budget = sketch_memory_budget
+        self.word_frequency_options = word_frequency_options or {}
+
+        self.entities_path = find_table(self.data_dir, 'entities')
+        self.relations_path = find_table(self.data_dir, 'relations')
+        self.documents_df = read_table(find_table(self.data_dir, 'documents'), DOCUMENT_COLUMNS)
+        self.entity_columns = set(table_columns(self.entities_path))
+        self.relation_columns = set(table_columns(self.relations_path))
+
+        # Document-only analyses (and the document dimension) come from an analyzer without rows
+        self.document_analyzer = AnnotationAnalyzer(
+            pd.DataFrame(columns=['filename', 'municipality', 'entity_label']),
+            pd.DataFrame(columns=['filename', 'municipality', 'relation_label']),
+            self.documents_df
+        )
+
+    def _new_sketch(self, kind):
+        return kind.from_memory_budget(self.sketch_memory_budget) if kind is not HeavyHitters \
+            else HeavyHitters(self.sketch_memory_budget)
+
+    def _with_year(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        chunk = chunk.assign(doc_key=self.document_analyzer._document_keys(chunk))
+        return chunk.assign(year=self.document_analyzer.document_attribute(chunk, 'year'))
+
+    def _fold_entities(self) -> Dict[str, Any]:
+        """Single pass over the entity table folding every entity aggregate of the report."""
+        has = self.entity_columns.__contains__
+        folds = {
+            'rows': 0,
+            'labels': CountFold(['entity_label']),
+            'municipalities': CountFold(['municipality']),
+            'municipality_label': CountFold(['municipality', 'entity_label']),
+            'year_label': CountFold(['year', 'entity_label']),
+            'filename_label': CountFold(['filename', 'entity_label'], dropna=False),
+            'unlabelled_rows': 0,
+            'length': MomentFold('length'),
+            'tokens': MomentFold('token_count'),
+            'length_digest': self._new_sketch(TDigest),
+            'label_length': MomentFold('length', ['entity_label']),
+            'label_tokens': MomentFold('token_count', ['entity_label']),
+            'label_length_digests': defaultdict(lambda: self._new_sketch(TDigest)),
+            'label_token_digests': defaultdict(lambda: self._new_sketch(TDigest)),
+            'label_texts': defaultdict(lambda: self._new_sketch(HeavyHitters)),
+            # Assunto entities (ASSUNTO labels without a Fronteira marker)
+            'assunto_rows': 0,
+            'assunto_documents': set(),
+            'assunto_distinct': self._new_sketch(HyperLogLog),
+            'assunto_texts': self._new_sketch(HeavyHitters),
+            'assunto_words': WordFrequencyCounter(**self.word_frequency_options),
+            'assunto_length': MomentFold('length'),
+            'assunto_tokens': MomentFold('token_count'),
+            'assunto_tema': CountFold(['tema'], dropna=False),
+            'resumo_length': MomentFold('resumo'),
+            'resumo_texts': self._new_sketch(HeavyHitters),
+            'assunto_muni_text_count': CountFold(['municipality']),
+            'assunto_muni_distinct': defaultdict(lambda: self._new_sketch(HyperLogLog)),
+            'assunto_muni_length': MomentFold('length', ['municipality']),
+            'assunto_muni_tokens': MomentFold('token_count', ['municipality']),
+            # Fronteira markers
+            'fronteira_documents': set(),
+            'fronteira_types': CountFold(['fronteira']),
+            'fronteira_municipality': CountFold(['municipality', 'fronteira']),
+            'fronteira_label': CountFold(['entity_label', 'fronteira']),
+            'fronteira_length': MomentFold('length'),
+            'fronteira_tokens': MomentFold('token_count'),
+            'fronteira_type_length': MomentFold('length', ['fronteira']),
+            # Metadata fields
+            'tipo_reuniao': CountFold(['tipo_reuniao']),
+            'participantes_rows': 0,
+            'participantes_documents': set(),
+            'participantes': self._new_sketch(HeavyHitters),
+            'presenca': CountFold(['presenca']),
+            'partido': CountFold(['partido']),
+            'municipality_partido': CountFold(['municipality', 'partido']),
+            'horario_rows': 0,
+            'horario_documents': set(),
+            'horario': self._new_sketch(HeavyHitters),
+            'cotabulation': None
+        }
+        cotabulation_columns = [column for column in METADATA_COLUMNS if has(column)]
+
+        for chunk in iter_table_chunks(self.entities_path, ENTITY_COLUMNS, self.chunksize, ENTITY_TEXT_COLUMNS):
+            chunk = self._with_year(chunk)
+            folds['rows'] += len(chunk)
+            for name in ('labels', 'municipalities', 'municipality_label', 'year_label', 'filename_label',
+                         'length', 'tokens', 'label_length', 'label_tokens'):
+                folds[name].update(chunk)
+            folds['length_digest'].update(chunk['length'])
+            folds['unlabelled_rows'] += int(chunk['entity_label'].isna().sum())
+            for label, label_rows in chunk.groupby('entity_label'):
+                folds['label_length_digests'][label].update(label_rows['length'])
+                folds['label_token_digests'][label].update(label_rows['token_count'])
+                folds['label_texts'][label].update(label_rows['text'])
+
+            fronteira = chunk['fronteira'] if has('fronteira') else pd.Series(np.nan, index=chunk.index)
+            assunto = chunk[chunk['entity_label'].str.contains('ASSUNTO', case=False, na=False) & fronteira.isna()]
+            if not assunto.empty:
+                texts = assunto['text'].dropna()
+                folds['assunto_rows'] += len(assunto)
+                folds['assunto_documents'].update(assunto['filename'].unique())
+                folds['assunto_distinct'].update(texts)
+                folds['assunto_texts'].update(texts)
+                folds['assunto_words'].update(texts)
+                folds['assunto_length'].update(assunto)
+                folds['assunto_tokens'].update(assunto)
+                folds['assunto_tema'].update(assunto)
+                if has('resumo'):
+                    resumo = assunto['resumo'].dropna().astype(str)
+                    folds['resumo_length'].update(resumo.to_frame(), resumo.str.len())
+                    folds['resumo_texts'].update(resumo)
+                folds['assunto_muni_text_count'].update(assunto.dropna(subset=['text']))
+                for municipality, muni_rows in assunto.groupby('municipality'):
+                    folds['assunto_muni_distinct'][municipality].update(muni_rows['text'])
+                folds['assunto_muni_length'].update(assunto)
+                folds['assunto_muni_tokens'].update(assunto)
+
+            if has('fronteira'):
+                markers = chunk[chunk['fronteira'].notna()]
+                folds['fronteira_documents'].update(markers['filename'].unique())
+                for name in ('fronteira_types', 'fronteira_municipality', 'fronteira_label',
+                             'fronteira_length', 'fronteira_tokens', 'fronteira_type_length'):
+                    folds[name].update(markers)
+
+            for name in ('tipo_reuniao', 'presenca', 'partido', 'municipality_partido'):
+                folds[name].update(chunk)
+            for field in ('participantes', 'horario'):
+                if has(field):
+                    rows = chunk[chunk[field].notna()]
+                    folds[f'{field}_rows'] += len(rows)
+                    folds[f'{field}_documents'].update(rows['filename'].unique())
+                    folds[field].update(rows[field])
+
+            if len(cotabulation_columns) > 1:
+                pairs = pairwise_cotabulation(chunk, cotabulation_columns)
+                pairs = pairs.groupby(['field_1', 'field_2', 'value_1', 'value_2'], sort=False)['count'].sum()
+                cotabulation = folds['cotabulation']
+                folds['cotabulation'] = pairs if cotabulation is None else cotabulation.add(pairs, fill_value=0)
+
+        return folds
+
+    def _fold_relations(self) -> Dict[str, Any]:
+        """Single pass over the relation table."""
+        folds = {
+            'rows': 0,
+            'labels': CountFold(['relation_label']),
+            'posicionamento_rows': 0,
+            'resultado_rows': 0,
+            'posicionamento': CountFold(['posicionamento'], dropna=False),
+            'resultado': CountFold(['resultado'], dropna=False),
+            'municipality_posicionamento': CountFold(['municipality', 'posicionamento']),
+            'municipality_resultado': CountFold(['municipality', 'resultado']),
+            'year_posicionamento': CountFold(['year', 'posicionamento']),
+            'posicionamento_resultado': CountFold(['posicionamento', 'resultado']),
+            'filename_posicionamento': CountFold(['filename', 'posicionamento'])
+        }
+        for chunk in iter_table_chunks(self.relations_path, RELATION_COLUMNS, self.chunksize, RELATION_COLUMNS):
+            chunk = self._with_year(chunk)
+            folds['rows'] += len(chunk)
+            if 'posicionamento' in chunk.columns:
+                folds['posicionamento_rows'] += int(chunk['posicionamento'].notna().sum())
+            if 'resultado' in chunk.columns:
+                folds['resultado_rows'] += int(chunk['resultado'].notna().sum())
+            for name, fold in folds.items():
+                if isinstance(fold, CountFold):
+                    fold.update(chunk)
+        return folds
+
+    def generate_summary_report(self, sections: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Build the AnnotationAnalyzer summary report from one streamed pass over each table.
+
+        Args:
+            sections: Section names or prefixes to include (None includes every section); a
+                table is only streamed when a selected section reads it
+        """
+        selected = resolve_report_sections(sections)
+        builders = {
+            'corpus_statistics': (self._corpus_statistics, ('entities', 'relations')),
+            'municipality_analysis': (self._municipality_patterns, ('entities', 'relations')),
+            'statistical_tests': (self._statistical_tests, ('entities', 'relations')),
+            'temporal_analysis': (self._temporal_patterns, ('entities', 'relations')),
+            'entity_analysis': (self._entity_patterns, ('entities',)),
+            'posicionamento_analysis': (self._posicionamento_patterns, ('relations',)),
+            'assunto_analysis': (self._assunto_patterns, ('entities',)),
+            'fronteiras_analysis': (self._fronteiras_patterns, ('entities',)),
+            'metadata_analysis': (self._metadata_patterns, ('entities',))
+        }
+        needed = {table for section in selected for table in builders[section][1]}
+        folds = {}
+        if 'entities' in needed:
+            folds['entities'] = self._fold_entities()
+        if 'relations' in needed:
+            folds['relations'] = self._fold_relations()
+
+        report = {
+            'metadata': {
+                'analysis_date': pd.Timestamp.now().isoformat(),
+                'total_files_analyzed': len(self.documents_df),
+                'analysis_scope': 'Complete INCEpTION annotation corpus with enhanced metadata analysis',
+            }
+        }
+        report['metadata'].update(self._execution_metadata())
+        if len(selected) < len(REPORT_SECTIONS):
+            report['metadata']['selected_sections'] = selected
+        for section in selected:
+            build, tables = builders[section]
+            report[section] = build(*(folds[table] for table in tables))
+        return report
+
+    def _execution_metadata(self) -> Dict[str, Any]:
+        return {'chunked_mode': {'chunksize': self.chunksize, **sketch_error_bounds(self.sketch_memory_budget)}}
+
+    def _corpus_statistics(self, entities: Dict, relations: Dict) -> Dict[str, Any]:
+        stats_dict = self.document_analyzer.compute_corpus_statistics()
+        documents_df = self.documents_df
+
+        if entities['rows']:
+            label_counts = entities['labels'].result()
+            stats_dict['entity_overview'] = {
+                'total_entities': entities['rows'],
+                'unique_entity_types': len(label_counts),
+                'entity_types': label_counts.sort_values(ascending=False, kind='stable').to_dict(),
+                'documents_with_entities': documents_df[documents_df['entity_count'] > 0].shape[0],
+                'avg_entities_per_document': documents_df['entity_count'].mean(),
+                'entity_coverage': documents_df[documents_df['entity_count'] > 0].shape[0] / len(documents_df)
+            }
+
+            length = entities['length']
+            quantiles = entities['length_digest'].quantile([0.5, 0.25, 0.75, 0.95])
+            stats_dict['entity_characteristics'] = {
+                'avg_entity_length_chars': length.overall('mean'),
+                'avg_entity_length_tokens': entities['tokens'].overall('mean'),
+                'entity_length_distribution': {
+                    'min': length.overall('min'),
+                    'max': length.overall('max'),
+                    'median': float(quantiles[0]),
+                    'std': length.overall('std'),
+                    'percentile_25': float(quantiles[1]),
+                    'percentile_75': float(quantiles[2]),
+                    'percentile_95': float(quantiles[3])
+                }
+            }
+
+        if relations['rows']:
+            label_counts = relations['labels'].result()
+            stats_dict['relation_overview'] = {
+                'total_relations': relations['rows'],
+                'unique_relation_types': len(label_counts),
+                'relation_types': label_counts.sort_values(ascending=False, kind='stable').to_dict(),
+                'documents_with_relations': documents_df[documents_df['relation_count'] > 0].shape[0],
+                'avg_relations_per_document': documents_df['relation_count'].mean()
+            }
+            for field in ('posicionamento', 'resultado'):
+                if field in self.relation_columns:
+                    stats_dict[f'{field}_analysis'] = {
+                        f'total_{field}_relations': relations[f'{field}_rows'],
+                        f'{field}_types': relations[field].result().to_dict(),
+                        f'{field}_coverage': relations[f'{field}_rows'] / relations['rows']
+                    }
+
+        return stats_dict
+
+    def _municipality_patterns(self, entities: Dict, relations: Dict) -> Dict[str, Any]:
+        municipality_analysis = self.document_analyzer.analyze_municipality_patterns()
+
+        if entities['rows']:
+            municipality_analysis['entity_distribution'] = entities['municipality_label'].table().to_dict()
+            entity_density = entities['municipalities'].result() / self.documents_df.groupby('municipality').size()
+            municipality_analysis['entity_density'] = entity_density.to_dict()
+
+        if relations['rows']:
+            for field in ('posicionamento', 'resultado'):
+                if field in self.relation_columns:
+                    municipality_analysis[f'{field}_by_municipality'] = \
+                        relations[f'municipality_{field}'].table().to_dict()
+
+        return municipality_analysis
+
+    def _statistical_tests(self, entities: Dict, relations: Dict) -> Dict[str, Any]:
+        # Kruskal-Wallis on per-document counts only needs the document table
+        test_results = self.document_analyzer.compute_statistical_tests()
+
+        if entities['rows'] and len(entities['municipalities'].result()) > 1:
+            try:
+                test_results['entity_type_distribution'] = entities['municipality_label'].contingency_table().chi2_test()
+            except Exception as e:
+                test_results['entity_type_distribution'] = {'error': str(e)}
+
+        if relations['posicionamento_rows']:
+            fold = relations['municipality_posicionamento']
+            if len(fold.table()) > 1:
+                try:
+                    test_results['posicionamento_distribution'] = fold.contingency_table().chi2_test()
+                except Exception as e:
+                    test_results['posicionamento_distribution'] = {'error': str(e)}
+
+        return test_results
+
+    def _temporal_patterns(self, entities: Dict, relations: Dict) -> Dict[str, Any]:
+        temporal_analysis = self.document_analyzer.analyze_temporal_patterns()
+        if 'error' in temporal_analysis:
+            return temporal_analysis
+
+        if entities['rows']:
+            temporal_analysis['entities_by_year'] = entities['year_label'].table().to_dict()
+        if relations['rows'] and 'posicionamento' in self.relation_columns:
+            temporal_analysis['posicionamento_by_year'] = relations['year_posicionamento'].table().to_dict()
+        return temporal_analysis
+
+    def _entity_patterns(self, entities: Dict) -> Dict[str, Any]:
+        if not entities['rows']:
+            return {'error': 'No entity data available'}
+
+        entity_analysis = {}
+        entity_counts = entities['labels'].result().sort_values(ascending=False, kind='stable')
+        entity_analysis['entity_type_frequencies'] = entity_counts.to_dict()
+        entity_analysis['entity_type_percentages'] = (entity_counts / entity_counts.sum() * 100).round(2).to_dict()
+
+        for name, fold, digests in (('length_by_entity_type', entities['label_length'], entities['label_length_digests']),
+                                    ('tokens_by_entity_type', entities['label_tokens'], entities['label_token_digests'])):
+            summary = fold.result()
+            summary['median'] = [digests[label].quantile(0.5) for label in summary.index]
+            entity_analysis[name] = summary[['count', 'mean', 'median', 'std', 'min', 'max']].to_dict()
+
+        entity_analysis['common_entity_texts'] = {
+            label: texts.top(10) for label, texts in entities['label_texts'].items()
+        }
+        if entities['unlabelled_rows']:
+            # Unlabelled entities appear as a label that matches no rows, as in the in-memory report
+            entity_analysis['common_entity_texts'][np.nan] = {}
+
+        # Documents sharing both labels, from the document x label presence matrix
+        presence = (entities['filename_label'].table() > 0).astype(np.int64)
+        shared = presence.T.dot(presence)
+        entity_analysis['entity_cooccurrence'] = {}
+        for label in shared.index:
+            row = shared.loc[label].drop(label)
+            row = row[row > 0]
+            if not row.empty:
+                entity_analysis['entity_cooccurrence'][label] = {other: int(count) for other, count in row.items()}
+
+        return entity_analysis
+
+    def _posicionamento_patterns(self, relations: Dict) -> Dict[str, Any]:
+        if not relations['rows'] or 'posicionamento' not in self.relation_columns:
+            return {'error': 'No posicionamento data available'}
+        if not relations['posicionamento_rows']:
+            return {'error': 'No non-null posicionamento data available'}
+
+        posicionamento_analysis = {}
+        pos_counts = relations['posicionamento'].result()
+        pos_counts = pos_counts[pos_counts.index.notna()].sort_values(ascending=False, kind='stable')
+        posicionamento_analysis['posicionamento_frequencies'] = pos_counts.to_dict()
+        posicionamento_analysis['posicionamento_percentages'] = (pos_counts / pos_counts.sum() * 100).round(2).to_dict()
+        posicionamento_analysis['posicionamento_by_municipality'] = relations['municipality_posicionamento'].table().to_dict()
+
+        if 'resultado' in self.relation_columns:
+            pos_resultado = relations['posicionamento_resultado']
+            if not pos_resultado.result().empty:
+                posicionamento_analysis['posicionamento_resultado_matrix'] = \
+                    pos_resultado.contingency_table().to_frame().to_dict()
+
+        doc_pos_diversity = relations['filename_posicionamento'].result().groupby(level=0).size()
+        posicionamento_analysis['posicionamento_diversity_per_document'] = {
+            'mean_diversity': doc_pos_diversity.mean(),
+            'max_diversity': doc_pos_diversity.max(),
+            'documents_with_multiple_positions': (doc_pos_diversity > 1).sum(),
+            'percentage_with_multiple_positions': ((doc_pos_diversity > 1).sum() / len(doc_pos_diversity) * 100).round(2)
+        }
+        return posicionamento_analysis
+
+    def _assunto_patterns(self, entities: Dict) -> Dict[str, Any]:
+        if not entities['rows']:
+            return {'error': 'No entity data available'}
+        if not entities['assunto_rows']:
+            return {'error': 'No content-bearing ASSUNTO entities found'}
+
+        assunto_analysis = {}
+        n_documents = len(entities['assunto_documents'])
+        assunto_analysis['total_assunto_entities'] = entities['assunto_rows']
+        assunto_analysis['documents_with_assunto'] = n_documents
+        assunto_analysis['avg_assunto_per_document'] = entities['assunto_rows'] / n_documents
+        assunto_analysis['assunto_text_statistics'] = {
+            'unique_assunto_texts': int(round(entities['assunto_distinct'].estimate())),
+            'most_common_assuntos': entities['assunto_texts'].top(20),
+            'avg_assunto_length_chars': entities['assunto_length'].overall('mean'),
+            'avg_assunto_length_tokens': entities['assunto_tokens'].overall('mean')
+        }
+        assunto_analysis['assunto_word_frequencies'] = entities['assunto_words'].to_dict(50)
+
+        if 'tema' in self.entity_columns:
+            assunto_analysis['tema_distribution'] = \
+                entities['assunto_tema'].result().sort_values(ascending=False, kind='stable').to_dict()
+
+        resumo_length = entities['resumo_length'].result()
+        if not resumo_length.empty:
+            assunto_analysis['resumo_statistics'] = {
+                'total_with_resumo': int(resumo_length['count'].iloc[0]),
+                'avg_resumo_length': resumo_length['mean'].iloc[0],
+                'most_common_resumos': entities['resumo_texts'].top(10)
+            }
+
+        length = entities['assunto_muni_length'].result()
+        tokens = entities['assunto_muni_tokens'].result()
+        text_count = entities['assunto_muni_text_count'].result().reindex(length.index, fill_value=0)
+        distinct = pd.Series({municipality: int(round(sketch.estimate()))
+                              for municipality, sketch in entities['assunto_muni_distinct'].items()})
+        assunto_by_muni = pd.DataFrame({
+            ('text', 'count'): text_count,
+            ('text', 'nunique'): distinct.reindex(length.index, fill_value=0),
+            ('length', 'mean'): length['mean'],
+            ('length', 'std'): length['std'],
+            ('token_count', 'mean'): tokens['mean'],
+            ('token_count', 'std'): tokens['std']
+        }).round(2)
+        assunto_analysis['assunto_by_municipality'] = assunto_by_muni.to_dict()
+
+        return assunto_analysis
+
+    def _fronteiras_patterns(self, entities: Dict) -> Dict[str, Any]:
+        if not entities['rows']:
+            return {'error': 'No entity data available'}
+        if 'fronteira' not in self.entity_columns:
+            return {'error': 'No fronteira column found in entities'}
+
+        fronteira_counts = entities['fronteira_types'].result().sort_values(ascending=False, kind='stable')
+        if fronteira_counts.empty:
+            return {'error': 'No entities with fronteira information found'}
+
+        fronteira_analysis = {}
+        fronteira_analysis['total_fronteira_entities'] = int(fronteira_counts.sum())
+        fronteira_analysis['documents_with_fronteira'] = len(entities['fronteira_documents'])
+        fronteira_analysis['fronteira_type_distribution'] = fronteira_counts.to_dict()
+        fronteira_analysis['fronteira_type_percentages'] = (fronteira_counts / fronteira_counts.sum() * 100).round(2).to_dict()
+        fronteira_analysis['fronteira_by_municipality'] = entities['fronteira_municipality'].table().to_dict()
+
+        label_fronteira = entities['fronteira_label'].result()
+        fronteira_analysis['fronteira_entity_cooccurrence'] = {
+            label: counts.droplevel(0).sort_values(ascending=False, kind='stable').to_dict()
+            for label, counts in label_fronteira.groupby(level=0)
+        }
+
+        fronteira_analysis['fronteira_text_statistics'] = {
+            'avg_length_chars': entities['fronteira_length'].overall('mean'),
+            'avg_length_tokens': entities['fronteira_tokens'].overall('mean'),
+            'length_by_fronteira_type': entities['fronteira_type_length'].result()[['mean', 'std', 'count']].round(2).to_dict()
+        }
+        return fronteira_analysis
+
+    def _metadata_patterns(self, entities: Dict) -> Dict[str, Any]:
+        if not entities['rows']:
+            return {'error': 'No entity data available'}
+
+        metadata_analysis = {}
+        has = self.entity_columns.__contains__
+
+        tipo_counts = entities['tipo_reuniao'].result().sort_values(ascending=False, kind='stable')
+        if has('tipo_reuniao') and not tipo_counts.empty:
+            metadata_analysis['meeting_type_analysis'] = {
+                'total_with_meeting_type': int(tipo_counts.sum()),
+                'meeting_types': tipo_counts.to_dict(),
+                'meeting_type_percentages': (tipo_counts / tipo_counts.sum() * 100).round(2).to_dict()
+            }
+
+        if has('participantes') and entities['participantes_rows']:
+            metadata_analysis['participation_analysis'] = {
+                'total_with_participants': entities['participantes_rows'],
+                'documents_with_participants': len(entities['participantes_documents']),
+                'most_common_participants': entities['participantes'].top(20)
+            }
+
+        presenca_counts = entities['presenca'].result().sort_values(ascending=False, kind='stable')
+        if has('presenca') and not presenca_counts.empty:
+            metadata_analysis['presence_analysis'] = {
+                'total_with_presence_info': int(presenca_counts.sum()),
+                'presence_types': presenca_counts.to_dict(),
+                'presence_percentages': (presenca_counts / presenca_counts.sum() * 100).round(2).to_dict()
+            }
+
+        partido_counts = entities['partido'].result().sort_values(ascending=False, kind='stable')
+        if has('partido') and not partido_counts.empty:
+            metadata_analysis['political_party_analysis'] = {
+                'total_with_party_info': int(partido_counts.sum()),
+                'unique_parties': partido_counts.nunique(),
+                'party_distribution': partido_counts.to_dict(),
+                'party_percentages': (partido_counts / partido_counts.sum() * 100).round(2).to_dict()
+            }
+            party_by_muni = entities['municipality_partido']
+            if len(party_by_muni.table()) > 1:
+                metadata_analysis['political_party_analysis']['party_by_municipality'] = \
+                    party_by_muni.contingency_table().to_frame().to_dict()
+
+        if has('horario') and entities['horario_rows']:
+            metadata_analysis['schedule_analysis'] = {
+                'total_with_schedule': entities['horario_rows'],
+                'documents_with_schedule': len(entities['horario_documents']),
+                'schedule_patterns': entities['horario'].top(15)
+            }
+
+        if entities['cotabulation'] is not None:
+            metadata_analysis['metadata_correlations'] = {}
+            cotabulation = entities['cotabulation'].astype(np.int64).reset_index()
+            for (col1, col2), pair_counts in cotabulation.groupby(['field_1', 'field_2'], sort=False):
+                crosstab = pair_counts.pivot(index='value_1', columns='value_2', values='count').fillna(0).astype(int)
+                metadata_analysis['metadata_correlations'][f'{col1}_vs_{col2}'] = crosstab.to_dict()
+
+        return metadata_analysis
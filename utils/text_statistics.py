@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""
+Text Statistics Utilities for Portuguese Municipal Documents
+
+This module provides a streaming word-frequency engine used by the assunto analyses.
+Text is tokenised with a compiled Portuguese-aware pattern and counted under hashed
+64-bit integer IDs, so counts from many chunks or worker processes merge as NumPy arrays.
+"""
+
+import hashlib
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Iterator
+from collections import Counter
+import numpy as np
+
+# Abbreviations and ordinals carrying an ordinal indicator ("n.º", "nº", "1.ª", "3º"), words
+# (with accented letters, inner hyphens and apostrophes such as "apresentá-lo" or "d'água") and
+# numbers (with decimal or thousands separators such as "1.500,00"). º/ª are letters to the
+# regex engine, so they are excluded from words and only match attached to a preceding token.
+TOKEN_PATTERN = re.compile(r"(?:[^\W\d_ºª]+|\d+)\.?[ºª]|[^\W\d_ºª]+(?:[-'’][^\W\d_ºª]+)*|\d+(?:[.,]\d+)*")
+ORDINAL_INDICATOR_PATTERN = re.compile('([ºª])')
+
+PORTUGUESE_STOPWORDS = frozenset("""
+a à ao aos aquela aquelas aquele aqueles aquilo as às até com como da das de dela delas dele
+deles depois do dos e é ela elas ele eles em entre era eram essa essas esse esses esta está
+estão estas estava estavam este estes eu foi foram há isso isto já lhe lhes mais mas me mesmo
+meu minha muito na nas não nem no nos nós num numa o os ou para pela pelas pelo pelos por qual
+quando que quem se sem ser seu seus sua suas são só também te tem têm ter um uma umas uns
+sido sobre seja sejam será serão seria tal tendo tinha tinham vos vós
+""".split())
+
+
+def strip_accents(text: str) -> str:
+    """Strip diacritics (e.g. 'Câmara Municipal' -> 'Camara Municipal'), keeping º/ª ('n.º')."""
+    # NFKD would turn the ordinal indicators into plain o/a, so they are split off first
+    parts = ORDINAL_INDICATOR_PATTERN.split(text)
+    decomposed = [unicodedata.normalize('NFKD', part) if index % 2 == 0 else part
+                  for index, part in enumerate(parts)]
+    return ''.join(char for part in decomposed for char in part if not unicodedata.combining(char))
+
+
+def token_id(token: str) -> int:
+    """Stable 64-bit ID of a token, identical across processes and runs."""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def tokenize(text: str, lowercase: bool = True, fold: bool = False,
+             stopwords: Optional[frozenset] = None, min_token_length: int = 1) -> List[str]:
+    """
+    Tokenise a text with the compiled Portuguese token pattern.
+
+    Args:
+        text: Input text
+        lowercase: Lowercase before matching
+        fold: Strip accents before matching
+        stopwords: Tokens to drop (compared after lowercasing/folding)
+        min_token_length: Minimum token length in characters
+    """
+    if lowercase:
+        text = text.lower()
+    if fold:
+        text = strip_accents(text)
+    tokens = TOKEN_PATTERN.findall(text)
+    if stopwords or min_token_length > 1:
+        tokens = [token for token in tokens
+                  if len(token) >= min_token_length and not (stopwords and token in stopwords)]
+    return tokens
+
+
+def iter_text_chunks(texts: Iterable[str], chunk_size: int = 500) -> Iterator[List[str]]:
+    """Group an iterable of texts into lists of at most chunk_size non-empty strings."""
+    chunk = []
+    for text in texts:
+        if isinstance(text, str) and text:
+            chunk.append(text)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _count_chunk(texts: List[str], options: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, Dict[int, str]]:
+    """Count one chunk of texts; returns (ids, counts, id -> token) for merging."""
+    # One findall over the joined chunk keeps the scan inside the regex engine
+    token_counts = Counter(tokenize('\n'.join(texts), **options))
+    ids = np.fromiter((token_id(token) for token in token_counts), dtype=np.uint64, count=len(token_counts))
+    counts = np.fromiter(token_counts.values(), dtype=np.int64, count=len(token_counts))
+    vocabulary = dict(zip(ids.tolist(), token_counts))
+    return ids, counts, vocabulary
+
+
+class WordFrequencyCounter:
+    """
+    Streaming word-frequency counter keyed by hashed token IDs.
+
+    Chunks are counted independently (optionally in worker processes) and merged with
+    np.unique over the concatenated ID arrays. Counts are exact; with 64-bit IDs a
+    collision between two distinct tokens is negligible below billions of types.
+    """
+
+    def __init__(self, lowercase: bool = True, fold_accents: bool = False,
+                 remove_stopwords: bool = False, stopwords: Optional[Iterable[str]] = None,
+                 min_token_length: int = 1, chunk_size: int = 500, n_jobs: int = 1):
+        """
+        Args:
+            lowercase: Lowercase text before tokenising
+            fold_accents: Strip accents so 'câmara' and 'camara' are counted together
+            remove_stopwords: Drop Portuguese function words
+            stopwords: Custom stopword list (implies remove_stopwords)
+            min_token_length: Minimum token length in characters
+            chunk_size: Texts per tokenisation chunk
+            n_jobs: Worker processes for counting chunks (-1 uses all cores)
+        """
+        if stopwords is not None:
+            stopword_set = frozenset(stopwords)
+        elif remove_stopwords:
+            stopword_set = PORTUGUESE_STOPWORDS
+        else:
+            stopword_set = None
+        if stopword_set is not None and fold_accents:
+            stopword_set = frozenset(map(strip_accents, stopword_set))
+
+        self.options = {
+            'lowercase': lowercase,
+            'fold': fold_accents,
+            'stopwords': stopword_set,
+            'min_token_length': min_token_length
+        }
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self.vocabulary = {}
+        self._ids = np.empty(0, dtype=np.uint64)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._pending = []
+        self._pending_size = 0
+
+    def update(self, texts: Iterable[str]) -> 'WordFrequencyCounter':
+        """Stream texts through the counter in chunks."""
+        chunks = iter_text_chunks(texts, self.chunk_size)
+        n_jobs = self.n_jobs
+        if n_jobs is not None and n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+
+        if not n_jobs or n_jobs <= 1:
+            for chunk in chunks:
+                self._add(*_count_chunk(chunk, self.options))
+            return self
+
+        # Keep at most two chunks per worker in flight so the stream is never fully buffered
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            in_flight = []
+            for chunk in chunks:
+                in_flight.append(executor.submit(_count_chunk, chunk, self.options))
+                if len(in_flight) >= 2 * n_jobs:
+                    self._add(*in_flight.pop(0).result())
+            for future in in_flight:
+                self._add(*future.result())
+        return self
+
+    def _add(self, ids: np.ndarray, counts: np.ndarray, vocabulary: Dict[int, str]):
+        for key, token in vocabulary.items():
+            self.vocabulary.setdefault(key, token)
+        self._pending.append((ids, counts))
+        self._pending_size += len(ids)
+        if self._pending_size > max(1_000_000, len(self._ids)):
+            self._compact()
+
+    def _compact(self):
+        if not self._pending:
+            return
+        ids = np.concatenate([self._ids] + [ids for ids, _ in self._pending])
+        counts = np.concatenate([self._counts] + [counts for _, counts in self._pending])
+        self._ids, inverse = np.unique(ids, return_inverse=True)
+        self._counts = np.bincount(inverse, weights=counts, minlength=len(self._ids)).astype(np.int64)
+        self._pending = []
+        self._pending_size = 0
+
+    @property
+    def total_tokens(self) -> int:
+        self._compact()
+        return int(self._counts.sum())
+
+    @property
+    def unique_tokens(self) -> int:
+        self._compact()
+        return len(self._ids)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Top-n tokens with exact counts, ties broken alphabetically."""
+        self._compact()
+        if n is None or n >= len(self._ids):
+            top = np.arange(len(self._ids))
+        else:
+            top = np.argpartition(-self._counts, n - 1)[:n]
+        # Include every token tied with the n-th count before the final ordering
+        if n is not None and len(top) > 0 and n < len(self._ids):
+            top = np.flatnonzero(self._counts >= self._counts[top].min())
+        ranked = sorted(((self.vocabulary[int(key)], int(count))
+                         for key, count in zip(self._ids[top], self._counts[top])),
+                        key=lambda item: (-item[1], item[0]))
+        return ranked[:n] if n is not None else ranked
+
+    def to_dict(self, n: Optional[int] = None) -> Dict[str, int]:
+        return dict(self.most_common(n))
+
+
+def word_frequencies(texts: Iterable[str], top_n: Optional[int] = 50, **options) -> Dict[str, int]:
+    """
+    Top-N word frequencies over a corpus of texts.
+
+    Args:
+        texts: Iterable of strings (non-strings are skipped)
+        top_n: Number of most frequent words to return (None returns all)
+        **options: WordFrequencyCounter options (fold_accents, remove_stopwords, n_jobs, ...)
+    """
+    return WordFrequencyCounter(**options).update(texts).to_dict(top_n)
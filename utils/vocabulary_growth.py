@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+"""
+Vocabulary Growth and Lexical Diversity Curves
+
+This module streams parsed documents in meeting-date order and tracks, for the whole corpus
+and for each municipality, how many new word types and new entity surface forms every meeting
+contributes. Words come from the DKPro Token layer (falling back to the compiled token pattern
+when a document has no tokens or its token offsets do not line up with the text) and both vocabularies are kept as hashed 64-bit IDs in fixed-size
+bitmaps, so memory does not grow with the number of documents or types. Curves of tokens,
+types, type-token ratio and new-type / new-entity-text rates are emitted at configurable
+checkpoints and summarised with a Heaps' law fit (V = K * N^beta).
+"""
+
+import logging
+import math
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+import numpy as np
+import pandas as pd
+
+from inception_parser import token_spans_aligned
+from text_statistics import TOKEN_PATTERN, strip_accents, token_id, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class HashedVocabulary:
+    """
+    Bounded-memory set of hashed token IDs.
+
+    Each ID sets one bit of a 2**hash_bits bitmap (2**hash_bits / 8 bytes). Two types that
+    share a slot are counted once, so type counts are slight undercounts; estimated_types
+    corrects for this with linear counting.
+    """
+
+    def __init__(self, hash_bits: int = 24):
+        if not 3 <= hash_bits <= 40:
+            raise ValueError(f"hash_bits must be between 3 and 40, got {hash_bits}")
+        self.hash_bits = hash_bits
+        self.slots = 1 << hash_bits
+        self._mask = np.uint64(self.slots - 1)
+        self._bits = np.zeros(self.slots >> 3, dtype=np.uint8)
+        self.size = 0
+
+    def add(self, ids: np.ndarray) -> int:
+        """Add distinct IDs and return how many were not seen before."""
+        if len(ids) == 0:
+            return 0
+        slots = np.unique(np.asarray(ids, dtype=np.uint64) & self._mask)
+        byte, bit = slots >> np.uint64(3), (slots & np.uint64(7)).astype(np.uint8)
+        new = ((self._bits[byte] >> bit) & 1) == 0
+        np.bitwise_or.at(self._bits, byte[new], np.left_shift(1, bit[new]).astype(np.uint8))
+        added = int(new.sum())
+        self.size += added
+        return added
+
+    @property
+    def fill_ratio(self) -> float:
+        return self.size / self.slots
+
+    @property
+    def estimated_types(self) -> float:
+        """Linear-counting estimate of the distinct IDs added, correcting slot collisions."""
+        if self.size >= self.slots:
+            return float('inf')
+        return -self.slots * math.log1p(-self.size / self.slots)
+
+
+def heaps_fit(tokens: Iterable[float], types: Iterable[float]) -> Dict[str, Any]:
+    """
+    Least-squares fit of Heaps' law log V = log K + beta * log N.
+
+    Args:
+        tokens: Cumulative token counts N at each checkpoint
+        types: Cumulative type counts V at each checkpoint
+    """
+    tokens = np.asarray(list(tokens), dtype=float)
+    types = np.asarray(list(types), dtype=float)
+    valid = (tokens > 0) & (types > 0)
+    log_n, log_v = np.log(tokens[valid]), np.log(types[valid])
+
+    if len(np.unique(log_n)) < 2:
+        return {'error': 'Heaps fit needs at least two checkpoints with different token counts'}
+
+    beta, log_k = np.polyfit(log_n, log_v, 1)
+    residuals = log_v - (log_k + beta * log_n)
+    total = np.sum((log_v - log_v.mean()) ** 2)
+    return {
+        'k': float(np.exp(log_k)),
+        'beta': float(beta),
+        'r_squared': float(1 - np.sum(residuals ** 2) / total) if total > 0 else 1.0,
+        'points': int(valid.sum())
+    }
+
+
+class _GrowthStream:
+    """Cumulative counters and checkpoint curve for one stream (corpus or municipality)."""
+
+    def __init__(self, hash_bits: int):
+        self.words = HashedVocabulary(hash_bits)
+        self.entity_texts = HashedVocabulary(hash_bits)
+        self.documents = 0
+        self.tokens = 0
+        self.entity_mentions = 0
+        self.curve = []
+        self._last = {'tokens': 0, 'types': 0, 'entity_mentions': 0, 'entity_texts': 0}
+
+    def update(self, token_ids: np.ndarray, n_tokens: int, entity_ids: np.ndarray, n_mentions: int):
+        self.documents += 1
+        self.tokens += n_tokens
+        self.entity_mentions += n_mentions
+        self.words.add(token_ids)
+        self.entity_texts.add(entity_ids)
+
+    def checkpoint(self, date: str, filename: str):
+        window_tokens = self.tokens - self._last['tokens']
+        window_mentions = self.entity_mentions - self._last['entity_mentions']
+        new_types = self.words.size - self._last['types']
+        new_entity_texts = self.entity_texts.size - self._last['entity_texts']
+        self.curve.append({
+            'documents': self.documents,
+            'date': date,
+            'filename': filename,
+            'tokens': self.tokens,
+            'types': self.words.size,
+            'type_token_ratio': self.words.size / self.tokens if self.tokens else 0.0,
+            'new_types': new_types,
+            'new_type_rate': new_types / window_tokens if window_tokens else 0.0,
+            'entity_mentions': self.entity_mentions,
+            'entity_texts': self.entity_texts.size,
+            'new_entity_texts': new_entity_texts,
+            'new_entity_text_rate': new_entity_texts / window_mentions if window_mentions else 0.0
+        })
+        self._last = {'tokens': self.tokens, 'types': self.words.size,
+                      'entity_mentions': self.entity_mentions, 'entity_texts': self.entity_texts.size}
+
+    def result(self) -> Dict[str, Any]:
+        heaps = heaps_fit([point['tokens'] for point in self.curve], [point['types'] for point in self.curve])
+        summary = {
+            'documents': self.documents,
+            'tokens': self.tokens,
+            'types': self.words.size,
+            'estimated_types': round(self.words.estimated_types, 1),
+            'type_token_ratio': self.words.size / self.tokens if self.tokens else 0.0,
+            'entity_mentions': self.entity_mentions,
+            'entity_texts': self.entity_texts.size,
+            'entity_text_ratio': self.entity_texts.size / self.entity_mentions if self.entity_mentions else 0.0
+        }
+        if 'beta' in heaps and self.tokens:
+            # dV/dN of the fitted curve at the current size: expected new types per 1,000 further tokens
+            summary['expected_new_types_per_1k_tokens'] = 1000 * heaps['beta'] * heaps['k'] * self.tokens ** (heaps['beta'] - 1)
+        return {'summary': summary, 'heaps_law': heaps, 'curve': self.curve}
+
+
+class VocabularyGrowthTracker:
+    """
+    Streaming vocabulary-growth tracker over documents in meeting-date order.
+
+    Documents are consumed one at a time (e.g. from InceptionParser.iter_documents) and only
+    the hashed vocabularies and the checkpoint curves are kept.
+    """
+
+    def __init__(self, checkpoint_every: int = 1, checkpoint_tokens: Optional[int] = None,
+                 hash_bits: int = 24, lowercase: bool = True, fold_accents: bool = False,
+                 entity_labels: Optional[Iterable[str]] = None):
+        """
+        Args:
+            checkpoint_every: Emit a curve point every n documents of a stream
+            checkpoint_tokens: Emit a curve point whenever a stream passes another multiple of
+                this many tokens (replaces checkpoint_every when given)
+            hash_bits: Bitmap size per vocabulary (2**hash_bits slots, 2**hash_bits / 8 bytes)
+            lowercase: Lowercase words and entity texts
+            fold_accents: Strip accents from words and entity texts
+            entity_labels: Entity labels whose surface forms are tracked (default: all)
+        """
+        if checkpoint_every < 1:
+            raise ValueError(f"checkpoint_every must be at least 1, got {checkpoint_every}")
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_tokens = checkpoint_tokens
+        self.hash_bits = hash_bits
+        self.lowercase = lowercase
+        self.fold_accents = fold_accents
+        self.entity_labels = frozenset(entity_labels) if entity_labels is not None else None
+        self.corpus = _GrowthStream(hash_bits)
+        self.municipalities = {}
+        self.out_of_order = 0
+        self.token_fallbacks = 0
+        self._last_document = {}
+
+    def _normalize(self, text: str) -> str:
+        if self.lowercase:
+            text = text.lower()
+        if self.fold_accents:
+            text = strip_accents(text)
+        return text
+
+    def _document_words(self, doc) -> List[str]:
+        """
+        Word tokens of a document from the DKPro Token layer (punctuation tokens dropped).
+
+        Falls back to tokenize() when the document has no Token layer or its token offsets do not
+        line up with the text (counted in token_fallbacks).
+        """
+        text = doc.text_content or ''
+        spans = [] if doc.token_spans is None else doc.token_spans.tolist()
+        # Normalise after slicing: lowercasing or folding can change string length
+        slices = [text[begin:end] for begin, end in spans]
+        if not token_spans_aligned(slices):
+            self.token_fallbacks += 1
+            return tokenize(text, lowercase=self.lowercase, fold=self.fold_accents)
+        tokens = (self._normalize(token) for token in slices)
+        return [token for token in tokens if TOKEN_PATTERN.fullmatch(token)]
+
+    def _stream_due(self, stream: _GrowthStream, tokens_before: int) -> bool:
+        if self.checkpoint_tokens:
+            return stream.tokens // self.checkpoint_tokens > tokens_before // self.checkpoint_tokens
+        return stream.documents % self.checkpoint_every == 0
+
+    def update(self, doc) -> 'VocabularyGrowthTracker':
+        """
+        Add one DocumentAnnotation; documents should arrive in date order.
+
+        The date is metadata['normalized_date'] when set by InceptionParser.iter_documents,
+        otherwise the raw filename date.
+        """
+        words = Counter(self._document_words(doc))
+        token_ids = np.fromiter((token_id(word) for word in words), dtype=np.uint64, count=len(words))
+        n_tokens = sum(words.values())
+
+        mentions = [' '.join(self._normalize(entity.text).split()) for entity in doc.entity_spans
+                    if entity.text and (self.entity_labels is None or entity.label in self.entity_labels)]
+        entity_forms = set(mentions)
+        entity_ids = np.fromiter((token_id(form) for form in entity_forms), dtype=np.uint64, count=len(entity_forms))
+
+        date = doc.metadata.get('normalized_date') or doc.date
+        for key in (None, doc.municipality):
+            if key is None:
+                stream = self.corpus
+            else:
+                stream = self.municipalities.setdefault(key, _GrowthStream(self.hash_bits))
+            if date < self._last_document.get(key, ('', ''))[0]:
+                self.out_of_order += 1
+            tokens_before = stream.tokens
+            stream.update(token_ids, n_tokens, entity_ids, len(mentions))
+            self._last_document[key] = (date, doc.filename)
+            if self._stream_due(stream, tokens_before):
+                stream.checkpoint(date, doc.filename)
+        return self
+
+    def _close(self, stream: _GrowthStream, key):
+        # Always end a curve on the last document of the stream
+        if stream.documents and (not stream.curve or stream.curve[-1]['documents'] != stream.documents):
+            stream.checkpoint(*self._last_document[key])
+
+    def result(self) -> Dict[str, Any]:
+        """Curves, Heaps' law fits and summaries for the corpus and each municipality."""
+        if self.corpus.documents == 0:
+            return {'error': 'No documents processed'}
+        if self.out_of_order:
+            logger.warning(f"{self.out_of_order} documents arrived out of date order; curves follow arrival order")
+
+        self._close(self.corpus, None)
+        for municipality, stream in self.municipalities.items():
+            self._close(stream, municipality)
+
+        return {
+            'metadata': {
+                'documents': self.corpus.documents,
+                'municipalities': len(self.municipalities),
+                'checkpoint_every': self.checkpoint_every,
+                'checkpoint_tokens': self.checkpoint_tokens,
+                'hash_bits': self.hash_bits,
+                'vocabulary_fill_ratio': round(self.corpus.words.fill_ratio, 6),
+                'out_of_order_documents': self.out_of_order,
+                'token_layer_fallbacks': self.token_fallbacks
+            },
+            'corpus': self.corpus.result(),
+            'municipalities': {municipality: stream.result()
+                               for municipality, stream in sorted(self.municipalities.items())}
+        }
+
+
+def vocabulary_growth(documents: Iterable, **options) -> Dict[str, Any]:
+    """
+    Vocabulary growth and lexical-diversity curves for a stream of documents.
+
+    Args:
+        documents: DocumentAnnotation objects in date order (e.g. InceptionParser.iter_documents)
+        **options: VocabularyGrowthTracker options
+
+    Returns:
+        Dict: metadata, 'corpus' and per-municipality results with 'summary', 'heaps_law' and 'curve'
+    """
+    tracker = VocabularyGrowthTracker(**options)
+    for doc in documents:
+        tracker.update(doc)
+    return tracker.result()
+
+
+def growth_curves_dataframe(growth: Dict[str, Any]) -> pd.DataFrame:
+    """Long table of all curve points with a 'stream' column ('corpus' or the municipality)."""
+    frames = [pd.DataFrame(growth['corpus']['curve']).assign(stream='corpus')]
+    frames += [pd.DataFrame(result['curve']).assign(stream=municipality)
+               for municipality, result in growth['municipalities'].items()]
+    curves = pd.concat(frames, ignore_index=True)
+    return curves[['stream'] + [column for column in curves.columns if column != 'stream']]
+
+
+def main():
+    """Command-line interface for vocabulary growth curves."""
+    import argparse
+    import json
+    from inception_parser import InceptionParser
+    from report_tables import to_json_compatible
+
+    parser = argparse.ArgumentParser(description='Vocabulary growth curves over INCEpTION documents in date order')
+    parser.add_argument('--data_dir', type=str,
+                       default='../data/shared/inception',
+                       help='Path to directory containing INCEpTION JSON files')
+    parser.add_argument('--output_dir', type=str,
+                       default='../results/statistics',
+                       help='Output directory for vocabulary_growth.json and vocabulary_growth.csv')
+    parser.add_argument('--checkpoint_every', type=int, default=1,
+                       help='Curve point every n documents of each stream')
+    parser.add_argument('--checkpoint_tokens', type=int, default=None,
+                       help='Curve point every n tokens of each stream (overrides --checkpoint_every)')
+    parser.add_argument('--hash_bits', type=int, default=24,
+                       help='Vocabulary bitmap size as a power of two')
+    parser.add_argument('--fold_accents', action='store_true',
+                       help='Strip accents before counting types')
+
+    args = parser.parse_args()
+
+    inception_parser = InceptionParser()
+    growth = vocabulary_growth(inception_parser.iter_documents(Path(args.data_dir)),
+                               checkpoint_every=args.checkpoint_every,
+                               checkpoint_tokens=args.checkpoint_tokens,
+                               hash_bits=args.hash_bits,
+                               fold_accents=args.fold_accents)
+    if 'error' in growth:
+        print(growth['error'])
+        return
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / 'vocabulary_growth.json', 'w', encoding='utf-8') as f:
+        json.dump(to_json_compatible(growth), f, indent=2, ensure_ascii=False)
+    growth_curves_dataframe(growth).to_csv(output_dir / 'vocabulary_growth.csv', index=False)
+
+    print(f"\n=== VOCABULARY GROWTH ===")
+    for name, result in [('corpus', growth['corpus'])] + list(growth['municipalities'].items()):
+        summary, heaps = result['summary'], result['heaps_law']
+        fit = f"beta={heaps['beta']:.3f}" if 'beta' in heaps else heaps['error']
+        print(f"{name}: {summary['documents']} docs, {summary['tokens']} tokens, "
+              f"{summary['types']} types, TTR={summary['type_token_ratio']:.4f}, {fit}")
+    if growth['metadata']['token_layer_fallbacks']:
+        print(f"({growth['metadata']['token_layer_fallbacks']} documents with misaligned Token offsets "
+              f"were re-tokenised from the text)")
+    print(f"\nResults saved to: {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+"""
+Party Voting Cohesion and Agreement from Voting Relations
+
+This module turns the 'posicionamento' relations between Votação entities and their voters into
+a party × vote-item matrix and measures how parties vote:
+
+- Voters are resolved to parties from the participant lists of the minutes (Metadados spans
+  carrying partido): by participant name, by a party named in the voter text ("Vereadora da
+  CDU", "os eleitos pelo PS"), by the Presidente / Vice-presidente role, or as a collective
+  vote of the whole council ("A Câmara", "o Executivo Municipal", empty voter spans), which is
+  given to every party present that has no position of its own on that item.
+- Positions are counted in three sparse party × item matrices (a favor, contra, abstenção).
+  Rice cohesion |Y - N| / (Y + N) and the Hix agreement index are computed on their non-zero
+  cells, and pairwise party agreement is the share of co-voted items where both parties'
+  majority positions coincide, from sparse products of one-hot position matrices.
+"""
+
+import re
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from text_statistics import strip_accents
+
+VOTE_POSITIONS = ('a favor', 'contra', 'abstenção')
+COLLECTIVE_VOTER_PATTERN = re.compile(r'\b(camara|executivo|presentes|todos|restantes|orgao)\b')
+NAME_PARTICLES = frozenset({'da', 'das', 'de', 'do', 'dos', 'e'})
+
+
+def _normalize(text: Any) -> str:
+    if not isinstance(text, str):
+        return ''
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', strip_accents(text).lower()).split())
+
+
+def party_rosters(entities_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Participants with a party from the Metadados spans of every document.
+
+    Returns:
+        pd.DataFrame: filename, municipality, party, role and name_tokens (frozenset of
+        normalised name words without particles)
+    """
+    participants = entities_df[entities_df['partido'].notna() & entities_df['text'].notna()]
+    roster = pd.DataFrame({
+        'filename': participants['filename'].astype(str).to_numpy(),
+        'municipality': participants['municipality'].astype(str).to_numpy(),
+        'party': participants['partido'].astype(str).to_numpy(),
+        'role': participants['participantes'].astype(object).to_numpy() if 'participantes' in participants else None,
+        'name_tokens': [frozenset(_normalize(name).split()) - NAME_PARTICLES for name in participants['text']]
+    })
+    return roster.drop_duplicates(['filename', 'party', 'name_tokens'], ignore_index=True)
+
+
+def _party_aliases(parties: List[str]) -> List[Tuple[str, str, bool]]:
+    """(normalised alias, party, is_full_label) for a municipality's party labels."""
+    aliases = [(_normalize(party), party, True) for party in parties]
+    for party in parties:
+        for component in re.split(r'[/.]', party):
+            alias = _normalize(component)
+            if len(alias) >= 2 and alias != _normalize(party):
+                aliases.append((alias, party, False))
+    return [alias for alias in aliases if alias[0]]
+
+
+class _VoterResolver:
+    """Resolve voter texts to parties with the rosters of their document and municipality."""
+
+    def __init__(self, roster: pd.DataFrame):
+        self.by_document = {filename: list(zip(group['name_tokens'], group['party'], group['role']))
+                            for filename, group in roster.groupby('filename', sort=False)}
+        self.by_municipality = {municipality: list(zip(group['name_tokens'], group['party'], group['role']))
+                                for municipality, group in roster.groupby('municipality', sort=False)}
+        self.aliases = {municipality: _party_aliases(sorted(group['party'].unique()))
+                        for municipality, group in roster.groupby('municipality', sort=False)}
+
+    def resolve(self, filename: str, municipality: str, text: Any) -> Tuple[Optional[str], str]:
+        normalized = _normalize(text)
+        if not normalized:
+            # Zero-length voter spans mark the rest of the council voting together
+            return None, 'collective'
+        tokens = frozenset(normalized.split()) - NAME_PARTICLES
+        rosters = [self.by_document.get(filename, []), self.by_municipality.get(municipality, [])]
+
+        if len(tokens) >= 2:
+            for roster in rosters:
+                parties = {party for name_tokens, party, _ in roster if tokens <= name_tokens}
+                if len(parties) == 1:
+                    return parties.pop(), 'participant_name'
+                if parties:
+                    break
+
+        padded = f' {normalized} '
+        scores = {}
+        for alias, party, full_label in self.aliases.get(municipality, []):
+            if f' {alias} ' in padded:
+                scores[party] = max(scores.get(party, 0), len(alias) + (0.5 if full_label else 0))
+        if scores:
+            best = max(scores.values())
+            winners = [party for party, score in scores.items() if score == best]
+            if len(winners) == 1:
+                return winners[0], 'party_mention'
+
+        if 'presidente' in tokens:
+            wanted_role = 'Vice-presidente' if 'vice' in tokens else 'Presidente'
+            for roster in rosters:
+                parties = {party for _, party, role in roster if role == wanted_role}
+                if len(parties) == 1:
+                    return parties.pop(), 'president'
+
+        if COLLECTIVE_VOTER_PATTERN.search(normalized):
+            return None, 'collective'
+        return None, 'unresolved'
+
+
+def voting_records(entities_df: pd.DataFrame, relations_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per 'posicionamento' relation with a vote position.
+
+    Returns:
+        pd.DataFrame: filename, municipality, item_id (Votação entity id), voter_text, position
+    """
+    relations = relations_df[(relations_df['relation_label'] == 'posicionamento') &
+                             relations_df['posicionamento'].isin(VOTE_POSITIONS)]
+    entities = entities_df[['filename', 'entity_id', 'posicionamento', 'text']].assign(
+        filename=lambda df: df['filename'].astype(str))
+    relations = relations.assign(filename=relations['filename'].astype(str))
+
+    linked = (relations[['filename', 'municipality', 'dependent_id', 'governor_id', 'posicionamento']]
+              .rename(columns={'posicionamento': 'position'})
+              .merge(entities.add_prefix('dependent_'), left_on=['filename', 'dependent_id'],
+                     right_on=['dependent_filename', 'dependent_entity_id'], how='left')
+              .merge(entities.add_prefix('governor_'), left_on=['filename', 'governor_id'],
+                     right_on=['governor_filename', 'governor_entity_id'], how='left'))
+
+    # The Votação entity is normally the dependent; the other end is the voter
+    dependent_is_item = (linked['dependent_posicionamento'] == 'Votação').to_numpy()
+    return pd.DataFrame({
+        'filename': linked['filename'].to_numpy(),
+        'municipality': linked['municipality'].astype(str).to_numpy(),
+        'item_id': np.where(dependent_is_item, linked['dependent_id'], linked['governor_id']),
+        'voter_text': np.where(dependent_is_item, linked['governor_text'], linked['dependent_text']),
+        'position': linked['position'].astype(str).to_numpy()
+    })
+
+
+def _assign_parties(records: pd.DataFrame, roster: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Resolve each record's voter; collective records become one record per present party.
+
+    Returns:
+        Tuple: (party votes, records with party and resolution method)
+    """
+    resolver = _VoterResolver(roster)
+    voters = records[['filename', 'municipality', 'voter_text']].drop_duplicates()
+    resolved = [resolver.resolve(filename, municipality, text)
+                for filename, municipality, text in voters.itertuples(index=False)]
+    voters = voters.assign(party=[party for party, _ in resolved], method=[method for _, method in resolved])
+    records = records.merge(voters, on=['filename', 'municipality', 'voter_text'], how='left')
+
+    specific = records[records['party'].notna()]
+    collective = records[records['method'] == 'collective'].drop(columns='party')
+
+    # Parties present in each document, falling back to the municipality roster
+    present = roster[['filename', 'party']].drop_duplicates()
+    documents = collective[['filename', 'municipality']].drop_duplicates()
+    missing = documents[~documents['filename'].isin(present['filename'])]
+    present = pd.concat([present, missing.merge(roster[['municipality', 'party']].drop_duplicates(),
+                                                on='municipality')[['filename', 'party']]])
+    expanded = collective.merge(present, on='filename')
+    expanded = expanded.merge(specific[['filename', 'item_id', 'party']].drop_duplicates().assign(_specific=True),
+                              on=['filename', 'item_id', 'party'], how='left')
+    expanded = expanded[expanded['_specific'].isna()].drop(columns='_specific')
+    expanded = expanded.drop_duplicates(['filename', 'item_id', 'party', 'position'])
+
+    return pd.concat([specific, expanded], ignore_index=True), records
+
+
+def party_vote_matrices(party_votes: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Sparse (municipality, party) × vote-item count matrices, one per position.
+
+    Returns:
+        Dict: 'parties' (MultiIndex), 'items' (MultiIndex of filename, item_id) and
+        'counts' {position: csr matrix}
+    """
+    party_codes, parties = pd.MultiIndex.from_frame(party_votes[['municipality', 'party']]).factorize()
+    item_codes, items = pd.MultiIndex.from_frame(party_votes[['filename', 'item_id']]).factorize()
+    parties = pd.MultiIndex.from_tuples(parties, names=['municipality', 'party'])
+    items = pd.MultiIndex.from_tuples(items, names=['filename', 'item_id'])
+    position_codes = pd.Categorical(party_votes['position'], categories=VOTE_POSITIONS).codes
+    shape = (len(parties), len(items))
+
+    counts = {}
+    for code, position in enumerate(VOTE_POSITIONS):
+        selected = position_codes == code
+        counts[position] = sparse.csr_matrix((np.ones(selected.sum()), (party_codes[selected], item_codes[selected])),
+                                             shape=shape)
+    return {'parties': parties, 'items': items, 'counts': counts}
+
+
+def cohesion_cells(matrices: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Rice and Hix indices and the majority position for every voted (party, item) cell.
+
+    Rice = |Y - N| / (Y + N) (NaN when the party only abstained); Hix agreement index =
+    (max(Y, N, A) - (Y + N + A - max) / 2) / (Y + N + A). Tied majorities have majority -1.
+    """
+    counts = matrices['counts']
+    total = (counts['a favor'] + counts['contra'] + counts['abstenção']).tocoo()
+    rows, cols = total.row, total.col
+    stacked = np.column_stack([np.asarray(counts[position][rows, cols]).ravel() for position in VOTE_POSITIONS])
+    yes, no, abstain = stacked.T
+    votes = stacked.sum(axis=1)
+    top = stacked.max(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rice = np.abs(yes - no) / (yes + no)
+    majority = np.where((stacked == top[:, None]).sum(axis=1) > 1, -1, stacked.argmax(axis=1))
+
+    return pd.DataFrame({
+        'party': rows, 'item': cols, 'votes': votes, 'yes': yes, 'no': no, 'abstain': abstain,
+        'rice': rice, 'hix': (top - (votes - top) / 2) / votes,
+        'split': (stacked > 0).sum(axis=1) > 1, 'majority': majority
+    })
+
+
+def party_agreement(cells: pd.DataFrame, n_parties: int, n_items: int,
+                    item_mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairwise agreement from one-hot majority-position matrices.
+
+    Args:
+        cells: Result of cohesion_cells
+        n_parties: Rows of the party × item matrices
+        n_items: Columns of the party × item matrices
+        item_mask: Optional boolean mask restricting the items (e.g. one period)
+
+    Returns:
+        Tuple: (agreements, co_votes) party × party arrays; tied majorities are left out
+    """
+    cells = cells[cells['majority'] >= 0]
+    if item_mask is not None:
+        cells = cells[item_mask[cells['item'].to_numpy()]]
+
+    voted = sparse.csr_matrix((np.ones(len(cells)), (cells['party'], cells['item'])), shape=(n_parties, n_items))
+    co_votes = (voted @ voted.T).toarray()
+    agreements = np.zeros_like(co_votes)
+    for code in range(len(VOTE_POSITIONS)):
+        chosen = cells[cells['majority'] == code]
+        one_hot = sparse.csr_matrix((np.ones(len(chosen)), (chosen['party'], chosen['item'])),
+                                    shape=(n_parties, n_items))
+        agreements += (one_hot @ one_hot.T).toarray()
+    return agreements, co_votes
+
+
+def _agreement_table(agreements: np.ndarray, co_votes: np.ndarray, rows: np.ndarray,
+                     names: List[str], min_items: int) -> Dict[str, Any]:
+    block = np.ix_(rows, rows)
+    shared, agreed = co_votes[block], agreements[block]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = np.where(shared >= min_items, agreed / shared, np.nan)
+    return {
+        'parties': names,
+        'agreement_rate': {a: {b: (None if np.isnan(rates[i, j]) else round(float(rates[i, j]), 4))
+                               for j, b in enumerate(names) if i != j} for i, a in enumerate(names)},
+        'co_voted_items': {a: {b: int(shared[i, j]) for j, b in enumerate(names) if i != j}
+                           for i, a in enumerate(names)}
+    }
+
+
+def voting_cohesion(entities_df: pd.DataFrame, relations_df: pd.DataFrame,
+                    periods: Optional[pd.Series] = None, min_items: int = 5) -> Dict[str, Any]:
+    """
+    Party cohesion and pairwise agreement per municipality, overall and per period.
+
+    Args:
+        entities_df: Entity table (voters, Votação items and Metadados participants)
+        relations_df: Relation table with posicionamento relations
+        periods: Period label per filename (e.g. year); omitted periods are skipped
+        min_items: Minimum co-voted items for an agreement rate
+
+    Returns:
+        Dict: resolution summary, per-municipality party cohesion and agreement, over_time
+    """
+    roster = party_rosters(entities_df)
+    if roster.empty:
+        return {'error': 'No participants with party (partido) annotations found'}
+    records = voting_records(entities_df, relations_df)
+    if records.empty:
+        return {'error': 'No posicionamento relations with vote positions found'}
+
+    party_votes, records = _assign_parties(records, roster)
+    if party_votes.empty:
+        return {'error': 'No voters could be resolved to parties'}
+
+    matrices = party_vote_matrices(party_votes)
+    parties, items = matrices['parties'], matrices['items']
+    cells = cohesion_cells(matrices)
+    cells['municipality'] = parties.get_level_values('municipality')[cells['party']]
+    agreements, co_votes = party_agreement(cells, len(parties), len(items))
+
+    item_periods = None
+    if periods is not None:
+        item_periods = pd.Series(items.get_level_values('filename')).map(periods).to_numpy()
+        cells['period'] = item_periods[cells['item']]
+
+    unresolved = records[records['method'] == 'unresolved']
+    cohesion_analysis = {
+        'summary': {
+            'vote_items': int(records[['filename', 'item_id']].drop_duplicates().shape[0]),
+            'party_voted_items': len(items),
+            'voter_positions': len(records),
+            'resolution': records['method'].value_counts().to_dict(),
+            'party_item_cells': len(cells),
+            'split_cells': int(cells['split'].sum())
+        },
+        'unresolved_voters': unresolved['voter_text'].fillna('').value_counts().head(20).to_dict(),
+        'municipalities': {}
+    }
+
+    for municipality, municipality_cells in cells.groupby('municipality', sort=True):
+        rows = np.unique(municipality_cells['party'].to_numpy())
+        names = parties.get_level_values('party')[rows].tolist()
+        grouped = municipality_cells.groupby('party')
+        position_totals = grouped[['yes', 'no', 'abstain']].sum()
+
+        party_cohesion = {}
+        for row, name in zip(rows, names):
+            party_cells = grouped.get_group(row)
+            party_cohesion[name] = {
+                'items': len(party_cells),
+                'rice_mean': float(party_cells['rice'].mean()) if party_cells['rice'].notna().any() else None,
+                'hix_mean': float(party_cells['hix'].mean()),
+                'split_items': int(party_cells['split'].sum()),
+                'positions': dict(zip(VOTE_POSITIONS, position_totals.loc[row].astype(int).tolist()))
+            }
+
+        result = {
+            'cohesion': party_cohesion,
+            'agreement': _agreement_table(agreements, co_votes, rows, names, min_items)
+        }
+
+        if item_periods is not None:
+            over_time = {}
+            for period, period_cells in municipality_cells.groupby('period', sort=True):
+                period_agreements, period_co_votes = party_agreement(cells, len(parties), len(items),
+                                                                     item_periods == period)
+                period_rows = np.unique(period_cells['party'].to_numpy())
+                period_names = parties.get_level_values('party')[period_rows].tolist()
+                rice = period_cells.groupby('party')['rice'].mean()
+                over_time[period] = {
+                    'items': int(period_cells['item'].nunique()),
+                    'rice_mean': {name: (None if pd.isna(rice.loc[row]) else float(rice.loc[row]))
+                                  for row, name in zip(period_rows, period_names)},
+                    'agreement_rate': _agreement_table(period_agreements, period_co_votes, period_rows,
+                                                       period_names, min_items)['agreement_rate']
+                }
+            result['over_time'] = over_time
+
+        cohesion_analysis['municipalities'][municipality] = result
+
+    return cohesion_analysis